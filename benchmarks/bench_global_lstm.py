@@ -0,0 +1,70 @@
+"""
+Training and inference throughput of one LSTMForecaster per ticker versus a
+single GlobalLSTMForecaster over the whole universe, at equal epochs.
+
+    python benchmarks/bench_global_lstm.py --tickers 5 20 50 --days 756 --epochs 2
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from bench_suite import synthetic_prices
+from src.global_model import GlobalLSTMForecaster
+from src.models import LSTMForecaster
+
+def per_ticker(prices, window: int, epochs: int, steps: int) -> dict:
+    start = time.perf_counter()
+    models = {}
+    for ticker in prices.columns:
+        models[ticker] = LSTMForecaster(ticker, window=window)
+        models[ticker].train(prices[ticker], epochs=epochs)
+    train = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for ticker, model in models.items():
+        model.forecast_from_history(prices[ticker], np.array([len(prices)]), steps=steps)
+    return {'train_s': train, 'forecast_s': time.perf_counter() - start, 'models': len(models)}
+
+def pooled(prices, window: int, epochs: int, steps: int, batch_size: int) -> dict:
+    model = GlobalLSTMForecaster(window=window)
+    start = time.perf_counter()
+    model.train(prices, epochs=epochs, batch_size=batch_size)
+    train = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model.forecast(prices, steps=steps)
+    return {'train_s': train, 'forecast_s': time.perf_counter() - start, 'models': 1}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, nargs="+", default=[5, 20])
+    parser.add_argument("--days", type=int, default=756)
+    parser.add_argument("--window", type=int, default=60)
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--steps", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=256, help="global model batch size")
+    args = parser.parse_args()
+    # Keep the pipeline's per-model progress messages out of the JSON output
+    logging.getLogger("src").setLevel(logging.WARNING)
+
+    for n in args.tickers:
+        prices = synthetic_prices(n, args.days)
+        windows = n * (args.days - args.window) * args.epochs
+        row = {'tickers': n, 'days': args.days, 'epochs': args.epochs}
+        for name, result in (('per_ticker', per_ticker(prices, args.window, args.epochs, args.steps)),
+                             ('global', pooled(prices, args.window, args.epochs, args.steps, args.batch_size))):
+            row[f'{name}_train_s'] = round(result['train_s'], 3)
+            row[f'{name}_train_windows_per_s'] = round(windows / result['train_s'], 1)
+            row[f'{name}_forecast_s'] = round(result['forecast_s'], 3)
+            row[f'{name}_forecast_tickers_per_s'] = round(n / result['forecast_s'], 1)
+        row['train_speedup'] = round(row['per_ticker_train_s'] / row['global_train_s'], 2)
+        row['forecast_speedup'] = round(row['per_ticker_forecast_s'] / row['global_forecast_s'], 2)
+        print(json.dumps(row))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Import time and resident memory of each project module in a fresh interpreter,
+plus the startup of the CLI. Heavy backends (TensorFlow, statsmodels, shap, ...)
+must only load when a command actually needs them; --check turns this into a
+regression gate.
+
+    python benchmarks/bench_imports.py --repeat 5 --check
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+MODULES = ['src.cli', 'src.data_processing', 'src.storage', 'src.optimization', 'src.backtest',
+           'src.models', 'src.model_store', 'src.training', 'src.explainability', 'src.streaming']
+HEAVY = ['tensorflow', 'statsmodels', 'sklearn', 'shap', 'matplotlib', 'pypfopt', 'cvxpy', 'yfinance']
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                   'heavy': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def probe(module: str) -> dict:
+    """Import module in a new interpreter and report time, peak RSS and heavy modules loaded"""
+    out = subprocess.run([sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY)], cwd=ROOT,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def cli_startup() -> float:
+    """Wall time of `python -m src.cli --help`, interpreter start-up included"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "src.cli", "--help"], cwd=ROOT, capture_output=True, check=True)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per module (median is reported)")
+    parser.add_argument("--check", action="store_true", help="exit non-zero if a budget is exceeded")
+    parser.add_argument("--max-seconds", type=float, default=1.0, help="import-time budget per module")
+    parser.add_argument("--max-cli-seconds", type=float, default=1.0, help="budget for `src.cli --help`")
+    args = parser.parse_args()
+
+    failures = []
+    for module in args.modules:
+        runs = [probe(module) for _ in range(args.repeat)]
+        row = {
+            'module': module,
+            'seconds': round(statistics.median(r['seconds'] for r in runs), 4),
+            'rss_mb': round(statistics.median(r['rss_mb'] for r in runs), 1),
+            'heavy': runs[0]['heavy'],
+        }
+        print(json.dumps(row))
+        if row['seconds'] > args.max_seconds or row['heavy']:
+            failures.append(module)
+
+    startup = statistics.median(cli_startup() for _ in range(args.repeat))
+    print(json.dumps({'module': 'python -m src.cli --help', 'seconds': round(startup, 4)}))
+    if startup > args.max_cli_seconds:
+        failures.append('cli startup')
+
+    if args.check and failures:
+        print(f"Import budget exceeded: {', '.join(failures)}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
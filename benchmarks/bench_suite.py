@@ -0,0 +1,264 @@
+"""
+Offline benchmark suite for the pipeline's hot paths on synthetic prices:
+ingestion (combine_and_save), sequence building, LSTM and ARIMA train/predict,
+max-Sharpe optimization and SHAP explanation.
+
+Every case reports latency percentiles, throughput (items per second at the
+median latency) and peak traced Python memory as JSON. Save a run as a baseline
+and compare later runs against it; --compare exits non-zero on a regression.
+
+    python benchmarks/bench_suite.py --tickers 10 --days 2520 --output baseline.json
+    python benchmarks/bench_suite.py --tickers 10 --days 2520 --compare baseline.json --threshold 0.25
+    python benchmarks/bench_suite.py --cases combine_and_save optimize_performance --repeat 10
+"""
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import functools
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+def synthetic_bars(n_tickers: int, n_days: int, missing: float = 0.01, seed: int = 0) -> Dict[str, pd.DataFrame]:
+    """
+    Daily OHLCV frames per ticker, shaped like the price source output. Prices follow
+    correlated geometric random walks; a `missing` fraction of days is dropped per
+    ticker so combining has to align the calendars.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2010-01-04", periods=n_days, name="Date")
+    market = rng.normal(2e-4, 0.008, size=n_days)
+    bars = {}
+    for i in range(n_tickers):
+        beta, vol = rng.uniform(0.2, 1.5), rng.uniform(0.005, 0.02)
+        close = 50 * (1 + i % 5) * np.exp(np.cumsum(beta * market + rng.normal(0, vol, size=n_days)))
+        spread = close * rng.uniform(0.001, 0.01, size=n_days)
+        df = pd.DataFrame({
+            'Open': close - spread / 2, 'High': close + spread, 'Low': close - spread,
+            'Close': close, 'Adj Close': close, 'Volume': rng.integers(10**5, 10**7, size=n_days),
+        }, index=dates)
+        keep = rng.random(n_days) >= missing
+        bars[f"T{i:03d}"] = df[keep]
+    return bars
+
+def synthetic_prices(n_tickers: int, n_days: int, seed: int = 0) -> pd.DataFrame:
+    """Aligned adjusted closes of synthetic_bars, as the processed store holds them"""
+    bars = synthetic_bars(n_tickers, n_days, missing=0.0, seed=seed)
+    return pd.DataFrame({ticker: df['Adj Close'] for ticker, df in bars.items()})
+
+@dataclass
+class Case:
+    """A benchmark: setup() builds untimed state, run(state) is the timed call"""
+    name: str
+    setup: Callable[[], Any]
+    run: Callable[[Any], Any]
+    items: Callable[[Any], int]
+    unit: str
+    repeat: Optional[int] = None
+
+def build_cases(n_tickers: int, n_days: int, window: int = 60, epochs: int = 1,
+                steps: int = 30, explain_samples: int = 32, n_candidates: int = 1000) -> List[Case]:
+    """All benchmark cases for one synthetic universe; expensive setup is shared between cases"""
+    from src.data_processing import DataIngestion, ProjectConfig
+    from src.models import ARIMAModel, LSTMForecaster
+    from src.windows import to_model_input
+
+    prices = synthetic_prices(n_tickers, n_days)
+    series = prices.iloc[:, 0]
+    tmp = tempfile.mkdtemp(prefix="gmf-bench-")
+
+    def ingestion_setup():
+        config = replace(ProjectConfig(), TICKERS=list(prices.columns), CACHE_DIR=None, EXPORT_CSV=False,
+                         STORAGE_PATH=os.path.join(tmp, "prices.npy"))
+        return DataIngestion(config), synthetic_bars(n_tickers, n_days)
+
+    def sequence_setup():
+        model = LSTMForecaster(series.name, window=window)
+        return model, model.scaler.fit_transform(series.values.reshape(-1, 1))
+
+    def build_sequences(state):
+        model, scaled = state
+        X, y = model._prepare_sequences(scaled)
+        return to_model_input(X), y
+
+    @functools.lru_cache(maxsize=None)
+    def trained_lstm():
+        model = LSTMForecaster(series.name, window=window)
+        model.train(series, epochs=epochs)
+        return model
+
+    @functools.lru_cache(maxsize=None)
+    def trained_arima():
+        model = ARIMAModel(series.name)
+        model.train(series)
+        return model
+
+    def lstm_train(_):
+        model = LSTMForecaster(series.name, window=window)
+        model.train(series, epochs=epochs)
+
+    def lstm_predict(model):
+        scaled = model.scaler.transform(series.values[-window:].reshape(-1, 1))
+        return model.predict(scaled, steps=steps)
+
+    def explain_setup():
+        from src.explainability import ModelExplainer
+        model = trained_lstm()
+        X, _ = model._prepare_sequences(model.scaler.transform(series.values.reshape(-1, 1)))
+        X = to_model_input(X[-500:])
+        return ModelExplainer(model.model, X, budget=50, summarize='random'), X[-explain_samples:]
+
+    def optimize(optimizer):
+        return optimizer.optimize_performance()
+
+    def optimizer_setup():
+        from src.optimization import PortfolioOptimizer
+        return PortfolioOptimizer(prices)
+
+    def analytics_setup():
+        from src.analytics import PortfolioAnalytics
+        candidates = np.random.default_rng(0).dirichlet(np.ones(n_tickers), size=n_candidates)
+        return PortfolioAnalytics.from_prices(prices, benchmark=prices.columns[0]), candidates
+
+    def score(state):
+        analytics, candidates = state
+        analytics.rolling(candidates, window=63)
+        return analytics.evaluate(candidates, previous=candidates[0])
+
+    n_samples = len(series) - window
+    return [
+        Case('combine_and_save', ingestion_setup, lambda s: s[0].combine_and_save(s[1]),
+             lambda s: sum(len(df) for df in s[1].values()), 'rows'),
+        Case('prepare_sequences', sequence_setup, build_sequences, lambda s: n_samples, 'windows'),
+        Case('lstm_train', lambda: None, lstm_train, lambda s: n_samples * epochs, 'windows', repeat=1),
+        Case('lstm_predict', trained_lstm, lstm_predict, lambda s: steps, 'steps'),
+        Case('arima_train', lambda: None, lambda s: ARIMAModel(series.name).train(series),
+             lambda s: len(series), 'observations', repeat=2),
+        Case('arima_predict', trained_arima, lambda m: m.predict(steps), lambda s: steps, 'steps'),
+        Case('optimize_performance', optimizer_setup, optimize, lambda s: n_tickers, 'assets'),
+        Case('shap_explain', explain_setup, lambda s: s[0].explain(s[1], nsamples=100),
+             lambda s: len(s[1]), 'windows', repeat=1),
+        Case('analytics_score', analytics_setup, score, lambda s: n_candidates, 'portfolios'),
+    ]
+
+CASE_NAMES = ['combine_and_save', 'prepare_sequences', 'lstm_train', 'lstm_predict', 'arima_train',
+              'arima_predict', 'optimize_performance', 'shap_explain', 'analytics_score']
+
+def run_case(case: Case, repeat: int, warmup: int = 1) -> Dict[str, Any]:
+    """
+    Time case.run over `repeat` iterations after `warmup` untimed ones. Peak memory
+    comes from one extra traced iteration, so tracing does not distort the latencies.
+    Allocations made by native backends (TensorFlow, BLAS) are not traced.
+    """
+    state = case.setup()
+    repeat = case.repeat or repeat
+    for _ in range(warmup if case.repeat is None else 0):
+        case.run(state)
+
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        case.run(state)
+        latencies.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    case.run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    items = case.items(state)
+    return {
+        'repeat': repeat,
+        'items': items,
+        'unit': case.unit,
+        'latency_p50_s': round(float(p50), 6),
+        'latency_p90_s': round(float(p90), 6),
+        'latency_p99_s': round(float(p99), 6),
+        'latency_min_s': round(min(latencies), 6),
+        'throughput_per_s': round(items / p50, 2) if p50 > 0 else None,
+        'peak_mb': round(peak / 2**20, 3),
+    }
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.2,
+            memory_threshold: Optional[float] = None, min_delta: float = 1e-3) -> List[Dict[str, Any]]:
+    """
+    Regressions of `current` against `baseline`: cases whose median latency or peak
+    memory grew by more than the relative threshold. Latency changes smaller than
+    min_delta seconds are timer noise and never count. Cases missing from either run
+    are ignored.
+    """
+    memory_threshold = threshold if memory_threshold is None else memory_threshold
+    regressions = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        for metric, limit, floor in (('latency_p50_s', threshold, min_delta), ('peak_mb', memory_threshold, 0.0)):
+            old, new = base.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = new / old - 1
+            if change > limit and new - old > floor:
+                regressions.append({'case': name, 'metric': metric, 'baseline': old,
+                                    'current': new, 'change': round(change, 4)})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", nargs="+", choices=CASE_NAMES, default=CASE_NAMES)
+    parser.add_argument("--tickers", type=int, default=5)
+    parser.add_argument("--days", type=int, default=1260)
+    parser.add_argument("--window", type=int, default=60)
+    parser.add_argument("--epochs", type=int, default=1, help="LSTM training epochs")
+    parser.add_argument("--repeat", type=int, default=5, help="timed iterations per case (expensive cases use fewer)")
+    parser.add_argument("--output", help="write the JSON report here, e.g. to store as a baseline")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag regressions against a stored report")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative latency increase")
+    parser.add_argument("--memory-threshold", type=float, help="allowed relative peak-memory increase")
+    parser.add_argument("--min-delta", type=float, default=1e-3, help="ignore latency increases below this (s)")
+    args = parser.parse_args()
+    # Keep the pipeline's progress messages out of the timed calls and the JSON output
+    logging.getLogger("src").setLevel(logging.WARNING)
+
+    config = {'tickers': args.tickers, 'days': args.days, 'window': args.window, 'epochs': args.epochs}
+    report = {
+        'config': config,
+        'environment': {'python': platform.python_version(), 'machine': platform.machine(),
+                        'numpy': np.__version__, 'pandas': pd.__version__, 'cpus': os.cpu_count()},
+        'results': {},
+    }
+    cases = {case.name: case for case in build_cases(args.tickers, args.days, args.window, args.epochs)}
+    for name in args.cases:
+        report['results'][name] = run_case(cases[name], args.repeat)
+        print(json.dumps({'case': name, **report['results'][name]}), file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('config') != config:
+            print(f"⚠️ Baseline was recorded with {baseline.get('config')}, not {config}", file=sys.stderr)
+        regressions = compare(report, baseline, args.threshold, args.memory_threshold, args.min_delta)
+        for r in regressions:
+            print(f"❌ {r['case']} {r['metric']}: {r['baseline']} -> {r['current']} ({r['change']:+.1%})",
+                  file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("✅ No regressions against the baseline", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
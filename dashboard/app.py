@@ -1,116 +1,149 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from src.data_processing import ProjectConfig, DataIngestion
-from src.models import ARIMAModel, LSTMForecaster
-from src.explainability import ModelExplainer
-import matplotlib.pyplot as plt
+from contextlib import contextmanager
+from src.data_processing import ProjectConfig
+from src.snapshot import JobQueue, SnapshotStore
+import json
 import os
+import time
 
 # Page Config
 st.set_page_config(page_title="GMF Portfolio Optimizer", layout="wide")
 
-st.title("🏦 Guide Me in Finance (GMF) Investments")
-st.subheader("Portfolio Management Optimization Dashboard")
+# Per-section wall time of this rerun, shown in the sidebar
+timings = {}
+
+@contextmanager
+def timed(section: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[section] = timings.get(section, 0.0) + time.perf_counter() - start
 
-# Initialize Config and Data
-config = ProjectConfig()
-ingestion = DataIngestion(config)
+# All analytics are precomputed by the snapshot worker (python -m src.cli worker).
+# A page load only reads the latest published snapshot, so its cost does not depend
+# on model training, SHAP or optimization, nor on how many viewers are connected.
 
-if not os.path.exists(config.PROCESSED_DATA_PATH):
-    st.info("🔄 Downloading and processing initial data...")
-    raw_data = ingestion.fetch_data()
-    ingestion.combine_and_save(raw_data)
+@st.cache_resource
+def get_services():
+    config = ProjectConfig()
+    return config, SnapshotStore(config.SNAPSHOT_DIR), JobQueue(config.JOB_QUEUE_PATH)
 
-df = pd.read_csv(config.PROCESSED_DATA_PATH, index_col=0, parse_dates=True)
+@st.cache_data(max_entries=2, show_spinner=False)
+def load_snapshot(path: str, mtime_ns: int) -> dict:
+    """Parsed snapshot, re-read only when the worker publishes a new one"""
+    with open(path) as f:
+        return json.load(f)
+
+def as_series(section: dict, name: str) -> pd.Series:
+    return pd.Series(section['values'], index=pd.to_datetime(section['dates']), name=name)
+
+st.title("🏦 Guide Me in Finance (GMF) Investments")
+st.subheader("Portfolio Management Optimization Dashboard")
+
+with timed("snapshot"):
+    config, snapshots, jobs = get_services()
+    if not os.path.exists(snapshots.latest_path):
+        st.info("⏳ No analytics snapshot yet. Start the background worker with `python -m src.cli worker`.")
+        if st.button("Queue a snapshot job"):
+            jobs.enqueue("snapshot", {'requested': 'dashboard'})
+        st.stop()
+    snapshot = load_snapshot(snapshots.latest_path, os.stat(snapshots.latest_path).st_mtime_ns)
 
 # Sidebar - Asset Selection
 st.sidebar.header("Portfolio Settings")
-selected_ticker = st.sidebar.selectbox("Select Asset for Deep Dive", config.TICKERS)
+selected_ticker = st.sidebar.selectbox("Select Asset for Deep Dive", snapshot['tickers'])
 model_type = st.sidebar.radio("Forecasting Algorithm", ["ARIMA (Statistical)", "LSTM (Deep Learning)"])
+st.sidebar.caption(f"Snapshot `{snapshot['version']}` built "
+                   f"{pd.Timestamp(snapshot['created'], unit='s'):%Y-%m-%d %H:%M} UTC "
+                   f"in {snapshot['build_seconds']:.0f}s")
+if snapshot['errors']:
+    with st.sidebar.expander(f"⚠️ {len(snapshot['errors'])} sections failed"):
+        st.json(snapshot['errors'])
 
 # Main Grid - Overview
-col1, col2, col3 = st.columns(3)
-for i, ticker in enumerate(config.TICKERS):
-    last_price = df[ticker].iloc[-1]
-    prev_price = df[ticker].iloc[-2]
-    change = ((last_price - prev_price) / prev_price) * 100
-    [col1, col2, col3][i].metric(ticker, f"${last_price:.2f}", f"{change:.2f}%")
-
-# Main Chart - Historical Prices
-st.write(f"### Historical Performance: {selected_ticker}")
-fig = px.line(df, y=selected_ticker, title=f"{selected_ticker} Price History", color_discrete_sequence=['#1f77b4'])
-st.plotly_chart(fig, width='stretch')
+with timed("overview"):
+    # A running streaming pipeline (python -m src.main --stream) keeps a live snapshot of the cards.
+    # The file outlives the stream, so it only wins while it is newer than the worker snapshot
+    # and was rewritten within STREAM_MAX_AGE_SECONDS.
+    live_cards = {}
+    if os.path.exists(config.STREAM_SNAPSHOT_PATH):
+        written = os.stat(config.STREAM_SNAPSHOT_PATH).st_mtime
+        if written > snapshot['created'] and time.time() - written <= config.STREAM_MAX_AGE_SECONDS:
+            with open(config.STREAM_SNAPSHOT_PATH) as f:
+                live_cards = json.load(f)['cards']
+            st.caption("📡 Live prices from the streaming pipeline")
+
+    columns = st.columns(len(snapshot['tickers']))
+    for column, ticker in zip(columns, snapshot['tickers']):
+        card = live_cards.get(ticker, snapshot['cards'][ticker])
+        column.metric(ticker, f"${card['price']:.2f}", f"{card['change_pct']:.2f}%")
+
+    # Main Chart - Historical Prices
+    history = as_series(snapshot['history'][selected_ticker], selected_ticker)
+    st.write(f"### Historical Performance: {selected_ticker}")
+    fig = px.line(history, y=selected_ticker, title=f"{selected_ticker} Price History",
+                  color_discrete_sequence=['#1f77b4'])
+    st.plotly_chart(fig, width='stretch')
 
 # Forecasting Section
 st.write("---")
 st.write(f"### 🔮 {model_type} Predictive Analytics")
 forecast_steps = st.slider("Forecast Horizon (Days)", 7, 60, 30)
 
-if st.button("Generate Forecast"):
-    with st.spinner(f"Training models for {selected_ticker}..."):
-        last_date = df.index[-1]
-        forecast_dates = pd.date_range(start=last_date + pd.Timedelta(days=1), periods=forecast_steps)
-        
-        if model_type == "ARIMA (Statistical)":
-            arima = ARIMAModel(selected_ticker)
-            arima.train(df[selected_ticker])
-            preds = arima.predict(forecast_steps)
-            label = "ARIMA Forecast"
-            
-        else:  # LSTM
-            lstm = LSTMForecaster(selected_ticker)
-            # Use small epochs for quick demo speed in dashboard
-            lstm.train(df[selected_ticker], epochs=5)
-            
-            # Prepare the last window for the recursive forecast
-            scaled_input = lstm.scaler.transform(df[selected_ticker].values[-60:].reshape(-1, 1))
-            preds = lstm.predict(scaled_input, steps=forecast_steps)
-            label = "LSTM Forecast"
+with timed("forecast"):
+    kind = 'arima' if model_type == "ARIMA (Statistical)" else 'lstm'
+    label = "ARIMA Forecast" if kind == 'arima' else "LSTM Forecast"
+    section = snapshot['models'][selected_ticker].get(kind)
+
+    if section is None:
+        st.warning(f"No {label} in this snapshot for {selected_ticker}.")
+    else:
+        forecast = as_series(section['forecast'], label).iloc[:forecast_steps]
+        fig_forecast = go.Figure()
+        fig_forecast.add_trace(go.Scatter(x=history.index[-100:], y=history.iloc[-100:], name="Historical"))
+        fig_forecast.add_trace(go.Scatter(x=forecast.index, y=forecast, name=label,
+                                          line=dict(dash='dash', color='orange')))
+        st.plotly_chart(fig_forecast, width='stretch')
 
+        if 'shap' in section:
             # SHAP Explainability Sub-section
             st.write("#### 🛡️ Model Transparency (SHAP)")
-            # Use a sample of the data as background for speed
-            sample_data = lstm.scaler.transform(df[selected_ticker].values[-200:].reshape(-1, 1))
-            X_background, _ = lstm._prepare_sequences(sample_data)
-            X_background = np.reshape(X_background, (X_background.shape[0], X_background.shape[1], 1))
-            X_test = X_background[-1:] # Explain the most recent pattern
-            
-            explainer = ModelExplainer(lstm.model, X_background)
-            shap_vals = explainer.explain(X_test)
-            
+            shap_summary = section['shap']
             col_a, col_b = st.columns(2)
             with col_a:
-                st.pyplot(explainer.plot_importance(shap_vals, [f"{selected_ticker} Lag"]))
+                importance = pd.Series(shap_summary['feature_importance'], index=[f"{selected_ticker} Lag"])
+                fig_importance = px.bar(importance.sort_values(), orientation='h', title="Feature Importance (SHAP)",
+                                        labels={'value': "Mean Absolute SHAP Value", 'index': ""})
+                st.plotly_chart(fig_importance, width='stretch')
             with col_b:
-                st.pyplot(explainer.plot_time_importance(shap_vals, 60))
-
-        # Combined Plot
-        forecast_df = pd.DataFrame({'Date': forecast_dates, label: preds}).set_index('Date')
-        fig_forecast = go.Figure()
-        fig_forecast.add_trace(go.Scatter(x=df.index[-100:], y=df[selected_ticker].iloc[-100:], name="Historical"))
-        fig_forecast.add_trace(go.Scatter(x=forecast_df.index, y=forecast_df[label], name=label, line=dict(dash='dash', color='orange')))
-        st.plotly_chart(fig_forecast, width='stretch')
-        
-        st.success(f"{label} generated and explained successfully!")
+                lags = shap_summary['temporal_importance']
+                fig_lags = px.line(x=list(range(len(lags))), y=lags, markers=True,
+                                   title="Temporal Importance (Impact of specific lags)",
+                                   labels={'x': f"Lag (Days ago, 0=oldest, {len(lags) - 1}=most recent)",
+                                           'y': "Mean Impact"})
+                st.plotly_chart(fig_lags, width='stretch')
+            st.caption(f"Explained the latest {shap_summary['explained']} windows.")
 
 # Portfolio Optimization Section
 st.write("---")
 st.write("### ⚖️ Portfolio Optimization (Modern Portfolio Theory)")
-st.write("Calculate the optimal asset allocation based on historical risk and returns.")
-
-from src.optimization import PortfolioOptimizer
-
-if st.button("Optimize Portfolio Weights"):
-    with st.spinner("Calculating Efficient Frontier..."):
-        optimizer = PortfolioOptimizer(df)
-        weights = optimizer.optimize_performance()
-        ret, vol, sharpe = optimizer.get_performance(weights)
-        
+st.write("Optimal asset allocation based on historical risk and returns.")
+
+optimization = snapshot['optimization']
+if optimization is None:
+    st.warning("Optimization is not available in this snapshot.")
+else:
+    with timed("optimization charts"):
+        weights = optimization['weights']
+        ret, vol, sharpe = optimization['performance']
+        e_ret, e_vol, e_sharpe = optimization['equal_weight']
+        frontier = optimization['frontier']
         col_w1, col_w2 = st.columns([1, 1])
-        
+
         with col_w1:
             st.write("#### 🎯 Optimal Weights (Max Sharpe)")
             weight_df = pd.DataFrame(list(weights.items()), columns=['Asset', 'Weight'])
@@ -118,29 +151,45 @@ if st.button("Optimize Portfolio Weights"):
                                title="Recommended Allocation",
                                color_discrete_sequence=px.colors.qualitative.Pastel)
             st.plotly_chart(fig_weights, width='stretch')
-            
+
         with col_w2:
             st.write("#### 📈 Expected Performance")
             st.metric("Expected Annual Return", f"{ret*100:.2f}%")
             st.metric("Annual Volatility (Risk)", f"{vol*100:.2f}%")
             st.metric("Sharpe Ratio", f"{sharpe:.2f}")
-            
+
             st.info("💡 The Sharpe Ratio measures the performance of an investment compared to a risk-free asset, after adjusting for its risk.")
 
+        # Efficient Frontier
+        st.write("#### 🧭 Efficient Frontier")
+        fig_frontier = go.Figure()
+        fig_frontier.add_trace(go.Scatter(x=frontier['volatilities'], y=frontier['returns'], mode='lines+markers',
+                                          name="Efficient Frontier",
+                                          customdata=frontier['sharpe'],
+                                          hovertemplate="Vol %{x:.2%}<br>Return %{y:.2%}<br>Sharpe %{customdata:.2f}"))
+        fig_frontier.add_trace(go.Scatter(x=[vol], y=[ret], mode='markers', name="Max Sharpe",
+                                          marker=dict(symbol='star', size=16, color='red')))
+        fig_frontier.update_layout(xaxis_title="Annual Volatility", yaxis_title="Expected Annual Return",
+                                   xaxis_tickformat='.0%', yaxis_tickformat='.0%')
+        st.plotly_chart(fig_frontier, width='stretch')
+
         # Comparison with Equal Weight Portfolio
         st.write("#### ⚖️ Comparison: Strategy vs. Equal Weight")
-        equal_weights = {t: 1.0/len(config.TICKERS) for t in config.TICKERS}
-        e_ret, e_vol, e_sharpe = optimizer.get_performance(equal_weights)
-        
         comparison_data = {
             'Metric': ['Annual Return', 'Volatility', 'Sharpe Ratio'],
             'Optimal (Max Sharpe)': [ret, vol, sharpe],
             'Equal Weight (Benchmark)': [e_ret, e_vol, e_sharpe]
         }
         comp_df = pd.DataFrame(comparison_data)
-        
+
         fig_comp = go.Figure()
         fig_comp.add_trace(go.Bar(x=comp_df['Metric'], y=comp_df['Optimal (Max Sharpe)'], name='Optimal Portfolio'))
         fig_comp.add_trace(go.Bar(x=comp_df['Metric'], y=comp_df['Equal Weight (Benchmark)'], name='Equal Weight'))
         fig_comp.update_layout(title="Optimal vs. Equal Weight Comparison", barmode='group')
         st.plotly_chart(fig_comp, width='stretch')
+
+# Rerun Timing
+with st.sidebar.expander("⏱️ Rerun timings", expanded=False):
+    timing_df = pd.DataFrame({'Section': list(timings), 'Seconds': list(timings.values())})
+    st.dataframe(timing_df.style.format({'Seconds': '{:.3f}'}), hide_index=True)
+    st.metric("Total", f"{sum(timings.values()):.3f}s")
@@ -0,0 +1,195 @@
+"""
+Realized performance of many weight vectors over one price history.
+
+Asset returns are computed once per history; every metric is then a matrix product
+plus O(T) prefix-sum kernels over the resulting (dates, portfolios) block, so
+scoring thousands of candidate portfolios costs a few array passes instead of one
+pandas / solver object per candidate.
+"""
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+from src.estimators import TRADING_DAYS
+from src.panel import PricePanel
+
+Weights = Union[Dict[str, float], pd.Series, pd.DataFrame, np.ndarray]
+
+def rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    """Sums over each trailing window along axis 0, (T - window + 1, ...), from one cumulative sum"""
+    if not 1 <= window <= len(x):
+        raise ValueError(f"Window must be between 1 and {len(x)}, got {window}.")
+    csum = np.cumsum(x, axis=0, dtype=np.float64)
+    out = csum[window - 1:].copy()
+    out[1:] -= csum[:-window]
+    return out
+
+def compound(returns: np.ndarray) -> np.ndarray:
+    """Total compounded return over axis 0"""
+    return np.expm1(np.log1p(returns).sum(axis=0))
+
+def annualise(total: np.ndarray, periods: int, frequency: int = TRADING_DAYS) -> np.ndarray:
+    """Annual rate of a total return earned over `periods` bars"""
+    return (1 + np.asarray(total)) ** (frequency / periods) - 1
+
+def drawdowns(returns: np.ndarray) -> np.ndarray:
+    """Decline of each portfolio's value from its running peak (<= 0), same shape as returns"""
+    growth = np.exp(np.cumsum(np.log1p(returns), axis=0))
+    peaks = np.maximum(np.maximum.accumulate(growth, axis=0), 1.0)
+    return growth / peaks - 1
+
+def max_drawdown(returns: np.ndarray) -> np.ndarray:
+    """Worst peak-to-trough decline per portfolio"""
+    return drawdowns(returns).min(axis=0)
+
+def turnover(previous: np.ndarray, target: np.ndarray, returns: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Traded notional (sum of |weight changes|) to move from previous to target weights.
+    returns: asset returns of the holding period (T, N); previous weights are drifted
+        through them first, like BacktestResult.turnover
+    """
+    previous = np.asarray(previous, dtype=np.float64)
+    if returns is not None:
+        growth = np.exp(np.log1p(np.nan_to_num(returns)).sum(axis=0))
+        value = previous @ growth
+        previous = previous * growth / np.expand_dims(value, -1)
+    return np.abs(np.asarray(target, dtype=np.float64) - previous).sum(axis=-1)
+
+@dataclass
+class RollingMetrics:
+    """Trailing-window metrics, each (windows, portfolios), indexed by each window's last date"""
+    dates: pd.DatetimeIndex
+    window: int
+    returns: np.ndarray       # compounded return over the window
+    volatility: np.ndarray    # annualised
+    sharpe: np.ndarray
+    sortino: np.ndarray
+    beta: Optional[np.ndarray] = None
+
+    def frame(self, metric: str, names: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        return pd.DataFrame(getattr(self, metric), index=self.dates, columns=names)
+
+class PortfolioAnalytics:
+    """
+    Realized metrics of weight vectors held at constant weights (rebalanced every
+    bar) over one return history. Missing returns (before a listing, unfilled gaps)
+    count as zero, i.e. that slice of the portfolio sits in cash.
+    """
+
+    def __init__(self, returns: np.ndarray, tickers: Sequence[str], dates: Optional[pd.DatetimeIndex] = None,
+                 benchmark: Optional[str] = 'SPY', risk_free_rate: float = 0.0, frequency: int = TRADING_DAYS):
+        """
+        returns: (dates, tickers) asset returns
+        benchmark: ticker that betas are measured against; ignored if not in tickers
+        risk_free_rate: annual rate subtracted in Sharpe and used as the Sortino target
+        """
+        self.returns = np.nan_to_num(np.asarray(returns, dtype=np.float64))
+        self.tickers = list(tickers)
+        self.dates = dates if dates is not None else pd.RangeIndex(len(self.returns))
+        self.risk_free_rate = risk_free_rate
+        self.frequency = frequency
+        self.benchmark = benchmark if benchmark in self.tickers else None
+        self.benchmark_returns = (self.returns[:, self.tickers.index(benchmark)]
+                                  if self.benchmark is not None else None)
+
+    @classmethod
+    def from_panel(cls, panel: PricePanel, **kwargs) -> "PortfolioAnalytics":
+        return cls(panel.returns(), panel.tickers, panel.dates[1:], **kwargs)
+
+    @classmethod
+    def from_prices(cls, prices: pd.DataFrame, **kwargs) -> "PortfolioAnalytics":
+        return cls.from_panel(PricePanel.from_frame(prices, dtype=np.float64), **kwargs)
+
+    def weight_matrix(self, weights: Weights) -> np.ndarray:
+        """(portfolios, tickers) matrix from a weight dict, Series, DataFrame or array"""
+        if isinstance(weights, dict):
+            weights = pd.Series(weights, dtype=float)
+        if isinstance(weights, pd.Series):
+            weights = weights.reindex(self.tickers).fillna(0.0).to_numpy()
+        elif isinstance(weights, pd.DataFrame):
+            weights = weights.reindex(columns=self.tickers).fillna(0.0).to_numpy()
+        W = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+        if W.shape[1] != len(self.tickers):
+            raise ValueError(f"Expected weights over {len(self.tickers)} tickers, got {W.shape[1]}.")
+        return W
+
+    def portfolio_returns(self, weights: Weights) -> np.ndarray:
+        """(dates, portfolios) returns of constant-weight portfolios"""
+        return self.returns @ self.weight_matrix(weights).T
+
+    @property
+    def _period_rate(self) -> float:
+        return (1 + self.risk_free_rate) ** (1 / self.frequency) - 1
+
+    def _ratios(self, total: np.ndarray, periods: int, sum_r: np.ndarray, sum_r2: np.ndarray,
+                downside: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Annualised volatility, Sharpe and Sortino from window sums"""
+        excess = annualise(total, periods, self.frequency) - self.risk_free_rate
+        variance = np.maximum(sum_r2 - sum_r ** 2 / periods, 0.0) / max(periods - 1, 1)
+        volatility = np.sqrt(variance * self.frequency)
+        downside_dev = np.sqrt(downside / periods * self.frequency)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return volatility, excess / volatility, excess / downside_dev
+
+    def _beta(self, sum_r: np.ndarray, sum_rb: np.ndarray, sum_b: np.ndarray, sum_b2: np.ndarray,
+              periods: int) -> np.ndarray:
+        cov = sum_rb - sum_r * sum_b / periods
+        var = sum_b2 - sum_b ** 2 / periods
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return cov / var
+
+    def rolling(self, weights: Weights, window: int = 63) -> RollingMetrics:
+        """Trailing-window return, volatility, Sharpe, Sortino and beta for every portfolio"""
+        R = self.portfolio_returns(weights)
+        sum_r = rolling_sum(R, window)
+        sum_r2 = rolling_sum(R * R, window)
+        total = np.expm1(rolling_sum(np.log1p(R), window))
+        shortfall = np.minimum(R - self._period_rate, 0.0)
+        volatility, sharpe, sortino = self._ratios(total, window, sum_r, sum_r2,
+                                                   rolling_sum(shortfall * shortfall, window))
+        beta = None
+        if self.benchmark_returns is not None:
+            b = self.benchmark_returns
+            beta = self._beta(sum_r, rolling_sum(R * b[:, None], window), rolling_sum(b, window)[:, None],
+                              rolling_sum(b * b, window)[:, None], window)
+        return RollingMetrics(self.dates[window - 1:], window, total, volatility, sharpe, sortino, beta)
+
+    def evaluate(self, weights: Weights, previous: Optional[Weights] = None,
+                 names: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Full-period annual return, volatility, Sharpe, Sortino, max drawdown, beta and
+        (given the currently held weights) turnover, one row per portfolio
+        """
+        W = self.weight_matrix(weights)
+        R = self.returns @ W.T
+        periods = len(R)
+        total = compound(R)
+        shortfall = np.minimum(R - self._period_rate, 0.0)
+        volatility, sharpe, sortino = self._ratios(total, periods, R.sum(axis=0), (R * R).sum(axis=0),
+                                                   (shortfall * shortfall).sum(axis=0))
+        metrics = {
+            'annual_return': annualise(total, periods, self.frequency),
+            'volatility': volatility,
+            'sharpe': sharpe,
+            'sortino': sortino,
+            'max_drawdown': max_drawdown(R),
+        }
+        if self.benchmark_returns is not None:
+            b = self.benchmark_returns
+            metrics['beta'] = self._beta(R.sum(axis=0), b @ R, b.sum(), b @ b, periods)
+        if previous is not None:
+            metrics['turnover'] = turnover(self.weight_matrix(previous)[0], W)
+        return pd.DataFrame(metrics, index=names)
+
+def latest_change(panel: PricePanel) -> Tuple[np.ndarray, np.ndarray]:
+    """Last valid price per ticker and its percent change from the previous valid price"""
+    rows = np.arange(len(panel.dates))[:, None]
+    last_rows = np.where(panel.valid, rows, -1)
+    last = last_rows.max(axis=0)
+    # Previous valid row: the latest valid row strictly before the last one
+    prev = np.where(panel.valid & (rows < last), rows, -1).max(axis=0)
+    columns = np.arange(len(panel.tickers))
+    price = panel.values[last, columns].astype(np.float64)
+    before = panel.values[prev, columns].astype(np.float64)
+    change = np.where((last >= 0) & (prev >= 0), (price / before - 1) * 100, np.nan)
+    return np.where(last >= 0, price, np.nan), change
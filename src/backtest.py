@@ -0,0 +1,209 @@
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+import multiprocessing
+import pandas as pd
+import numpy as np
+from src.estimators import RollingMomentEstimator, TRADING_DAYS
+from src.optimization import PortfolioOptimizer
+
+@dataclass
+class BacktestResult:
+    """Out-of-sample record of a walk-forward backtest"""
+    weights: pd.DataFrame          # target weights per rebalance date
+    returns: pd.Series             # daily portfolio returns, net of costs
+    turnover: pd.Series            # traded notional (sum of |weight changes|) per rebalance date
+    forecast_errors: pd.DataFrame  # forecast / realized - 1 per rebalance date and ticker
+    failed_solves: int = 0
+
+    def summary(self) -> Dict[str, float]:
+        """Annualised return, volatility, Sharpe, max drawdown and average turnover"""
+        growth = (1 + self.returns).cumprod()
+        years = len(self.returns) / TRADING_DAYS
+        annual_return = growth.iloc[-1] ** (1 / years) - 1 if years > 0 else np.nan
+        volatility = self.returns.std() * np.sqrt(TRADING_DAYS)
+        summary = {
+            'annual_return': annual_return,
+            'volatility': volatility,
+            'sharpe': annual_return / volatility if volatility > 0 else np.nan,
+            'max_drawdown': (growth / growth.cummax() - 1).min(),
+            'avg_turnover': self.turnover.mean(),
+            'rebalances': len(self.weights),
+        }
+        if not self.forecast_errors.empty:
+            summary['forecast_mape'] = self.forecast_errors.abs().mean().mean()
+        return summary
+
+def _solve_window(mu: pd.Series, S: pd.DataFrame, target_return: Optional[float]) -> Optional[np.ndarray]:
+    """Optimize one rebalance window; returns None when the solver fails"""
+    try:
+        weights = PortfolioOptimizer.from_estimates(mu, S).optimize_performance(target_return)
+        return np.array([weights[t] for t in mu.index])
+    except Exception:
+        return None
+
+class WalkForwardBacktester:
+    """
+    Rolls a training window through a price panel, rebalancing with PortfolioOptimizer
+    every `rebalance_every` bars and holding the weights (with drift) in between.
+    Window moments come from a RollingMomentEstimator, so moving to the next
+    rebalance only touches the rows that entered and left the window.
+    """
+
+    def __init__(self, price_data: pd.DataFrame, train_window: int = TRADING_DAYS, rebalance_every: int = 21,
+                 target_return: Optional[float] = None, transaction_cost: float = 0.0, n_jobs: int = 1,
+                 forecaster: Optional[str] = None, forecast_horizon: Optional[int] = None,
+                 refit_every: int = 12, shrinkage: Union[None, str, float] = None):
+        """
+        forecaster: None, 'arima' or 'lstm'; when set, forecasts are made at every rebalance
+        and compared to the realized price forecast_horizon bars later
+        refit_every: forecasters are refit on the trailing training window every this many
+        rebalances; in between ARIMA is filtered forward and the LSTM (with its scaler) is reused
+        shrinkage: covariance shrinkage applied to each window (e.g. 'ledoit_wolf')
+        """
+        self.price_data = price_data.dropna()
+        self.tickers = list(self.price_data.columns)
+        self.train_window = train_window
+        self.rebalance_every = rebalance_every
+        self.target_return = target_return
+        self.transaction_cost = transaction_cost
+        self.n_jobs = n_jobs
+        self.forecaster = forecaster
+        self.forecast_horizon = forecast_horizon or rebalance_every
+        self.refit_every = refit_every
+        self.shrinkage = shrinkage
+
+        prices = self.price_data.to_numpy(dtype=np.float64)
+        # returns[k] is the return from price k to price k + 1
+        self.returns = prices[1:] / prices[:-1] - 1
+        self.log_growth = np.log1p(self.returns)
+
+    def rebalance_positions(self) -> np.ndarray:
+        """Price positions at which the portfolio is rebalanced (using prices up to and including them)"""
+        return np.arange(self.train_window, len(self.returns), self.rebalance_every)
+
+    def window_estimates(self, positions: np.ndarray) -> List[Tuple[pd.Series, pd.DataFrame]]:
+        """
+        Annualised expected returns and covariance for the window of returns ending
+        at each position. The estimator slides from one rebalance to the next by
+        adding and removing only the rows that changed.
+        """
+        W = self.train_window
+        estimator = RollingMomentEstimator(self.tickers, frequency=TRADING_DAYS)
+        estimates = []
+        previous = None
+
+        for t in positions:
+            if previous is None or t - previous >= W:
+                estimator.reset()
+                estimator.add(self.returns[t - W:t])
+            else:
+                estimator.add(self.returns[previous:t])
+                estimator.remove(self.returns[previous - W:t - W])
+            previous = t
+            estimates.append((estimator.expected_returns(), estimator.covariance(self.shrinkage)))
+        return estimates
+
+    def _solve_all(self, estimates: List[Tuple[pd.Series, pd.DataFrame]]) -> List[Optional[np.ndarray]]:
+        """Windows are independent once their moments are known, so they can be solved in parallel"""
+        mus, covs = zip(*estimates)
+        targets = [self.target_return] * len(estimates)
+        if self.n_jobs == 1:
+            return list(map(_solve_window, mus, covs, targets))
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=self.n_jobs, mp_context=context) as pool:
+            chunksize = max(1, len(estimates) // (4 * (self.n_jobs or 1)))
+            return list(pool.map(_solve_window, mus, covs, targets, chunksize=chunksize))
+
+    def _account(self, positions: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized buy-and-hold P&L between rebalances.
+        Returns daily portfolio returns (from the first rebalance on) and the traded
+        notional at each rebalance, measured against the drifted weights.
+        """
+        start = positions[0]
+        segment = np.repeat(np.arange(len(positions)), np.diff(np.append(positions, len(self.returns))))
+
+        # Asset growth since the start of each holding segment
+        cum_log = np.cumsum(self.log_growth[start:], axis=0)
+        offsets = np.vstack([np.zeros(len(self.tickers)), cum_log])[positions - start]
+        growth = np.exp(cum_log - offsets[segment])
+
+        value = np.einsum('tn,tn->t', weights[segment], growth)
+        previous_value = np.ones_like(value)
+        continuing = np.append(False, segment[1:] == segment[:-1])
+        previous_value[continuing] = value[np.flatnonzero(continuing) - 1]
+        daily = value / previous_value - 1
+
+        # Weights have drifted by the end of each segment; turnover is measured against those
+        ends = np.append(positions[1:], len(self.returns)) - start - 1
+        drifted = weights * growth[ends] / value[ends][:, None]
+        turnover = np.abs(weights - np.vstack([np.zeros(len(self.tickers)), drifted[:-1]])).sum(axis=1)
+
+        daily[positions - start] -= self.transaction_cost * turnover
+        return daily, turnover
+
+    def _forecast_errors(self, positions: np.ndarray) -> pd.DataFrame:
+        """Relative error of each forecaster's price forecast forecast_horizon bars ahead"""
+        h = self.forecast_horizon
+        evaluable = positions[positions + h < len(self.price_data)]
+        errors = pd.DataFrame(index=self.price_data.index[evaluable], columns=self.tickers, dtype=float)
+        if len(evaluable) == 0:
+            return errors
+
+        from src.models import ARIMAModel, LSTMForecaster
+        for ticker in self.tickers:
+            series = self.price_data[ticker]
+            actual = series.to_numpy()[evaluable + h]
+
+            if self.forecaster == 'arima':
+                model, forecasts, last = ARIMAModel(ticker), [], None
+                for i, t in enumerate(evaluable):
+                    if last is None:
+                        model.train(series.iloc[t - self.train_window:t + 1])
+                    else:
+                        model.update(series.iloc[last + 1:t + 1], refit=i % self.refit_every == 0)
+                    forecasts.append(np.asarray(model.predict(h))[-1])
+                    last = t
+                forecasts = np.array(forecasts)
+            else:
+                # Retrain on the trailing window every refit_every rebalances, then forecast
+                # that block's rebalance dates in one batch
+                forecasts = np.empty(len(evaluable))
+                for lo in range(0, len(evaluable), self.refit_every):
+                    block = evaluable[lo:lo + self.refit_every]
+                    model = LSTMForecaster(ticker, window=min(60, self.train_window // 2))
+                    model.train(series.iloc[block[0] - self.train_window:block[0] + 1])
+                    forecasts[lo:lo + len(block)] = model.forecast_from_history(series, block + 1, steps=h)[:, -1]
+
+            errors[ticker] = forecasts / actual - 1
+        return errors
+
+    def run(self) -> BacktestResult:
+        """Execute the walk-forward backtest"""
+        positions = self.rebalance_positions()
+        if len(positions) == 0:
+            raise ValueError("Not enough history for a single training window.")
+
+        solved = self._solve_all(self.window_estimates(positions))
+        weights, failed = np.empty((len(positions), len(self.tickers))), 0
+        fallback = np.full(len(self.tickers), 1 / len(self.tickers))
+        for i, w in enumerate(solved):
+            if w is None:
+                # Keep the previous allocation (equal weight before the first success)
+                failed += 1
+                w = weights[i - 1] if i > 0 else fallback
+            weights[i] = w
+
+        daily, turnover = self._account(positions, weights)
+        rebalance_dates = self.price_data.index[positions]
+        forecast_errors = (self._forecast_errors(positions) if self.forecaster
+                           else pd.DataFrame(columns=self.tickers, dtype=float))
+
+        return BacktestResult(
+            weights=pd.DataFrame(weights, index=rebalance_dates, columns=self.tickers),
+            returns=pd.Series(daily, index=self.price_data.index[positions[0] + 1:]),
+            turnover=pd.Series(turnover, index=rebalance_dates),
+            forecast_errors=forecast_errors,
+            failed_solves=failed,
+        )
@@ -0,0 +1,264 @@
+"""
+Unified command line for the GMF pipeline.
+
+    python -m src.cli ingest
+    python -m src.cli train arima lstm --lstm-workers 2
+    python -m src.cli forecast SPY --model arima --steps 10
+    python -m src.cli optimize --objective max_sharpe
+    python -m src.cli backtest --rebalance-every 21 --transaction-cost 0.001
+    python -m src.cli worker
+    python -m src.cli run forecasts weights --force prices
+    python -m src.cli stream live_bars.csv
+
+Only the standard library is imported up front; each command imports the
+backends it needs, so the non-ML commands never load TensorFlow or statsmodels.
+"""
+from dataclasses import replace
+from typing import List, Optional
+import argparse
+import os
+import sys
+
+OBJECTIVES = ['max_sharpe', 'min_cvar', 'risk_parity', 'hrp', 'large_universe']
+
+def _config(args):
+    from src.data_processing import ProjectConfig
+    config = ProjectConfig()
+    overrides = {}
+    if args.tickers:
+        overrides['TICKERS'] = args.tickers
+    if args.backend:
+        overrides['STORAGE_BACKEND'] = args.backend
+    if args.storage_path:
+        overrides['STORAGE_PATH'] = args.storage_path
+    return replace(config, **overrides)
+
+def _load_prices(config):
+    from src.data_processing import DataIngestion
+    ingestion = DataIngestion(config)
+    if not ingestion.store.exists():
+        print("❌ No processed data found. Run `python -m src.cli ingest` first.")
+        sys.exit(1)
+    return ingestion.load_processed(config.TICKERS)
+
+def cmd_ingest(args):
+    from src.data_processing import DataIngestion
+    ingestion = DataIngestion(_config(args))
+    raw_data = ingestion.fetch_data()
+    if not raw_data:
+        print("❌ Data ingestion failed.")
+        sys.exit(1)
+    combined = ingestion.combine_and_save(raw_data)
+    print(f"✅ Successfully processed {len(combined)} records.")
+    if not args.no_snapshot:
+        from src.snapshot import JobQueue
+        config = _config(args)
+        job = JobQueue(config.JOB_QUEUE_PATH).enqueue("snapshot", {'version': ingestion.store.version()})
+        print(f"📬 Queued dashboard snapshot job {job}")
+
+def cmd_train(args):
+    from src.model_store import ModelStore
+    from src.training import TrainingOrchestrator, summarize
+    config = _config(args)
+    store = ModelStore(config.MODEL_STORE_DIR, config.MODEL_STORE_MAX_MB * 1024 * 1024)
+    orchestrator = TrainingOrchestrator(store, lstm_workers=args.lstm_workers)
+    report = summarize(orchestrator.run(_load_prices(config), args.models or ['arima', 'lstm']))
+    print(report.to_string(index=False))
+
+def cmd_forecast(args):
+    import numpy as np
+    import pandas as pd
+    from src.model_store import ModelStore
+    config = _config(args)
+    prices = _load_prices(config)[args.ticker].dropna()
+    store = ModelStore(config.MODEL_STORE_DIR, config.MODEL_STORE_MAX_MB * 1024 * 1024)
+
+    if args.model == 'arima':
+        forecast = np.asarray(store.load_or_train('arima', args.ticker, prices).predict(args.steps))
+    else:
+        train_params = {} if args.epochs is None else {'epochs': args.epochs}
+        model = store.load_or_train('lstm', args.ticker, prices, train_params=train_params)
+        forecast = model.forecast_from_history(prices, np.array([len(prices)]), steps=args.steps)[0]
+
+    dates = pd.bdate_range(prices.index[-1] + pd.Timedelta(days=1), periods=args.steps)
+    print(pd.Series(forecast, index=dates, name=f"{args.ticker} {args.model}").to_string())
+
+def cmd_optimize(args):
+    from src.optimization import PortfolioOptimizer
+    config = _config(args)
+    prices = _load_prices(config)
+    optimizer = PortfolioOptimizer(prices, shrinkage=args.shrinkage)
+
+    views = None
+    if args.views:
+        from src.views import ForecastViewGenerator
+        generator = ForecastViewGenerator(args.views, horizon=args.horizon, origins=args.origins,
+                                          n_jobs=args.n_jobs, cache_dir=config.VIEWS_CACHE_DIR)
+        views = generator.generate(prices)
+        for ticker, view in views.expected_returns.items():
+            print(f"🔮 {ticker:>8} view {view:8.2%}")
+
+    if args.objective == 'max_sharpe':
+        weights = optimizer.optimize_performance(args.target_return, views=views)
+    elif args.objective == 'min_cvar':
+        weights = optimizer.optimize_cvar(args.confidence, args.target_return)
+    elif args.objective == 'risk_parity':
+        weights = optimizer.optimize_risk_parity()
+    elif args.objective == 'hrp':
+        weights = optimizer.optimize_hrp()
+    else:
+        weights = optimizer.optimize_large_universe()
+
+    for ticker, weight in weights.items():
+        print(f"{ticker:>8} {weight:8.2%}")
+    ret, vol, sharpe = optimizer.get_performance(weights)
+    print(f"📈 Return {ret:.2%} | Volatility {vol:.2%} | Sharpe {sharpe:.2f}")
+
+def cmd_backtest(args):
+    from src.backtest import WalkForwardBacktester
+    backtester = WalkForwardBacktester(_load_prices(_config(args)), train_window=args.train_window,
+                                       rebalance_every=args.rebalance_every,
+                                       transaction_cost=args.transaction_cost, n_jobs=args.n_jobs,
+                                       forecaster=args.forecaster, shrinkage=args.shrinkage)
+    for name, value in backtester.run().summary().items():
+        print(f"{name:>16} {value:10.4f}")
+
+def cmd_worker(args):
+    from src.data_processing import DataIngestion
+    from src.model_store import ModelStore
+    from src.snapshot import JobQueue, SnapshotBuilder, SnapshotStore, SnapshotWorker
+    config = _config(args)
+    ingestion = DataIngestion(config)
+    model_store = ModelStore(config.MODEL_STORE_DIR, config.MODEL_STORE_MAX_MB * 1024 * 1024)
+    builder = SnapshotBuilder(ingestion, model_store, config.TICKERS, models=args.models,
+                              explain=not args.no_explain)
+    worker = SnapshotWorker(JobQueue(config.JOB_QUEUE_PATH), builder, SnapshotStore(config.SNAPSHOT_DIR),
+                            poll_interval=args.poll_interval)
+    if args.once:
+        worker.request_refresh()
+        while worker.run_once():
+            pass
+        return
+    print(f"👷 Snapshot worker watching {ingestion.store.path}")
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        worker.stop()
+
+def cmd_run(args):
+    from src.pipeline import build_pipeline
+    config = _config(args)
+    if args.seed is not None:
+        config = replace(config, SEED=args.seed)
+    pipeline = build_pipeline(config, models=args.models, lstm_epochs=args.epochs, forecast_steps=args.steps,
+                              objective=args.objective, explain=not args.no_explain, fetch=args.fetch)
+    run = pipeline.run(args.stages or None, force=args.force)
+    print(run.summary().to_string(index=False))
+    if 'weights' in run.status:
+        for ticker, weight in run.output('weights')['weights'].items():
+            print(f"{ticker:>8} {weight:8.2%}")
+
+def cmd_stream(args):
+    from src.main import run_streaming
+    run_streaming(args.path, args.poll_interval, forecast=not args.no_forecast, config=_config(args))
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="GMF portfolio pipeline")
+    parser.add_argument("--tickers", nargs="+", help="override the configured tickers")
+    parser.add_argument("--backend", choices=['csv', 'parquet', 'npy'], help="processed price storage backend")
+    parser.add_argument("--storage-path", help="location of the processed price store")
+    parser.add_argument("--metrics", metavar="JSONL", help="append timing spans to this JSON lines file")
+    parser.add_argument("--prometheus", metavar="PATH", help="write per-stage totals in Prometheus text format")
+    parser.add_argument("--profile", nargs="+", default=[], metavar="STAGE",
+                        help="cProfile stages matching these patterns, e.g. 'model.*.train'")
+    parser.add_argument("--trace-memory", nargs="+", default=[], metavar="STAGE",
+                        help="trace peak Python memory of stages matching these patterns")
+    parser.add_argument("--timings", action="store_true", help="print a per-stage timing summary at the end")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="download prices and write the processed store")
+    ingest.add_argument("--no-snapshot", action="store_true", help="do not queue a dashboard snapshot job")
+    ingest.set_defaults(func=cmd_ingest)
+
+    train = commands.add_parser("train", help="train models for every ticker into the model store")
+    train.add_argument("models", nargs="*", choices=['arima', 'lstm'], help="model types (default: both)")
+    train.add_argument("--lstm-workers", type=int, default=1, help="concurrent LSTM training processes")
+    train.set_defaults(func=cmd_train)
+
+    forecast = commands.add_parser("forecast", help="forecast one ticker with a stored or freshly trained model")
+    forecast.add_argument("ticker")
+    forecast.add_argument("--model", choices=['arima', 'lstm'], default='arima')
+    forecast.add_argument("--steps", type=int, default=30)
+    forecast.add_argument("--epochs", type=int,
+                          help="LSTM training epochs if no stored model fits (default: the train default)")
+    forecast.set_defaults(func=cmd_forecast)
+
+    optimize = commands.add_parser("optimize", help="compute portfolio weights")
+    optimize.add_argument("--objective", choices=OBJECTIVES, default='max_sharpe')
+    optimize.add_argument("--target-return", type=float)
+    optimize.add_argument("--confidence", type=float, default=0.95, help="CVaR confidence level")
+    optimize.add_argument("--shrinkage", help="covariance shrinkage, e.g. ledoit_wolf")
+    optimize.add_argument("--views", choices=['arima', 'lstm'],
+                          help="blend model forecasts into expected returns (max_sharpe only)")
+    optimize.add_argument("--horizon", type=int, default=21, help="forecast horizon for --views (trading days)")
+    optimize.add_argument("--origins", type=int, default=0,
+                          help="backtest origins used to measure forecast error for --views")
+    optimize.add_argument("--n-jobs", type=int, default=1, help="parallel forecast workers for --views")
+    optimize.set_defaults(func=cmd_optimize)
+
+    backtest = commands.add_parser("backtest", help="walk-forward backtest of the optimizer")
+    backtest.add_argument("--train-window", type=int, default=252)
+    backtest.add_argument("--rebalance-every", type=int, default=21)
+    backtest.add_argument("--transaction-cost", type=float, default=0.0)
+    backtest.add_argument("--n-jobs", type=int, default=1)
+    backtest.add_argument("--forecaster", choices=['arima', 'lstm'])
+    backtest.add_argument("--shrinkage", help="covariance shrinkage, e.g. ledoit_wolf")
+    backtest.set_defaults(func=cmd_backtest)
+
+    worker = commands.add_parser("worker", help="precompute dashboard snapshots in the background")
+    worker.add_argument("--once", action="store_true", help="process queued jobs for the current data, then exit")
+    worker.add_argument("--models", nargs="+", choices=['arima', 'lstm'], default=['arima', 'lstm'])
+    worker.add_argument("--no-explain", action="store_true", help="skip SHAP summaries")
+    worker.add_argument("--poll-interval", type=float, default=5.0)
+    worker.set_defaults(func=cmd_worker)
+
+    run = commands.add_parser("run", help="run pipeline stages, reusing cached results whose inputs are unchanged")
+    run.add_argument("stages", nargs="*", choices=['prices', 'models', 'forecasts', 'weights', 'explanations'],
+                     help="target stages (default: all)")
+    run.add_argument("--force", nargs="+", default=[], metavar="STAGE", help="recompute these stages even if cached")
+    run.add_argument("--fetch", action="store_true", help="download prices instead of reading the processed store")
+    run.add_argument("--models", nargs="+", choices=['arima', 'lstm'], default=['arima', 'lstm'])
+    run.add_argument("--epochs", type=int, help="LSTM training epochs (default: the train default)")
+    run.add_argument("--steps", type=int, default=30, help="forecast horizon")
+    run.add_argument("--objective", choices=OBJECTIVES, default='max_sharpe')
+    run.add_argument("--no-explain", action="store_true", help="skip SHAP explanations")
+    run.add_argument("--seed", type=int, help="base seed (default: the configured SEED)")
+    run.set_defaults(func=cmd_run)
+
+    stream = commands.add_parser("stream", help="follow a CSV of live bars")
+    stream.add_argument("path")
+    stream.add_argument("--poll-interval", type=float, default=1.0)
+    stream.add_argument("--no-forecast", action="store_true", help="skip model forecasts while streaming")
+    stream.set_defaults(func=cmd_stream)
+    return parser
+
+def main(argv: Optional[List[str]] = None):
+    from src.instrumentation import Instrumentation, configure, configure_logging
+    args = build_parser().parse_args(argv)
+    configure_logging()
+    # Flags take precedence over the GMF_* environment variables
+    env = Instrumentation.from_env()
+    instrumentation = configure(jsonl_path=args.metrics or env.jsonl_path, profile=args.profile or env.profile,
+                                trace_memory=args.trace_memory or env.trace_memory, profile_dir=env.profile_dir)
+    try:
+        args.func(args)
+    finally:
+        if args.prometheus:
+            instrumentation.write_prometheus(args.prometheus)
+        if args.timings:
+            print(instrumentation.summary().to_string(index=False))
+
+if __name__ == "__main__":
+    # Adjust path to ensure local imports work during development
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    main()
@@ -1,10 +1,19 @@
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional
-import yfinance as yf
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Tuple
 import pandas as pd
 import numpy as np
 from datetime import datetime
+import json
+import logging
 import os
+import re
+import time
+from src.instrumentation import span
+from src.panel import PricePanel
+from src.storage import PriceStore, STORAGE_BACKENDS, create_store
+
+logger = logging.getLogger(__name__)
 
 @dataclass(frozen=True)
 class ProjectConfig:
@@ -14,64 +23,242 @@ class ProjectConfig:
     END_DATE: str = "2026-01-15"
     RAW_DATA_PATH: str = "data/raw/stock_data.csv"
     PROCESSED_DATA_PATH: str = "data/processed/portfolio_data.csv"
+    CACHE_DIR: Optional[str] = "data/raw/cache"
+    MAX_WORKERS: int = 8
+    MAX_RETRIES: int = 3
+    RETRY_BACKOFF: float = 1.0
+    STORAGE_BACKEND: str = "npy"
+    STORAGE_PATH: Optional[str] = None
+    EXPORT_CSV: bool = True
+    MODEL_STORE_DIR: str = "data/models"
+    MODEL_STORE_MAX_MB: int = 512
+    STREAM_SNAPSHOT_PATH: str = "data/stream/snapshot.json"
+    STREAM_MAX_AGE_SECONDS: float = 300.0
+    VIEWS_CACHE_DIR: str = "data/views"
+    SNAPSHOT_DIR: str = "data/snapshots"
+    JOB_QUEUE_PATH: str = "data/jobs.sqlite"
+    PRICE_DTYPE: str = "float64"
+    FILL_POLICY: str = "ffill"
+    MAX_FILL_DAYS: Optional[int] = 5
+    LISTING_POLICY: str = "common"
+    PIPELINE_CACHE_DIR: str = "data/cache"
+    SEED: int = 42
+
+    def storage_path(self) -> str:
+        """Location of the processed price store, derived from PROCESSED_DATA_PATH unless set"""
+        if self.STORAGE_PATH:
+            return self.STORAGE_PATH
+        if self.STORAGE_BACKEND == 'csv':
+            return self.PROCESSED_DATA_PATH
+        extension = STORAGE_BACKENDS.get(self.STORAGE_BACKEND, PriceStore).EXTENSION
+        return os.path.splitext(self.PROCESSED_DATA_PATH)[0] + extension
+
+class PriceSource:
+    """Base class for pluggable historical price sources"""
+
+    def download(self, ticker: str, start: str, end: str) -> pd.DataFrame:
+        """
+        Return daily bars for ticker in [start, end), indexed by date.
+        Implementations should raise on transient failures so they can be retried.
+        """
+        raise NotImplementedError
+
+class YFinanceSource(PriceSource):
+    """Downloads daily bars from Yahoo Finance"""
+
+    def download(self, ticker: str, start: str, end: str) -> pd.DataFrame:
+        import yfinance as yf
+        df = yf.download(ticker, start=start, end=end, progress=False, threads=False)
+        if df is None:
+            return pd.DataFrame()
+
+        # Handling multi-index columns from recent yfinance versions
+        if isinstance(df.columns, pd.MultiIndex):
+            df.columns = df.columns.droplevel(1)
+        return df
+
+class PriceCache:
+    """
+    Per-ticker on-disk store of raw bars.
+    Each ticker has a pickled frame plus a small JSON manifest recording the
+    date range that has already been requested from the source.
+    """
+
+    def __init__(self, cache_dir: str):
+        # Created on the first save, so building a DataIngestion never touches the disk
+        self.cache_dir = cache_dir
+
+    def _base_path(self, ticker: str) -> str:
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', ticker)
+        return os.path.join(self.cache_dir, safe_name)
+
+    def load(self, ticker: str) -> Optional[pd.DataFrame]:
+        """Return the cached bars for ticker, or None if nothing is cached"""
+        path = self._base_path(ticker) + ".pkl"
+        if not os.path.exists(path):
+            return None
+        return pd.read_pickle(path)
+
+    def fetched_range(self, ticker: str) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """Return the (start, end) range already fetched for ticker, end exclusive"""
+        path = self._base_path(ticker) + ".json"
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            manifest = json.load(f)
+        return pd.Timestamp(manifest['start']), pd.Timestamp(manifest['end'])
+
+    def save(self, ticker: str, df: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp):
+        """Persist bars and the fetched range for ticker"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        base = self._base_path(ticker)
+        # Write to temporary files first so an interrupted run never leaves a torn entry
+        df.to_pickle(base + ".pkl.tmp")
+        with open(base + ".json.tmp", "w") as f:
+            json.dump({'start': start.strftime('%Y-%m-%d'), 'end': end.strftime('%Y-%m-%d')}, f)
+        os.replace(base + ".pkl.tmp", base + ".pkl")
+        os.replace(base + ".json.tmp", base + ".json")
 
 class DataIngestion:
     """Handles fetching and basic cleaning of financial data"""
     
-    def __init__(self, config: ProjectConfig = ProjectConfig()):
+    def __init__(self, config: ProjectConfig = ProjectConfig(), source: Optional[PriceSource] = None):
         self.config = config
+        self.source = source if source is not None else YFinanceSource()
+        self.cache = PriceCache(config.CACHE_DIR) if config.CACHE_DIR else None
+        self.store: PriceStore = create_store(config.STORAGE_BACKEND, config.storage_path())
+
+    def _download_with_retry(self, ticker: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        """Call the price source, retrying with exponential backoff on failure"""
+        for attempt in range(self.config.MAX_RETRIES + 1):
+            try:
+                return self.source.download(ticker, start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'))
+            except Exception as e:
+                if attempt == self.config.MAX_RETRIES:
+                    raise
+                delay = self.config.RETRY_BACKOFF * (2 ** attempt)
+                logger.warning(f"🔁 Retrying {ticker} in {delay:.1f}s after error: {e}")
+                time.sleep(delay)
+
+    def _fetch_ticker(self, ticker: str) -> pd.DataFrame:
+        """
+        Fetch bars for a single ticker, only requesting ranges missing from the cache
+        """
+        start = pd.Timestamp(self.config.START_DATE)
+        end = pd.Timestamp(self.config.END_DATE)
+        # Today's bar may still be forming, so the recorded range stops short of it
+        # and the next run requests it again
+        settled_end = min(end, pd.Timestamp.today().normalize())
+
+        cached = self.cache.load(ticker) if self.cache else None
+        fetched = self.cache.fetched_range(ticker) if self.cache else None
+
+        if cached is None or fetched is None:
+            missing = [(start, end)]
+            cached_start, cached_end = start, settled_end
+        else:
+            cached_start, cached_end = fetched
+            missing = []
+            if start < cached_start:
+                missing.append((start, cached_start))
+            if end > cached_end:
+                missing.append((cached_end, end))
+            cached_start, cached_end = min(start, cached_start), max(settled_end, cached_end)
+
+        frames = [] if cached is None else [cached]
+        for range_start, range_end in missing:
+            if range_start >= range_end:
+                continue
+            with span("ingest.download", ticker=ticker) as s:
+                frames.append(self._download_with_retry(ticker, range_start, range_end))
+                s.set(rows=len(frames[-1]))
+
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame()
+
+        df = pd.concat(frames)
+        df = df[~df.index.duplicated(keep='last')].sort_index()
+
+        if self.cache and missing:
+            self.cache.save(ticker, df, cached_start, cached_end)
+
+        return df.loc[(df.index >= start) & (df.index < end)]
 
     def fetch_data(self) -> Dict[str, pd.DataFrame]:
         """
-        Download historical financial data for configured tickers
+        Download historical financial data for configured tickers.
+        Tickers are fetched concurrently and only the range missing from the
+        local cache is requested from the source.
         """
-        data_dict = {}
-        print(f"📊 Downloading data for: {self.config.TICKERS}")
-        
-        for ticker in self.config.TICKERS:
-            try:
-                df = yf.download(ticker, start=self.config.START_DATE, end=self.config.END_DATE)
-                if df.empty:
-                    print(f"⚠️  No data for {ticker}")
-                    continue
-                
-                # Handling multi-index columns from recent yfinance versions
-                if isinstance(df.columns, pd.MultiIndex):
-                    df.columns = df.columns.droplevel(1)
-                
-                data_dict[ticker] = df
-                print(f"✅ Downloaded {len(df)} rows for {ticker}")
-            except Exception as e:
-                print(f"❌ Error downloading {ticker}: {e}")
-                
-        return data_dict
+        results = {}
+        logger.info(f"📊 Downloading data for: {self.config.TICKERS}")
+
+        workers = max(1, min(self.config.MAX_WORKERS, len(self.config.TICKERS)))
+        with span("ingest.fetch", tickers=len(self.config.TICKERS)) as s, \
+                ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(self._fetch_ticker, ticker): ticker for ticker in self.config.TICKERS}
+            for future in as_completed(futures):
+                ticker = futures[future]
+                try:
+                    df = future.result()
+                    if df.empty:
+                        logger.warning(f"⚠️  No data for {ticker}")
+                        continue
+                    results[ticker] = df
+                    logger.info(f"✅ Downloaded {len(df)} rows for {ticker}")
+                except Exception as e:
+                    logger.error(f"❌ Error downloading {ticker}: {e}")
+            s.set(rows=sum(len(df) for df in results.values()), failed=len(self.config.TICKERS) - len(results))
+
+        # Preserve the configured ticker order regardless of completion order
+        return {ticker: results[ticker] for ticker in self.config.TICKERS if ticker in results}
+
+    def build_panel(self, data_dict: Dict[str, pd.DataFrame]) -> PricePanel:
+        """Align the tickers' prices (Adj Close, else Close) on one calendar using the configured policies"""
+        return PricePanel.from_frames(data_dict, dtype=np.dtype(self.config.PRICE_DTYPE),
+                                      fill=self.config.FILL_POLICY, max_fill=self.config.MAX_FILL_DAYS,
+                                      listing=self.config.LISTING_POLICY)
 
     def combine_and_save(self, data_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
         """
         Combine multiple ticker dataframes into one and save to disk
         """
-        combined = pd.DataFrame()
-        
-        for ticker, df in data_dict.items():
-            # Use Adj Close if available, otherwise Close
-            price_col = 'Adj Close' if 'Adj Close' in df.columns else 'Close'
-            ticker_prices = df[[price_col]].rename(columns={price_col: ticker})
-            
-            if combined.empty:
-                combined = ticker_prices
-            else:
-                combined = combined.join(ticker_prices, how='outer')
-        
-        # Clean data
-        combined = combined.dropna()
-        
+        with span("ingest.combine", tickers=len(data_dict)) as s:
+            panel = self.build_panel(data_dict)
+            # With the 'mask' listing policy dates before a listing stay NaN; otherwise
+            # only dates that are still incomplete after filling are dropped
+            combined = (panel if self.config.LISTING_POLICY == 'mask' else panel.dropna()).to_frame()
+            s.set(rows=len(combined), calendar=len(panel.dates), dtype=self.config.PRICE_DTYPE)
+        logger.info(f"🧮 Aligned {len(data_dict)} tickers on {len(combined)} of {len(panel.dates)} dates")
+
         # Save
-        os.makedirs(os.path.dirname(self.config.PROCESSED_DATA_PATH), exist_ok=True)
-        combined.to_csv(self.config.PROCESSED_DATA_PATH)
-        print(f"💾 Processed data saved to {self.config.PROCESSED_DATA_PATH}")
-        
+        with span("ingest.save", tickers=combined.shape[1], rows=len(combined), backend=self.config.STORAGE_BACKEND):
+            self.store.write(combined)
+            logger.info(f"💾 Processed data saved to {self.store.path}")
+
+            if self.config.EXPORT_CSV and self.store.path != self.config.PROCESSED_DATA_PATH:
+                create_store('csv', self.config.PROCESSED_DATA_PATH).write(combined)
+                logger.info(f"💾 CSV export saved to {self.config.PROCESSED_DATA_PATH}")
+
         return combined
 
+    def load_processed(self, tickers: Optional[List[str]] = None, start: Optional[str] = None,
+                       end: Optional[str] = None) -> pd.DataFrame:
+        """
+        Load processed prices from the configured store, optionally restricted
+        to a subset of tickers and an inclusive date range
+        """
+        with span("ingest.load", backend=self.config.STORAGE_BACKEND) as s:
+            prices = self.store.read(tickers, start, end)
+            s.set(rows=len(prices), tickers=prices.shape[1])
+        return prices
+
+    def load_panel(self, tickers: Optional[List[str]] = None, start: Optional[str] = None,
+                   end: Optional[str] = None) -> PricePanel:
+        """Processed prices as an aligned NumPy panel with validity masks"""
+        return PricePanel.from_frame(self.load_processed(tickers, start, end))
+
 if __name__ == "__main__":
     # Quick test run
     ingestion = DataIngestion()
@@ -0,0 +1,223 @@
+from collections import deque
+from typing import List, Optional, Union
+import pandas as pd
+import numpy as np
+
+TRADING_DAYS = 252
+
+class RollingMomentEstimator:
+    """
+    Running-sum estimator of expected returns and covariance.
+    Keeps sums of returns, log-growth, cross products and the higher cross moments
+    needed for Ledoit-Wolf shrinkage, so adding or removing a bar costs O(N^2)
+    regardless of the window length. Rows with a non-finite return are skipped (and
+    counted in `skipped`), so one bad bar cannot poison the sums.
+    """
+    SHRINKAGE = ('ledoit_wolf',)
+
+    def __init__(self, tickers: List[str], window: Optional[int] = None, frequency: int = TRADING_DAYS):
+        """
+        window: number of most recent bars kept by update(); None means an expanding window
+        frequency: periods per year used to annualise
+        """
+        self.tickers = list(tickers)
+        self.window = window
+        self.frequency = frequency
+        self._rows = deque()
+        self._last_prices = None
+        self.reset()
+
+    def reset(self):
+        n = len(self.tickers)
+        self.count = 0
+        self.skipped = 0
+        self.sum_r = np.zeros(n)
+        self.sum_log = np.zeros(n)
+        self.sum_rr = np.zeros((n, n))
+        self.sum_r2r = np.zeros((n, n))    # sum_t r_i^2 r_j
+        self.sum_r2r2 = np.zeros((n, n))   # sum_t r_i^2 r_j^2
+        self._rows.clear()
+
+    @classmethod
+    def from_prices(cls, prices: pd.DataFrame, window: Optional[int] = None,
+                    frequency: int = TRADING_DAYS) -> "RollingMomentEstimator":
+        """Seed the estimator with the (last window of) returns of a price frame"""
+        estimator = cls(list(prices.columns), window, frequency)
+        values = prices.to_numpy(dtype=np.float64)
+        returns = values[1:] / values[:-1] - 1
+        if window is not None:
+            returns = returns[-window:]
+            estimator._rows.extend(returns)
+        estimator.add(returns)
+        estimator._last_prices = values[-1]
+        return estimator
+
+    def _apply(self, returns: np.ndarray, sign: float):
+        returns = np.atleast_2d(np.asarray(returns, dtype=np.float64))
+        # add and remove drop the same rows, so removing a block stays exact
+        finite = np.isfinite(returns).all(axis=1)
+        if not finite.all():
+            if sign > 0:
+                self.skipped += int((~finite).sum())
+            returns = returns[finite]
+        squared = returns ** 2
+        self.count += sign * len(returns)
+        self.sum_r += sign * returns.sum(axis=0)
+        self.sum_log += sign * np.log1p(returns).sum(axis=0)
+        self.sum_rr += sign * (returns.T @ returns)
+        self.sum_r2r += sign * (squared.T @ returns)
+        self.sum_r2r2 += sign * (squared.T @ squared)
+
+    def add(self, returns: np.ndarray):
+        """Add a block of return rows (bars x tickers) to the sums"""
+        self._apply(returns, 1.0)
+
+    def remove(self, returns: np.ndarray):
+        """Remove a block of return rows that were previously added"""
+        self._apply(returns, -1.0)
+
+    def update(self, returns: np.ndarray):
+        """Add one bar of returns, dropping the oldest bar once the window is full"""
+        row = np.asarray(returns, dtype=np.float64)
+        self.add(row)
+        if self.window is not None:
+            self._rows.append(row)
+            if len(self._rows) > self.window:
+                self.remove(self._rows.popleft())
+
+    def update_prices(self, prices: Union[np.ndarray, pd.Series]):
+        """Add one bar given as prices; the return is taken against the previous bar"""
+        prices = np.asarray(prices, dtype=np.float64)
+        if self._last_prices is not None:
+            self.update(prices / self._last_prices - 1)
+        self._last_prices = prices
+
+    def mean(self) -> np.ndarray:
+        """Per-period arithmetic mean return"""
+        return self.sum_r / self.count
+
+    def expected_returns(self, compounding: bool = True) -> pd.Series:
+        """
+        Annualised expected returns. With compounding this is the geometric mean,
+        matching expected_returns.mean_historical_return.
+        """
+        if compounding:
+            mu = np.expm1(self.sum_log * self.frequency / self.count)
+        else:
+            mu = self.mean() * self.frequency
+        return pd.Series(mu, index=self.tickers)
+
+    def _scatter(self) -> np.ndarray:
+        """Centered cross-product matrix sum_t (r_t - m)(r_t - m)^T"""
+        return self.sum_rr - np.outer(self.sum_r, self.sum_r) / self.count
+
+    def ledoit_wolf_shrinkage(self) -> float:
+        """
+        Optimal Ledoit-Wolf intensity toward a scaled identity, computed from the
+        running moments (same estimator as sklearn.covariance.ledoit_wolf)
+        """
+        n, p = self.count, len(self.tickers)
+        m = self.mean()
+        emp_cov = self._scatter() / n
+        trace = np.diag(emp_cov)
+        mu = trace.sum() / p
+
+        # sum_t y_i^2 y_j^2 for centered y = r - m, expanded in raw moments
+        s1, s2 = self.sum_r, np.diag(self.sum_rr)
+        mi, mj = m[:, None], m[None, :]
+        fourth = (self.sum_r2r2
+                  - 2 * mj * self.sum_r2r - 2 * mi * self.sum_r2r.T
+                  + mj ** 2 * s2[:, None] + mi ** 2 * s2[None, :]
+                  + 4 * mi * mj * self.sum_rr
+                  - 2 * mi * mj ** 2 * s1[:, None] - 2 * mi ** 2 * mj * s1[None, :]
+                  + n * mi ** 2 * mj ** 2)
+
+        delta_ = np.sum(emp_cov ** 2)
+        beta = (fourth.sum() / n - delta_) / (p * n)
+        delta = (delta_ - 2 * mu * trace.sum() + p * mu ** 2) / p
+        beta = min(beta, delta)
+        return 0.0 if beta == 0 else beta / delta
+
+    def covariance(self, shrinkage: Union[None, str, float] = None) -> pd.DataFrame:
+        """
+        Annualised covariance matrix.
+        shrinkage: None for the sample covariance (ddof=1, as risk_models.sample_cov),
+        'ledoit_wolf' for the optimal shrinkage toward a scaled identity
+        (as CovarianceShrinkage.ledoit_wolf), or a fixed intensity in [0, 1].
+        """
+        if shrinkage is None:
+            cov = self._scatter() / (self.count - 1)
+        else:
+            emp_cov = self._scatter() / self.count
+            intensity = self.ledoit_wolf_shrinkage() if shrinkage == 'ledoit_wolf' else float(shrinkage)
+            target = np.eye(len(self.tickers)) * np.trace(emp_cov) / len(self.tickers)
+            cov = (1 - intensity) * emp_cov + intensity * target
+        return pd.DataFrame(cov * self.frequency, index=self.tickers, columns=self.tickers)
+
+class ExponentialMomentEstimator:
+    """
+    Exponentially weighted mean and covariance of returns, updated in O(N^2) per bar.
+    Bars with a non-finite return are skipped and counted in `skipped`.
+    """
+    # Ledoit-Wolf needs the fourth moments the exponential recursion does not keep
+    SHRINKAGE = ()
+
+    def __init__(self, tickers: List[str], span: int = 180, frequency: int = TRADING_DAYS):
+        self.tickers = list(tickers)
+        self.alpha = 2 / (span + 1)
+        self.frequency = frequency
+        self.count = 0
+        self.skipped = 0
+        self._mean = np.zeros(len(self.tickers))
+        self._cov = np.zeros((len(self.tickers), len(self.tickers)))
+        self._last_prices = None
+
+    @classmethod
+    def from_prices(cls, prices: pd.DataFrame, span: int = 180,
+                    frequency: int = TRADING_DAYS) -> "ExponentialMomentEstimator":
+        estimator = cls(list(prices.columns), span, frequency)
+        for row in prices.to_numpy(dtype=np.float64):
+            estimator.update_prices(row)
+        return estimator
+
+    def update(self, returns: np.ndarray):
+        """Fold one bar of returns into the weighted moments"""
+        r = np.asarray(returns, dtype=np.float64)
+        if not np.isfinite(r).all():
+            self.skipped += 1
+            return
+        if self.count == 0:
+            self._mean = r.copy()
+        else:
+            diff = r - self._mean
+            self._mean = self._mean + self.alpha * diff
+            self._cov = (1 - self.alpha) * (self._cov + self.alpha * np.outer(diff, diff))
+        self.count += 1
+
+    def update_prices(self, prices: Union[np.ndarray, pd.Series]):
+        prices = np.asarray(prices, dtype=np.float64)
+        if self._last_prices is not None:
+            self.update(prices / self._last_prices - 1)
+        self._last_prices = prices
+
+    def mean(self) -> np.ndarray:
+        return self._mean.copy()
+
+    def expected_returns(self, compounding: bool = True) -> pd.Series:
+        """Annualised exponentially weighted mean return"""
+        mu = (1 + self._mean) ** self.frequency - 1 if compounding else self._mean * self.frequency
+        return pd.Series(mu, index=self.tickers)
+
+    def covariance(self, shrinkage: Union[None, float] = None) -> pd.DataFrame:
+        """
+        Annualised exponentially weighted covariance, optionally shrunk toward a scaled
+        identity with a fixed intensity in [0, 1]
+        """
+        cov = self._cov
+        if isinstance(shrinkage, str):
+            raise ValueError(f"ExponentialMomentEstimator supports only a fixed shrinkage intensity, got "
+                             f"'{shrinkage}'. Use RollingMomentEstimator for Ledoit-Wolf shrinkage.")
+        if shrinkage is not None:
+            target = np.eye(len(self.tickers)) * np.trace(cov) / len(self.tickers)
+            cov = (1 - float(shrinkage)) * cov + float(shrinkage) * target
+        return pd.DataFrame(cov * self.frequency, index=self.tickers, columns=self.tickers)
@@ -1,41 +1,125 @@
-import shap
+import hashlib
+import time
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from typing import Any, Tuple
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+from src.instrumentation import span
+
+def summarize_background(data: np.ndarray, budget: int = 100, method: str = 'kmeans',
+                         seed: int = 0) -> np.ndarray:
+    """
+    Reduce background windows (samples, window, features) to at most `budget` samples.
+    'kmeans' keeps the cluster centres of the flattened windows, 'random' a uniform
+    subsample. The explainer's cost grows linearly with the background size.
+    """
+    data = np.asarray(data)
+    if len(data) <= budget:
+        return data
+    if method == 'random':
+        rows = np.random.default_rng(seed).choice(len(data), size=budget, replace=False)
+        return data[np.sort(rows)]
+    if method == 'kmeans':
+        from sklearn.cluster import KMeans
+        flat = data.reshape(len(data), -1)
+        centres = KMeans(n_clusters=budget, n_init=1, random_state=seed).fit(flat).cluster_centers_
+        return centres.reshape((budget,) + data.shape[1:]).astype(data.dtype)
+    raise ValueError(f"Unknown background summarization '{method}'. Choose 'kmeans' or 'random'.")
+
+def model_version(model: Any) -> str:
+    """Hash of a Keras model's weights, so retrained models get fresh explainers"""
+    digest = hashlib.sha256()
+    for weights in model.get_weights():
+        digest.update(np.ascontiguousarray(weights).tobytes())
+    return digest.hexdigest()[:16]
+
+def _as_array(shap_values) -> np.ndarray:
+    """SHAP values as (samples, window, features) for the model's single output"""
+    values = np.asarray(shap_values[0] if isinstance(shap_values, list) else shap_values)
+    if values.ndim == 4:
+        values = values[..., 0]
+    return values
+
+def feature_importance(shap_values) -> np.ndarray:
+    """Mean absolute SHAP value per feature, aggregated over samples and the time window"""
+    return np.abs(_as_array(shap_values)).mean(axis=(0, 1))
+
+def temporal_importance(shap_values) -> np.ndarray:
+    """Mean absolute SHAP value per lag (0 = oldest), aggregated over samples and features"""
+    return np.abs(_as_array(shap_values)).mean(axis=(0, 2))
 
 class ModelExplainer:
     """Wrapper for SHAP explainability on LSTM models"""
-    
-    def __init__(self, model: Any, background_data: np.ndarray):
+
+    _cache: "OrderedDict[Tuple, ModelExplainer]" = OrderedDict()
+    CACHE_SIZE = 8
+
+    def __init__(self, model: Any, background_data: np.ndarray, budget: Optional[int] = None,
+                 summarize: str = 'kmeans'):
         """
         Initialize with a trained model and background samples
         background_data should be in form (samples, window, features)
+        budget: summarize the background down to this many samples (None keeps all)
         """
+        import shap
+
         self.model = model
-        self.background_data = background_data
-        self.explainer = shap.GradientExplainer(model, background_data)
+        with span("explain.background", rows=len(background_data), budget=budget, method=summarize):
+            self.background_data = (background_data if budget is None
+                                    else summarize_background(background_data, budget, summarize))
+            self.explainer = shap.GradientExplainer(model, self.background_data)
+        self.explained = 0
 
-    def explain(self, test_data: np.ndarray) -> np.ndarray:
-        """Calculate SHAP values for test samples"""
-        return self.explainer.shap_values(test_data)
+    @classmethod
+    def for_model(cls, model: Any, background_data: np.ndarray, budget: Optional[int] = 100,
+                  summarize: str = 'kmeans', version: Optional[str] = None) -> "ModelExplainer":
+        """
+        Explainer for this model version, reused across calls. The version defaults to
+        a hash of the model weights; pass e.g. a model-store key to skip hashing.
+        """
+        key = (version or model_version(model), budget, summarize)
+        explainer = cls._cache.get(key)
+        if explainer is None:
+            explainer = cls(model, background_data, budget, summarize)
+            cls._cache[key] = explainer
+            while len(cls._cache) > cls.CACHE_SIZE:
+                cls._cache.popitem(last=False)
+        cls._cache.move_to_end(key)
+        return explainer
+
+    def explain(self, test_data: np.ndarray, batch_size: int = 64, max_samples: Optional[int] = None,
+                time_budget: Optional[float] = None, nsamples: int = 200) -> np.ndarray:
+        """
+        Calculate SHAP values for test samples, in batches.
+        max_samples / time_budget (seconds) cap the work; the result covers the first
+        self.explained windows of test_data, and a started batch is always completed.
+        nsamples: gradient samples per window (SHAP's accuracy / speed trade-off)
+        """
+        test_data = np.asarray(test_data)
+        limit = len(test_data) if max_samples is None else min(max_samples, len(test_data))
+        start, chunks = time.perf_counter(), []
+
+        with span("explain.shap", requested=limit, batch_size=batch_size, nsamples=nsamples) as s:
+            for lo in range(0, limit, batch_size):
+                if time_budget is not None and chunks and time.perf_counter() - start >= time_budget:
+                    break
+                batch = test_data[lo:min(lo + batch_size, limit)]
+                chunks.append(_as_array(self.explainer.shap_values(batch, nsamples=nsamples)))
+
+            values = np.concatenate(chunks) if chunks else np.empty((0,) + test_data.shape[1:])
+            s.set(rows=len(values))
+        self.explained = len(values)
+        return values
 
     def plot_importance(self, shap_values: list, feature_names: list):
         """
         Generate a summary plot of feature importance
         Note: For LSTM, we aggregate across the time dimension
         """
-        # SHAP values for GradientExplainer with LSTM can be [samples, window, features]
-        # We handle both list and array outputs
-        if isinstance(shap_values, list):
-            vals = np.abs(shap_values[0])
-        else:
-            vals = np.abs(shap_values)
-            
-        # Aggregate importance across samples and time window
-        # vals shape: (sequences, window, 1)
-        importance = vals.mean(axis=(0, 1)).flatten()
-        
+        import matplotlib.pyplot as plt
+
+        importance = feature_importance(shap_values)
+
         fig, ax = plt.subplots(figsize=(10, 6))
         pd.Series(importance, index=feature_names).sort_values().plot(kind='barh', ax=ax)
         ax.set_title("Feature Importance (SHAP)")
@@ -45,18 +129,14 @@ class ModelExplainer:
 
     def plot_time_importance(self, shap_values: list, window: int):
         """Visualize which lags in the time window were most important"""
-        if isinstance(shap_values, list):
-            vals = np.abs(shap_values[0])
-        else:
-            vals = np.abs(shap_values)
-            
-        # vals shape: (sequences, window, 1) -> aggregate across sequences and features
-        temporal_importance = vals.mean(axis=(0, 2)).flatten()
-        
+        import matplotlib.pyplot as plt
+
+        importance = temporal_importance(shap_values)
+
         fig, ax = plt.subplots(figsize=(10, 4))
-        ax.plot(range(window), temporal_importance, marker='o', color='#2ca02c')
+        ax.plot(range(window), importance, marker='o', color='#2ca02c')
         ax.set_title("Temporal Importance (Impact of specific lags)")
-        ax.set_xlabel("Lag (Days ago, 0=oldest, 60=most recent)")
+        ax.set_xlabel(f"Lag (Days ago, 0=oldest, {window - 1}=most recent)")
         ax.set_ylabel("Mean Impact")
         ax.grid(True, alpha=0.3)
         plt.tight_layout()
@@ -0,0 +1,140 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import pandas as pd
+import numpy as np
+
+def portfolio_performance(weights: np.ndarray, mu: Union[np.ndarray, pd.Series],
+                          S: Union[np.ndarray, pd.DataFrame],
+                          risk_free_rate: float = 0.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Expected return, volatility and Sharpe ratio for one (N,) or many (K, N) weight
+    vectors, using plain matrix products
+    """
+    W = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+    mu, S = np.asarray(mu, dtype=np.float64), np.asarray(S, dtype=np.float64)
+    returns = W @ mu
+    volatility = np.sqrt(np.einsum('kn,nm,km->k', W, S, W))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = (returns - risk_free_rate) / volatility
+    if np.ndim(weights) == 1:
+        return returns[0], volatility[0], sharpe[0]
+    return returns, volatility, sharpe
+
+@dataclass
+class Frontier:
+    """A discretized efficient frontier"""
+    tickers: List[str]
+    weights: np.ndarray       # (points, assets)
+    returns: np.ndarray
+    volatilities: np.ndarray
+    sharpe: np.ndarray
+
+    def max_sharpe_weights(self) -> Dict[str, float]:
+        """Weights of the frontier point with the highest Sharpe ratio"""
+        return dict(zip(self.tickers, self.weights[int(np.nanargmax(self.sharpe))]))
+
+    def to_frame(self) -> pd.DataFrame:
+        frame = pd.DataFrame(self.weights, columns=self.tickers)
+        frame.insert(0, 'sharpe', self.sharpe)
+        frame.insert(0, 'volatility', self.volatilities)
+        frame.insert(0, 'return', self.returns)
+        return frame
+
+class FrontierEngine:
+    """
+    Solves whole grids of mean-variance problems with one parametrized cvxpy problem.
+    Expected returns, the covariance factor and the target are cvxpy Parameters, so
+    the problem is compiled once and every subsequent solve only swaps parameter
+    values and warm-starts from the previous solution.
+    """
+
+    def __init__(self, mu: pd.Series, S: pd.DataFrame, weight_bounds: Tuple[float, float] = (0, 1),
+                 risk_free_rate: float = 0.0, solver: Optional[str] = None):
+        import cvxpy as cp
+        self.tickers = list(mu.index)
+        self.risk_free_rate = risk_free_rate
+        self.solver = solver or ('OSQP' if 'OSQP' in cp.installed_solvers() else None)
+        n = len(self.tickers)
+
+        self._w = cp.Variable(n)
+        self._mu = cp.Parameter(n)
+        self._factor = cp.Parameter((n, n))
+        self._target = cp.Parameter()
+        # mu / gamma; scaling the return term instead of the risk term keeps the problem DPP
+        self._scaled_mu = cp.Parameter(n)
+
+        risk = cp.sum_squares(self._factor.T @ self._w)
+        constraints = [cp.sum(self._w) == 1, self._w >= weight_bounds[0], self._w <= weight_bounds[1]]
+        self._target_problem = cp.Problem(cp.Minimize(risk), constraints + [self._mu @ self._w >= self._target])
+        self._aversion_problem = cp.Problem(cp.Maximize(self._scaled_mu @ self._w - risk / 2), constraints)
+        self._weight_bounds = weight_bounds
+        self.update(mu, S)
+
+    def update(self, mu: pd.Series, S: pd.DataFrame):
+        """Swap in new estimates (e.g. the next rolling window) without rebuilding the problem"""
+        self.mu = np.asarray(mu, dtype=np.float64)
+        self.S = np.asarray(S, dtype=np.float64)
+        self._mu.value = self.mu
+        # Small ridge keeps the Cholesky factor defined for singular sample covariances
+        ridge = 1e-12 * max(np.trace(self.S), 1.0)
+        self._factor.value = np.linalg.cholesky(self.S + ridge * np.eye(len(self.mu)))
+
+    def _solve(self, problem) -> Optional[np.ndarray]:
+        import cvxpy as cp
+        problem.solve(solver=self.solver, warm_start=True)
+        if problem.status not in (cp.OPTIMAL, cp.OPTIMAL_INACCURATE):
+            return None
+        weights = np.clip(self._w.value, *self._weight_bounds)
+        return weights / weights.sum()
+
+    def _frontier(self, weights: List[np.ndarray]) -> Frontier:
+        W = np.vstack(weights) if weights else np.empty((0, len(self.tickers)))
+        returns, volatilities, sharpe = portfolio_performance(W, self.mu, self.S, self.risk_free_rate)
+        return Frontier(self.tickers, W, returns, volatilities, sharpe)
+
+    def min_volatility(self) -> np.ndarray:
+        """Global minimum-variance weights"""
+        self._target.value = -1e9
+        return self._solve(self._target_problem)
+
+    def efficient_frontier(self, n_points: int = 50, targets: Optional[Sequence[float]] = None) -> Frontier:
+        """
+        Minimum-variance portfolios for a grid of target returns, by default spanning
+        the minimum-variance return up to the highest achievable return
+        """
+        if targets is None:
+            low = float(self.mu @ self.min_volatility())
+            high = self._max_return()
+            targets = np.linspace(low, high, n_points)
+
+        weights = []
+        for target in targets:
+            self._target.value = float(target)
+            solution = self._solve(self._target_problem)
+            if solution is not None:
+                weights.append(solution)
+        return self._frontier(weights)
+
+    def risk_aversion_frontier(self, gammas: Sequence[float]) -> Frontier:
+        """Mean-variance utility maximizers for a grid of risk-aversion coefficients"""
+        weights = []
+        for gamma in gammas:
+            self._scaled_mu.value = self.mu / float(gamma)
+            solution = self._solve(self._aversion_problem)
+            if solution is not None:
+                weights.append(solution)
+        return self._frontier(weights)
+
+    def _max_return(self) -> float:
+        """Highest expected return reachable under the weight bounds (greedy fill)"""
+        low, high = self._weight_bounds
+        weights = np.full(len(self.mu), float(low))
+        remaining = 1 - weights.sum()
+        for i in np.argsort(-self.mu):
+            step = min(high - low, remaining)
+            weights[i] += step
+            remaining -= step
+            if remaining <= 0:
+                break
+        # Stay a hair inside the boundary so the target constraint remains feasible
+        return float(self.mu @ weights) - 1e-9
@@ -0,0 +1,230 @@
+from typing import Any, Dict, List, Optional, Sequence
+import json
+import logging
+import os
+import numpy as np
+import pandas as pd
+from src.instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+FEATURES = ('close', 'returns', 'volume')
+
+def _valid_window_ends(valid: np.ndarray, window: int) -> np.ndarray:
+    """Positions t such that rows t - window .. t (inputs and target) are all valid"""
+    counts = np.concatenate([[0], np.cumsum(valid, dtype=np.int64)])
+    ends = np.arange(window, len(valid))
+    return ends[counts[ends + 1] - counts[ends - window] == window + 1]
+
+class GlobalLSTMForecaster:
+    """
+    One LSTM shared by a whole ticker universe, trained on windows pooled from all
+    tickers. Each ticker keeps its own min-max scaling; an optional learned ticker
+    embedding lets the shared network specialise per asset.
+    """
+
+    def __init__(self, window: int = 60, features: Sequence[str] = ('close',),
+                 embedding_dim: Optional[int] = 8, units: int = 50):
+        """
+        window: number of past observations fed to the network
+        features: any of 'close', 'returns' (close-to-close) and 'volume' (log volume); 'close' comes first
+        embedding_dim: size of the ticker embedding, None to train without one
+        """
+        unknown = set(features) - set(FEATURES)
+        if unknown or 'close' not in features:
+            raise ValueError(f"Features must include 'close' and come from {list(FEATURES)}, got {list(features)}.")
+        self.window = window
+        self.features = ['close'] + [f for f in FEATURES[1:] if f in features]
+        self.embedding_dim = embedding_dim
+        self.units = units
+        self.tickers: List[str] = []
+        self.model = None
+        self._rollout_fn = None
+        self.n_windows = 0
+        self.scale_min: Optional[np.ndarray] = None  # (tickers, features)
+        self.scale_range: Optional[np.ndarray] = None
+
+    def _raw_features(self, prices: pd.DataFrame, volume: Optional[pd.DataFrame],
+                      tickers: List[str]) -> np.ndarray:
+        """Unscaled (tickers, time, features) block in float32, NaN where a value is missing"""
+        close = prices[tickers].to_numpy(dtype=np.float32).T
+        columns = [close]
+        if 'returns' in self.features:
+            returns = np.full_like(close, np.nan)
+            returns[:, 1:] = close[:, 1:] / close[:, :-1] - 1
+            columns.append(returns)
+        if 'volume' in self.features:
+            if volume is None:
+                raise ValueError("The 'volume' feature needs a volume frame aligned with prices.")
+            columns.append(np.log1p(volume.reindex(index=prices.index, columns=tickers)
+                                    .to_numpy(dtype=np.float32).T))
+        return np.stack(columns, axis=-1)
+
+    def _build_model(self):
+        import tensorflow as tf
+        from tensorflow.keras import layers
+
+        window_in = tf.keras.Input(shape=(self.window, len(self.features)), name="window")
+        inputs, x = [window_in], window_in
+        if self.embedding_dim:
+            ticker_in = tf.keras.Input(shape=(), dtype="int32", name="ticker")
+            embedded = layers.Embedding(len(self.tickers), self.embedding_dim)(ticker_in)
+            x = layers.Concatenate()([x, layers.RepeatVector(self.window)(embedded)])
+            inputs.append(ticker_in)
+
+        x = layers.LSTM(self.units, return_sequences=True)(x)
+        x = layers.Dropout(0.2)(x)
+        x = layers.LSTM(self.units)(x)
+        x = layers.Dropout(0.2)(x)
+        x = layers.Dense(25)(x)
+        model = tf.keras.Model(inputs, layers.Dense(1)(x))
+        model.compile(optimizer='adam', loss='mean_squared_error')
+        return model
+
+    def _build_rollout(self):
+        """
+        Compile the recursive forecast into a single graph. Each step predicts the
+        scaled close, rebuilds the next feature row (returns from the predicted
+        close, other features held) and slides it into the window.
+        """
+        import tensorflow as tf
+        model, features = self.model, self.features
+
+        @tf.function(reduce_retracing=True)
+        def rollout(x, tickers, scale_min, scale_range, last_close, steps):
+            outputs = tf.TensorArray(tf.float32, size=steps)
+            for i in tf.range(steps):
+                pred = model(self._inputs(x, tickers), training=False)[:, 0]
+                close = pred * scale_range[:, 0] + scale_min[:, 0]
+                columns = [pred]
+                for j, feature in enumerate(features[1:], start=1):
+                    if feature == 'returns':
+                        columns.append((close / last_close - 1 - scale_min[:, j]) / scale_range[:, j])
+                    else:
+                        columns.append(x[:, -1, j])
+                x = tf.concat([x[:, 1:], tf.stack(columns, axis=1)[:, None]], axis=1)
+                outputs = outputs.write(i, close)
+                last_close = close
+            return tf.transpose(outputs.stack())
+
+        return rollout
+
+    def _inputs(self, windows, tickers) -> Any:
+        return {'window': windows, 'ticker': tickers} if self.embedding_dim else windows
+
+    def dataset(self, scaled: np.ndarray, batch_size: int = 256, shuffle: bool = True, seed: int = 0):
+        """
+        tf.data pipeline over every valid (ticker, end) window of the scaled block.
+        Only the (ticker, end) index is shuffled; windows are gathered per batch from
+        the flat block, so they are never materialized as a whole.
+        """
+        import tensorflow as tf
+        n_tickers, n_times, n_features = scaled.shape
+        valid = ~np.isnan(scaled).any(axis=-1)
+        index = np.concatenate([
+            np.stack([np.full(len(ends), t), ends], axis=1)
+            for t, ends in ((t, _valid_window_ends(valid[t], self.window)) for t in range(n_tickers))
+        ]).astype(np.int64)
+        if len(index) == 0:
+            raise ValueError(f"No ticker has {self.window + 1} consecutive valid observations.")
+
+        flat = tf.constant(np.nan_to_num(scaled).reshape(-1, n_features))
+        offsets = tf.range(-self.window, 0, dtype=tf.int64)
+
+        def gather(batch):
+            tickers, ends = batch[:, 0], batch[:, 1]
+            rows = tickers * n_times + ends
+            windows = tf.gather(flat, rows[:, None] + offsets)
+            target = tf.gather(flat[:, 0], rows)[:, None]
+            return self._inputs(windows, tf.cast(tickers, tf.int32)), target
+
+        ds = tf.data.Dataset.from_tensor_slices(index)
+        if shuffle:
+            ds = ds.shuffle(len(index), seed=seed, reshuffle_each_iteration=True)
+        ds = ds.batch(batch_size).map(gather, num_parallel_calls=tf.data.AUTOTUNE)
+        self.n_windows = len(index)
+        return ds.prefetch(tf.data.AUTOTUNE)
+
+    def train(self, prices: pd.DataFrame, volume: Optional[pd.DataFrame] = None, epochs: int = 10,
+              batch_size: int = 256, seed: int = 0):
+        """
+        Train on every ticker column of an aligned price frame (NaN before listings is fine).
+        volume: per-ticker volumes on the same calendar, needed for the 'volume' feature
+        """
+        import tensorflow as tf
+        tf.random.set_seed(seed)
+        self.tickers = [str(c) for c in prices.columns]
+        logger.info(f"🧠 Training global LSTM on {len(self.tickers)} tickers...")
+
+        with span("model.global_lstm.train", tickers=len(self.tickers), epochs=epochs) as s:
+            raw = self._raw_features(prices, volume, self.tickers)
+            with np.errstate(invalid='ignore'):
+                self.scale_min = np.nanmin(raw, axis=1)
+                self.scale_range = np.nanmax(raw, axis=1) - self.scale_min
+            self.scale_range[~(self.scale_range > 0)] = 1.0
+            self.scale_min = np.nan_to_num(self.scale_min)
+
+            scaled = (raw - self.scale_min[:, None, :]) / self.scale_range[:, None, :]
+            ds = self.dataset(scaled, batch_size=batch_size, seed=seed)
+            self.model = self._build_model()
+            self._rollout_fn = None
+            self.model.fit(ds, epochs=epochs, verbose=0)
+            s.set(rows=self.n_windows * epochs)
+        return self.model
+
+    def forecast(self, prices: pd.DataFrame, steps: int = 30, volume: Optional[pd.DataFrame] = None,
+                 tickers: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Recursive forecast of the next `steps` closes for every ticker in one batch.
+        Returns are re-derived from each predicted close and log volume is held at
+        its last value. Result: DataFrame (steps, tickers) of prices.
+        """
+        if self.model is None:
+            raise ValueError("Model must be trained before prediction.")
+        tickers = list(tickers) if tickers is not None else self.tickers
+        rows = np.array([self.tickers.index(t) for t in tickers])
+
+        history = prices[tickers].iloc[-(self.window + 1):]
+        raw = self._raw_features(history, volume, tickers)
+        scaled = (raw - self.scale_min[rows, None, :]) / self.scale_range[rows, None, :]
+        x = np.ascontiguousarray(scaled[:, -self.window:], dtype=np.float32)
+        if np.isnan(x).any():
+            raise ValueError(f"Every ticker needs {self.window + 1} valid observations to forecast.")
+
+        import tensorflow as tf
+        if self._rollout_fn is None:
+            self._rollout_fn = self._build_rollout()
+        with span("model.global_lstm.forecast", tickers=len(tickers), steps=steps):
+            out = self._rollout_fn(tf.constant(x), tf.constant(rows, dtype=tf.int32),
+                                   tf.constant(self.scale_min[rows], dtype=tf.float32),
+                                   tf.constant(self.scale_range[rows], dtype=tf.float32),
+                                   tf.constant(raw[:, -1, 0]), tf.constant(steps)).numpy()
+
+        dates = pd.bdate_range(prices.index[-1] + pd.Timedelta(days=1), periods=steps)
+        return pd.DataFrame(out.T, index=dates, columns=tickers)
+
+    def get_params(self) -> Dict[str, Any]:
+        return {'window': self.window, 'features': self.features, 'embedding_dim': self.embedding_dim,
+                'units': self.units}
+
+    def save(self, path: str):
+        """Persist the network, scalers and configuration into the directory at path"""
+        if self.model is None:
+            raise ValueError("Model must be trained before saving.")
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({'tickers': self.tickers, 'params': self.get_params()}, f)
+        np.savez(os.path.join(path, "scalers.npz"), min=self.scale_min, range=self.scale_range)
+        self.model.save(os.path.join(path, "model.keras"))
+
+    @classmethod
+    def load(cls, path: str) -> "GlobalLSTMForecaster":
+        import tensorflow as tf
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        instance = cls(**meta['params'])
+        instance.tickers = meta['tickers']
+        scalers = np.load(os.path.join(path, "scalers.npz"))
+        instance.scale_min, instance.scale_range = scalers['min'], scalers['range']
+        instance.model = tf.keras.models.load_model(os.path.join(path, "model.keras"))
+        return instance
@@ -0,0 +1,237 @@
+"""
+Structured timing for the pipeline.
+
+Stages wrap their work in spans, which record wall and CPU time, the change in
+resident memory and counts such as rows and tickers:
+
+    with span("ingest.combine", tickers=len(frames)) as s:
+        ...
+        s.set(rows=len(combined))
+
+Finished spans are kept in memory. They can also be appended to a JSON lines
+file and summarized in Prometheus text format. cProfile and tracemalloc can be
+switched on for stages whose name matches a pattern:
+
+    configure(jsonl_path="data/metrics/spans.jsonl", profile=["model.*.train"], trace_memory=["ingest.*"])
+
+The same settings can come from the GMF_METRICS_PATH, GMF_PROFILE, GMF_TRACE_MEMORY
+and GMF_PROFILE_DIR environment variables (patterns comma separated).
+"""
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from fnmatch import fnmatch
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+import contextvars
+import cProfile
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("gmf_span", default=None)
+
+def _rss_bytes() -> Optional[int]:
+    """Current resident set size, or None where it cannot be read cheaply"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        # Peak rather than current RSS on platforms without /proc (bytes on macOS, KiB elsewhere)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        return None
+
+@dataclass
+class Span:
+    """One timed stage of the pipeline"""
+    name: str
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    parent: Optional[str] = None
+    start: float = 0.0
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    rss_delta_mb: Optional[float] = None
+    py_peak_mb: Optional[float] = None
+    status: str = "ok"
+    error: Optional[str] = None
+
+    def set(self, **attrs):
+        """Attach counts or labels discovered while the span runs"""
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+class Instrumentation:
+    """Collects spans and exports them; one process-wide instance is used via span()"""
+
+    def __init__(self, jsonl_path: Optional[str] = None, profile: Sequence[str] = (),
+                 trace_memory: Sequence[str] = (), profile_dir: str = "data/profiles",
+                 max_spans: int = 10000):
+        """
+        jsonl_path: append every finished span to this file
+        profile: span name patterns to run under cProfile (one .prof file per span)
+        trace_memory: span name patterns whose peak Python allocation is traced
+        max_spans: finished spans kept in memory; aggregates cover all of them
+        """
+        self.jsonl_path = jsonl_path
+        self.profile = list(profile)
+        self.trace_memory = list(trace_memory)
+        self.profile_dir = profile_dir
+        self.spans: deque = deque(maxlen=max_spans)
+        self.totals: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self._profiling = False
+
+    @classmethod
+    def from_env(cls) -> "Instrumentation":
+        def patterns(var):
+            return [p.strip() for p in os.environ.get(var, "").split(",") if p.strip()]
+        return cls(jsonl_path=os.environ.get("GMF_METRICS_PATH") or None, profile=patterns("GMF_PROFILE"),
+                   trace_memory=patterns("GMF_TRACE_MEMORY"),
+                   profile_dir=os.environ.get("GMF_PROFILE_DIR", "data/profiles"))
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Span]:
+        parent = _current_span.get()
+        record = Span(name, dict(attrs), parent=parent.name if parent else None, start=time.time())
+        token = _current_span.set(record)
+
+        profiler = self._start_profiler(name)
+        tracing = any(fnmatch(name, p) for p in self.trace_memory) and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        rss = _rss_bytes()
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield record
+        except BaseException as e:
+            record.status, record.error = "error", f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record.wall_s = time.perf_counter() - wall
+            record.cpu_s = time.thread_time() - cpu
+            rss_after = _rss_bytes()
+            if rss is not None and rss_after is not None:
+                record.rss_delta_mb = (rss_after - rss) / 2**20
+            if tracing:
+                record.py_peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+                tracemalloc.stop()
+            if profiler is not None:
+                self._stop_profiler(profiler, record)
+            _current_span.reset(token)
+            self._record(record)
+
+    def _start_profiler(self, name: str) -> Optional[cProfile.Profile]:
+        # Only one profiler can be active, so spans nested in a profiled span are covered by it
+        if self._profiling or not any(fnmatch(name, p) for p in self.profile):
+            return None
+        self._profiling = True
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def _stop_profiler(self, profiler: cProfile.Profile, record: Span):
+        profiler.disable()
+        self._profiling = False
+        os.makedirs(self.profile_dir, exist_ok=True)
+        path = os.path.join(self.profile_dir, f"{record.name}-{os.getpid()}-{int(record.start * 1000)}.prof")
+        profiler.dump_stats(path)
+        record.set(profile=path)
+
+    def _record(self, record: Span):
+        with self._lock:
+            self.spans.append(record)
+            totals = self.totals.setdefault(record.name, {'calls': 0, 'errors': 0, 'wall_s': 0.0,
+                                                          'cpu_s': 0.0, 'rows': 0, 'last_wall_s': 0.0})
+            totals['calls'] += 1
+            totals['errors'] += record.status != "ok"
+            totals['wall_s'] += record.wall_s
+            totals['cpu_s'] += record.cpu_s
+            totals['rows'] += int(record.attrs.get('rows', 0) or 0)
+            totals['last_wall_s'] = record.wall_s
+            if self.jsonl_path:
+                directory = os.path.dirname(self.jsonl_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.jsonl_path, "a") as f:
+                    f.write(json.dumps(record.to_dict(), default=str) + "\n")
+
+    def find(self, name: str) -> List[Span]:
+        """Recorded spans whose name matches the pattern"""
+        return [s for s in list(self.spans) if fnmatch(s.name, name)]
+
+    def summary(self):
+        """Per-stage totals as a DataFrame, slowest first"""
+        import pandas as pd
+        with self._lock:
+            rows = [{'span': name, **totals} for name, totals in self.totals.items()]
+        columns = ['span', 'calls', 'errors', 'wall_s', 'cpu_s', 'rows', 'last_wall_s']
+        return pd.DataFrame(rows, columns=columns).sort_values('wall_s', ascending=False, ignore_index=True)
+
+    def to_prometheus(self, prefix: str = "gmf") -> str:
+        """Per-stage totals in the Prometheus text exposition format"""
+        metrics = [
+            ('span_calls_total', 'calls', 'counter', "Completed spans"),
+            ('span_errors_total', 'errors', 'counter', "Spans that raised"),
+            ('span_seconds_total', 'wall_s', 'counter', "Wall time spent in spans"),
+            ('span_cpu_seconds_total', 'cpu_s', 'counter', "CPU time of the span's thread"),
+            ('span_rows_total', 'rows', 'counter', "Rows processed by spans"),
+            ('span_last_seconds', 'last_wall_s', 'gauge', "Wall time of the latest span"),
+        ]
+        with self._lock:
+            totals = {name: dict(values) for name, values in self.totals.items()}
+        lines = []
+        for metric, key, kind, help_text in metrics:
+            lines.append(f"# HELP {prefix}_{metric} {help_text}")
+            lines.append(f"# TYPE {prefix}_{metric} {kind}")
+            for name in sorted(totals):
+                label = name.replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'{prefix}_{metric}{{span="{label}"}} {totals[name][key]:g}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Write to_prometheus() atomically, e.g. for a node_exporter textfile collector"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path + ".tmp", "w") as f:
+            f.write(self.to_prometheus())
+        os.replace(path + ".tmp", path)
+
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self.totals.clear()
+
+_instrumentation = Instrumentation.from_env()
+
+def get_instrumentation() -> Instrumentation:
+    return _instrumentation
+
+def configure(**kwargs) -> Instrumentation:
+    """Replace the process-wide instrumentation; arguments as for Instrumentation"""
+    global _instrumentation
+    _instrumentation = Instrumentation(**kwargs)
+    return _instrumentation
+
+def span(name: str, **attrs):
+    """Time a stage with the process-wide instrumentation"""
+    return _instrumentation.span(name, **attrs)
+
+def configure_logging(level: int = logging.INFO):
+    """Print the pipeline's progress messages (the `src` loggers) to stdout"""
+    logger = logging.getLogger("src")
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    logger.setLevel(level)
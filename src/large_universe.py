@@ -0,0 +1,218 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import pandas as pd
+import numpy as np
+from src.estimators import TRADING_DAYS
+
+@dataclass
+class FactorCovariance:
+    """
+    Low-rank plus diagonal covariance: S = B F B^T + diag(D).
+    Storage and products cost O(N K) instead of O(N^2), and the estimate stays
+    well conditioned when the number of assets exceeds the history length.
+    """
+    tickers: List[str]
+    loadings: np.ndarray       # B, (N, K)
+    factor_cov: np.ndarray     # F, (K, K)
+    specific_var: np.ndarray   # D, (N,)
+
+    @classmethod
+    def from_returns(cls, returns: pd.DataFrame, n_factors: int = 10,
+                     frequency: int = TRADING_DAYS) -> "FactorCovariance":
+        """
+        Statistical (PCA) factor model from a returns frame. The leading principal
+        components become factors and the remaining variance is treated as specific risk.
+        """
+        X = returns.to_numpy(dtype=np.float64)
+        X = X - X.mean(axis=0)
+        T = len(X)
+        n_factors = min(n_factors, min(X.shape) - 1)
+
+        _, singular, vt = np.linalg.svd(X, full_matrices=False)
+        loadings = vt[:n_factors].T
+        factor_var = singular[:n_factors] ** 2 / (T - 1)
+        total_var = (X ** 2).sum(axis=0) / (T - 1)
+        # Floor the residual so every asset keeps some idiosyncratic risk
+        specific = np.maximum(total_var - (loadings ** 2) @ factor_var, 1e-4 * total_var.mean())
+
+        return cls(list(returns.columns), loadings, np.diag(factor_var) * frequency, specific * frequency)
+
+    @classmethod
+    def from_prices(cls, prices: pd.DataFrame, n_factors: int = 10,
+                    frequency: int = TRADING_DAYS) -> "FactorCovariance":
+        return cls.from_returns(prices.pct_change().dropna(how='all').fillna(0.0), n_factors, frequency)
+
+    @classmethod
+    def from_covariance(cls, S: pd.DataFrame, n_factors: int = 10) -> "FactorCovariance":
+        """
+        Factor model of an already annualised covariance matrix, e.g. a moment
+        estimator's. Its leading eigenvectors become factors, the rest specific risk.
+        """
+        dense = S.to_numpy(dtype=np.float64)
+        n_factors = min(n_factors, len(dense) - 1)
+        eigenvalues, eigenvectors = np.linalg.eigh(dense)
+        top = np.argsort(eigenvalues)[::-1][:n_factors]
+        loadings = eigenvectors[:, top]
+        factor_var = np.maximum(eigenvalues[top], 0.0)
+        total_var = np.diag(dense)
+        specific = np.maximum(total_var - (loadings ** 2) @ factor_var, 1e-4 * total_var.mean())
+        return cls(list(S.columns), loadings, np.diag(factor_var), specific)
+
+    def matvec(self, w: np.ndarray) -> np.ndarray:
+        """S @ w for a (N,) vector or a (N, M) block, in O(N K)"""
+        if w.ndim == 1:
+            return self.loadings @ (self.factor_cov @ (self.loadings.T @ w)) + self.specific_var * w
+        return self.loadings @ (self.factor_cov @ (self.loadings.T @ w)) + self.specific_var[:, None] * w
+
+    def variance(self, weights: np.ndarray) -> np.ndarray:
+        """Portfolio variance for one (N,) or many (M, N) weight vectors"""
+        W = np.atleast_2d(weights)
+        exposures = W @ self.loadings
+        variances = np.einsum('mk,kl,ml->m', exposures, self.factor_cov, exposures) + (W ** 2) @ self.specific_var
+        return variances[0] if np.ndim(weights) == 1 else variances
+
+    def max_eigenvalue(self, iterations: int = 100) -> float:
+        """Largest eigenvalue by power iteration, using only factor-structured products"""
+        v = np.random.default_rng(0).normal(size=len(self.tickers))
+        v /= np.linalg.norm(v)
+        value = 0.0
+        for _ in range(iterations):
+            Sv = self.matvec(v)
+            value_new = float(v @ Sv)
+            v = Sv / np.linalg.norm(Sv)
+            if abs(value_new - value) <= 1e-10 * abs(value_new):
+                break
+            value = value_new
+        return value_new
+
+    def to_dense(self) -> pd.DataFrame:
+        dense = self.loadings @ self.factor_cov @ self.loadings.T + np.diag(self.specific_var)
+        return pd.DataFrame(dense, index=self.tickers, columns=self.tickers)
+
+def _bracketed_newton(fn, lo: float, hi: float, x: float, max_iter: int = 100) -> float:
+    """
+    Root of a non-increasing piecewise-linear function given as fn(x) -> (value, -slope).
+    Newton steps are exact between breakpoints; a bisection fallback keeps x inside [lo, hi].
+    """
+    x = min(max(x, lo), hi)
+    for _ in range(max_iter):
+        value, slope = fn(x)
+        if abs(value) < 1e-13:
+            return x
+        if value > 0:
+            lo = x
+        else:
+            hi = x
+        step = x + value / slope if slope > 0 else None
+        x = step if step is not None and lo < step < hi else 0.5 * (lo + hi)
+    return x
+
+class FactorPortfolioOptimizer:
+    """
+    Mean-variance optimizer for large universes on a FactorCovariance.
+    Solves  min  (risk_aversion / 2) w^T S w - mu^T w
+            s.t. sum(w) = 1, lower <= w <= upper, sector_lo <= sum_{i in s} w_i <= sector_hi
+    with accelerated projected gradient (FISTA). Gradients use the factor structure
+    (O(N K)) and the projection onto the constraint set reduces to a few
+    one-dimensional root finds.
+    With mu=None the problem is the minimum-variance portfolio.
+    """
+
+    def __init__(self, cov: FactorCovariance, mu: Optional[Union[pd.Series, np.ndarray]] = None,
+                 weight_bounds: Tuple[float, float] = (0, 1), sectors: Optional[Sequence[str]] = None,
+                 sector_bounds: Optional[Dict[str, Tuple[float, float]]] = None, risk_aversion: float = 1.0,
+                 max_iter: int = 5000, tol: float = 1e-9):
+        """
+        sectors: sector label per asset (same order as cov.tickers)
+        sector_bounds: {sector: (min_weight, max_weight)}; unlisted sectors are unconstrained
+        """
+        n = len(cov.tickers)
+        self.cov = cov
+        self.mu = np.zeros(n) if mu is None else np.asarray(mu, dtype=np.float64)
+        self.lower, self.upper = float(weight_bounds[0]), float(weight_bounds[1])
+        self.risk_aversion = risk_aversion
+        self.max_iter = max_iter
+        self.tol = tol
+        self.iterations = 0
+        self._lam = 0.0
+
+        if self.lower * n > 1 or self.upper * n < 1:
+            raise ValueError("Weight bounds make a fully invested portfolio infeasible.")
+
+        if sectors is None:
+            self._sector_idx = np.zeros(n, dtype=int)
+            self._sector_lo, self._sector_hi = np.array([-np.inf]), np.array([np.inf])
+        else:
+            labels, self._sector_idx = np.unique(np.asarray(sectors), return_inverse=True)
+            bounds = sector_bounds or {}
+            self._sector_lo = np.array([bounds.get(s, (-np.inf, np.inf))[0] for s in labels], dtype=float)
+            self._sector_hi = np.array([bounds.get(s, (-np.inf, np.inf))[1] for s in labels], dtype=float)
+        self._n_sectors = len(self._sector_lo)
+
+    def _sector_sums(self, w: np.ndarray) -> np.ndarray:
+        return np.bincount(self._sector_idx, weights=w, minlength=self._n_sectors)
+
+    def project(self, v: np.ndarray, max_iter: int = 100) -> np.ndarray:
+        """
+        Euclidean projection onto the constraint set.
+        For a budget multiplier lam each sector's constrained sum is just its box-clipped sum
+        clipped to the sector bounds, so lam solves a one-dimensional piecewise-linear
+        equation; the per-sector multipliers then solve one such equation per sector.
+        Both use bracketed Newton steps, warm-started from the previous projection.
+        """
+        def budget(lam):
+            clipped = np.clip(v - lam, self.lower, self.upper)
+            free = (v - lam > self.lower) & (v - lam < self.upper)
+            sums = self._sector_sums(clipped)
+            inside = (sums > self._sector_lo) & (sums < self._sector_hi)
+            total = np.clip(sums, self._sector_lo, self._sector_hi).sum()
+            slope = np.bincount(self._sector_idx, weights=free, minlength=self._n_sectors)[inside].sum()
+            return total - 1, slope
+
+        span = self.upper - self.lower
+        lam = _bracketed_newton(budget, v.min() - span - 1, v.max() + span + 1, self._lam, max_iter)
+        self._lam = lam
+        u = v - lam
+
+        free_sums = self._sector_sums(np.clip(u, self.lower, self.upper))
+        targets = np.clip(free_sums, self._sector_lo, self._sector_hi)
+        violated = np.flatnonzero(free_sums != targets)
+        shift = np.zeros(self._n_sectors)
+        for s in violated:
+            members = u[self._sector_idx == s]
+
+            def sector_gap(mu, members=members, target=targets[s]):
+                clipped = np.clip(members - mu, self.lower, self.upper)
+                free = (members - mu > self.lower) & (members - mu < self.upper)
+                return clipped.sum() - target, free.sum()
+
+            shift[s] = _bracketed_newton(sector_gap, -span - 1, span + 1, 0.0, max_iter)
+        return np.clip(u - shift[self._sector_idx], self.lower, self.upper)
+
+    def objective(self, w: np.ndarray) -> float:
+        return 0.5 * self.risk_aversion * float(self.cov.variance(w)) - float(self.mu @ w)
+
+    def solve(self, initial: Optional[np.ndarray] = None) -> np.ndarray:
+        """Run FISTA from initial (equal weight by default) and return the weight vector"""
+        n = len(self.cov.tickers)
+        step = 1.0 / (self.risk_aversion * self.cov.max_eigenvalue() * 1.01)
+        w = self.project(np.full(n, 1.0 / n) if initial is None else np.asarray(initial, dtype=float))
+        y, t = w.copy(), 1.0
+
+        for k in range(1, self.max_iter + 1):
+            gradient = self.risk_aversion * self.cov.matvec(y) - self.mu
+            w_next = self.project(y - step * gradient)
+            if (y - w_next) @ (w_next - w) > 0:
+                # Gradient-based adaptive restart of the momentum (O'Donoghue & Candes)
+                t = 1.0
+            t_next = 0.5 * (1 + np.sqrt(1 + 4 * t * t))
+            y = w_next + ((t - 1) / t_next) * (w_next - w)
+            change = np.linalg.norm(w_next - w)
+            w, t = w_next, t_next
+            if change < self.tol:
+                break
+        self.iterations = k
+        return w
+
+    def optimize(self, initial: Optional[np.ndarray] = None) -> Dict[str, float]:
+        return dict(zip(self.cov.tickers, self.solve(initial)))
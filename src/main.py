@@ -1,4 +1,6 @@
 from src.data_processing import DataIngestion, ProjectConfig
+from typing import Optional
+import argparse
 import sys
 import os
 
@@ -22,7 +24,84 @@ def run_pipeline():
     print("-" * 50)
     print("🎯 Phase 1 (Ingestion) Complete.")
 
+def run_training(model_types=('arima', 'lstm'), lstm_workers: int = 1):
+    """Train models for every configured ticker and store them in the model store"""
+    from src.model_store import ModelStore
+    from src.training import TrainingOrchestrator, summarize
+
+    print("🏋️ Batch Training Starting")
+    print("-" * 50)
+
+    config = ProjectConfig()
+    ingestion = DataIngestion(config)
+    if not ingestion.store.exists():
+        print("❌ No processed data found. Run ingestion first.")
+        sys.exit(1)
+
+    prices = ingestion.load_processed(config.TICKERS)
+    store = ModelStore(config.MODEL_STORE_DIR, config.MODEL_STORE_MAX_MB * 1024 * 1024)
+    orchestrator = TrainingOrchestrator(store, lstm_workers=lstm_workers)
+    report = summarize(orchestrator.run(prices, model_types))
+
+    print(report.to_string(index=False))
+    print("-" * 50)
+    failures = report['error'].notna().sum()
+    print(f"🎯 Training Complete: {len(report) - failures} succeeded, {failures} failed.")
+
+def run_streaming(path: str, poll_interval: float = 1.0, forecast: bool = True,
+                  config: Optional[ProjectConfig] = None):
+    """
+    Follow a CSV of live bars, keeping the store, metrics and ARIMA forecasts current
+    config: resolved configuration (e.g. with CLI overrides); defaults to ProjectConfig()
+    """
+    import asyncio
+    from src.model_store import ModelStore
+    from src.streaming import FileTailSource, StreamingPipeline
+
+    print(f"📡 Streaming bars from {path}")
+    print("-" * 50)
+
+    config = config or ProjectConfig()
+    ingestion = DataIngestion(config)
+    if not ingestion.store.exists():
+        print("❌ No processed data found. Run ingestion first.")
+        sys.exit(1)
+
+    history = ingestion.load_processed(config.TICKERS)
+    forecasters = {}
+    if forecast:
+        store = ModelStore(config.MODEL_STORE_DIR, config.MODEL_STORE_MAX_MB * 1024 * 1024)
+        forecasters = {t: store.load_or_train('arima', t, history[t].dropna()) for t in config.TICKERS}
+
+    os.makedirs(os.path.dirname(config.STREAM_SNAPSHOT_PATH), exist_ok=True)
+    pipeline = StreamingPipeline(FileTailSource(path, poll_interval), history, store=ingestion.store,
+                                 forecasters=forecasters, snapshot_path=config.STREAM_SNAPSHOT_PATH)
+    pipeline.add_listener(lambda snap: print(f"📈 {snap['timestamp']}: " + ", ".join(
+        f"{t} ${card['price']:.2f} ({card['change_pct']:+.2f}%)" for t, card in snap['cards'].items())))
+    try:
+        asyncio.run(pipeline.run())
+    except KeyboardInterrupt:
+        pass
+    print("-" * 50)
+    print(f"🎯 Streaming stopped after {pipeline.stats['bars']} bars.")
+
 if __name__ == "__main__":
     # Adjust path to ensure local imports work during development
     sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-    run_pipeline()
+    from src.instrumentation import configure_logging
+    configure_logging()
+
+    parser = argparse.ArgumentParser(description="GMF portfolio pipeline")
+    parser.add_argument("--train", nargs="*", choices=['arima', 'lstm'],
+                        help="train models for all tickers instead of ingesting (default: both types)")
+    parser.add_argument("--lstm-workers", type=int, default=1, help="concurrent LSTM training processes")
+    parser.add_argument("--stream", metavar="CSV", help="follow a CSV of live bars (date + one column per ticker)")
+    parser.add_argument("--no-forecast", action="store_true", help="skip model forecasts while streaming")
+    args = parser.parse_args()
+
+    if args.stream:
+        run_streaming(args.stream, forecast=not args.no_forecast)
+    elif args.train is not None:
+        run_training(args.train or ('arima', 'lstm'), args.lstm_workers)
+    else:
+        run_pipeline()
@@ -0,0 +1,191 @@
+from typing import Dict, Any, Iterator, Optional
+import hashlib
+import inspect
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+from src.models import TimeSeriesModel, MODEL_TYPES
+from src.storage import data_fingerprint
+
+logger = logging.getLogger(__name__)
+
+def _defaults(fn) -> Dict[str, Any]:
+    return {name: p.default for name, p in inspect.signature(fn).parameters.items()
+            if p.default is not inspect.Parameter.empty}
+
+# train() keyword arguments each model type is fitted with unless overridden. Keys are
+# derived from these merged with the overrides, so every entry point (train, forecast,
+# the snapshot worker, pipeline runs) addresses the same stored model for the same fit.
+DEFAULT_TRAIN_PARAMS: Dict[str, Dict[str, Any]] = {kind: _defaults(cls.train) for kind, cls in MODEL_TYPES.items()}
+
+def _directory_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total
+
+class ModelStore:
+    """
+    Local on-disk registry of fitted models.
+    Entries are keyed by ticker, model type, hyperparameters and a hash of the
+    training data, and evicted least-recently-used once the store exceeds max_bytes.
+    Index updates hold a lock file, so CLI runs, pool workers and the snapshot
+    worker can share one store.
+    """
+    INDEX_FILE = "index.json"
+    LOCK_FILE = "index.lock"
+
+    def __init__(self, root: str = "data/models", max_bytes: int = 512 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def make_key(ticker: str, model_type: str, params: Dict[str, Any], data_hash: str) -> str:
+        """Derive the content key for a model configuration"""
+        payload = json.dumps({'ticker': ticker, 'model_type': model_type, 'params': params,
+                              'data': data_hash}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+    def key_for(self, model_type: str, ticker: str, data,
+                model_params: Optional[Dict[str, Any]] = None,
+                train_params: Optional[Dict[str, Any]] = None) -> str:
+        """Key under which a model trained on data with these parameters is stored"""
+        train = {**DEFAULT_TRAIN_PARAMS.get(model_type, {}), **(train_params or {})}
+        params = {'model': model_params or {}, 'train': train}
+        return self.make_key(ticker, model_type, params, data_fingerprint(data))
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Exclusive access to the index across threads and processes for a read-modify-write"""
+        with self._lock, open(os.path.join(self.root, self.LOCK_FILE), "a+") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            else:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            # Closing the file releases the lock
+            yield
+
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        path = os.path.join(self.root, self.INDEX_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_index(self, index: Dict[str, Dict[str, Any]]):
+        path = os.path.join(self.root, self.INDEX_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump(index, f, indent=1)
+        os.replace(path + ".tmp", path)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._read_index()
+
+    def get(self, key: str) -> Optional[TimeSeriesModel]:
+        """Load a stored model and mark it as recently used, or return None"""
+        with self._locked():
+            index = self._read_index()
+            entry = index.get(key)
+            if entry is None:
+                return None
+            entry['last_access'] = time.time()
+            self._write_index(index)
+
+        try:
+            return MODEL_TYPES[entry['model_type']].load(self.entry_path(key))
+        except FileNotFoundError:
+            # Evicted by another process between the index update and the load
+            logger.warning(f"⚠️  Model {key} was evicted while loading; treating it as a miss")
+            return None
+
+    def entry_path(self, key: str) -> str:
+        """Directory where the model for key is (or will be) saved"""
+        return os.path.join(self.root, key)
+
+    def staging_path(self, key: str) -> str:
+        """Fresh sibling of entry_path(key) to save into before register() publishes it"""
+        return f"{self.entry_path(key)}.staging-{uuid.uuid4().hex}"
+
+    def put(self, key: str, model: TimeSeriesModel, model_type: str):
+        """Save a fitted model under key and evict old entries if over budget"""
+        staged = self.staging_path(key)
+        try:
+            model.save(staged)
+        except BaseException:
+            shutil.rmtree(staged, ignore_errors=True)
+            raise
+        self.register(key, model.ticker, model_type, staged=staged)
+
+    def _publish(self, index: Dict[str, Dict[str, Any]], key: str, staged: str):
+        """Move a completely saved model into entry_path(key), so readers never see a partial one"""
+        target = self.entry_path(key)
+        if key in index and os.path.isdir(target):
+            # Another writer published this key first; equal keys mean the same data and parameters
+            shutil.rmtree(staged, ignore_errors=True)
+            return
+        # Anything at an unindexed entry path is left over from an interrupted write
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(staged, target)
+
+    def register(self, key: str, ticker: str, model_type: str, staged: Optional[str] = None):
+        """
+        Record a saved model, e.g. one fitted by a worker process, and evict old entries
+        if over budget. staged: directory from staging_path(key) that is moved into
+        place under the index lock; without it the model must already be at entry_path(key).
+        """
+        with self._locked():
+            index = self._read_index()
+            if staged is not None:
+                self._publish(index, key, staged)
+            index[key] = {
+                'ticker': ticker,
+                'model_type': model_type,
+                'size': _directory_size(self.entry_path(key)),
+                'last_access': time.time(),
+            }
+            self._evict(index, keep=key)
+            self._write_index(index)
+
+    def _evict(self, index: Dict[str, Dict[str, Any]], keep: str):
+        """Drop least-recently-used entries until the store fits in max_bytes"""
+        total = sum(entry['size'] for entry in index.values())
+        for key in sorted(index, key=lambda k: index[k]['last_access']):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= index.pop(key)['size']
+            shutil.rmtree(self.entry_path(key), ignore_errors=True)
+
+    def load_or_train(self, model_type: str, ticker: str, data,
+                      model_params: Optional[Dict[str, Any]] = None,
+                      train_params: Optional[Dict[str, Any]] = None) -> TimeSeriesModel:
+        """
+        Serve a fitted model from the store, training and saving it only when
+        no entry exists for this data and configuration
+        """
+        model_params = model_params or {}
+        train_params = train_params or {}
+        key = self.key_for(model_type, ticker, data, model_params, train_params)
+
+        cached = self.get(key)
+        if cached is not None:
+            logger.info(f"♻️  Loaded cached {model_type} model for {ticker}")
+            return cached
+
+        model = MODEL_TYPES[model_type](ticker, **model_params)
+        model.train(data, **train_params)
+        self.put(key, model, model_type)
+        return model
@@ -1,12 +1,20 @@
-from typing import Tuple, Dict, Any, Optional
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Tuple, Dict, Any, List, Optional, Sequence
 import pandas as pd
 import numpy as np
-from statsmodels.tsa.arima.model import ARIMA
-from sklearn.preprocessing import MinMaxScaler
-import tensorflow as tf
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout
+from src.windows import sliding_windows, last_windows, to_model_input
+from src.instrumentation import span
+import json
+import logging
+import multiprocessing
 import os
+import pickle
+import warnings
+
+logger = logging.getLogger(__name__)
+
+# statsmodels, scikit-learn and TensorFlow are imported inside the methods that use
+# them, so importing this module (e.g. for MODEL_TYPES) stays cheap
 
 class TimeSeriesModel:
     """Base class for time series forecasting models"""
@@ -20,72 +28,308 @@ class TimeSeriesModel:
     def predict(self, steps: int) -> np.ndarray:
         raise NotImplementedError
 
+    def get_params(self) -> Dict[str, Any]:
+        """Constructor arguments needed to rebuild this model"""
+        return {}
+
+    def save(self, path: str):
+        """Persist the fitted model into the directory at path"""
+        if self.model is None:
+            raise ValueError("Model must be trained before saving.")
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({'ticker': self.ticker, 'params': self.get_params()}, f)
+        self._save_model(path)
+
+    @classmethod
+    def load(cls, path: str) -> "TimeSeriesModel":
+        """Rebuild a fitted model previously written with save"""
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        instance = cls(meta['ticker'], **meta['params'])
+        instance._load_model(path)
+        return instance
+
+    def _save_model(self, path: str):
+        raise NotImplementedError
+
+    def _load_model(self, path: str):
+        raise NotImplementedError
+
+def _positional(data: pd.Series) -> pd.Series:
+    """
+    Trading-day indexes have no fixed frequency, which statsmodels ignores for
+    forecasting and refuses to extend. Fit on a positional index instead so the
+    results can be appended to.
+    """
+    if isinstance(data.index, pd.DatetimeIndex) and data.index.freq is None:
+        return data.reset_index(drop=True)
+    return data
+
+def _information_criterion(values: np.ndarray, order: Tuple[int, int, int], criterion: str) -> float:
+    """Fit one candidate order and return its information criterion (inf if the fit fails)"""
+    from statsmodels.tsa.arima.model import ARIMA
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        try:
+            return float(getattr(ARIMA(values, order=order).fit(), criterion))
+        except Exception:
+            return np.inf
+
 class ARIMAModel(TimeSeriesModel):
     """ARIMA Model implementation for financial forecasting"""
     
-    def train(self, data: pd.Series, order: Tuple[int, int, int] = (5, 1, 0)):
-        """Train ARIMA model on the provided series"""
-        print(f"📉 Training ARIMA for {self.ticker}...")
-        self.model = ARIMA(data, order=order).fit()
+    def train(self, data: pd.Series, order: Tuple[int, int, int] = (5, 1, 0),
+              start_params: Optional[np.ndarray] = None):
+        """
+        Train ARIMA model on the provided series.
+        start_params warm-starts the optimizer, e.g. from yesterday's fit.
+        """
+        from statsmodels.tsa.arima.model import ARIMA
+        logger.info(f"📉 Training ARIMA for {self.ticker}...")
+        with span("model.arima.train", ticker=self.ticker, rows=len(data), order=str(order)):
+            self.model = ARIMA(_positional(data), order=order).fit(start_params=start_params)
         return self.model
 
+    def update(self, new_data: pd.Series, refit: bool = False):
+        """
+        Append new observations to the fitted model without refitting from scratch.
+        With refit=False the parameters are kept and only the state is filtered forward;
+        with refit=True they are re-estimated, warm-started from the current values.
+        """
+        if self.model is None:
+            raise ValueError("Model must be trained before it can be updated.")
+        fit_kwargs = {'start_params': self.model.params} if refit else None
+        with span("model.arima.update", ticker=self.ticker, rows=len(new_data), refit=refit):
+            self.model = self.model.append(np.asarray(new_data, dtype=float), refit=refit, fit_kwargs=fit_kwargs)
+        return self.model
+
+    @staticmethod
+    def select_differencing(data: pd.Series, max_d: int = 2, alpha: float = 0.05) -> int:
+        """Smallest d for which the differenced series rejects a unit root (ADF test)"""
+        from statsmodels.tsa.stattools import adfuller
+        values = np.asarray(data, dtype=float)
+        for d in range(max_d + 1):
+            if adfuller(values, autolag='AIC')[1] < alpha:
+                return d
+            values = np.diff(values)
+        return max_d
+
+    def search_order(self, data: pd.Series, p_values: Sequence[int] = range(0, 4),
+                     q_values: Sequence[int] = range(0, 3), d: Optional[int] = None,
+                     criterion: str = 'aic', patience: int = 1, n_jobs: Optional[int] = None,
+                     executor: Optional[Executor] = None) -> Tuple[int, int, int]:
+        """
+        Select (p, d, q) by information criterion and fit the winning order.
+        d is chosen with an ADF test unless given. Candidates are evaluated in parallel,
+        grouped by complexity p + q; the search stops once `patience` consecutive
+        complexity levels fail to improve the best criterion. Pass a shared executor
+        to reuse one worker pool across many tickers.
+        """
+        if d is None:
+            d = self.select_differencing(data)
+        values = np.asarray(data, dtype=float)
+
+        levels: Dict[int, List[Tuple[int, int, int]]] = {}
+        for p in p_values:
+            for q in q_values:
+                levels.setdefault(p + q, []).append((p, d, q))
+
+        owns_executor = executor is None and n_jobs != 1
+        if owns_executor:
+            executor = ProcessPoolExecutor(max_workers=n_jobs, mp_context=multiprocessing.get_context("spawn"))
+
+        with span("model.arima.search", ticker=self.ticker, rows=len(values), d=d) as s:
+            self.search_results: Dict[Tuple[int, int, int], float] = {}
+            best_order, best_score, stale = None, np.inf, 0
+            try:
+                for complexity in sorted(levels):
+                    orders = levels[complexity]
+                    if executor is None:
+                        scores = [_information_criterion(values, order, criterion) for order in orders]
+                    else:
+                        scores = list(executor.map(_information_criterion, [values] * len(orders), orders,
+                                                   [criterion] * len(orders)))
+                    self.search_results.update(zip(orders, scores))
+
+                    level_score = min(scores)
+                    if level_score < best_score:
+                        best_order, best_score, stale = orders[int(np.argmin(scores))], level_score, 0
+                    else:
+                        stale += 1
+                        if stale >= patience:
+                            break
+            finally:
+                if owns_executor:
+                    executor.shutdown()
+            s.set(candidates=len(self.search_results))
+
+        if best_order is None:
+            raise ValueError(f"No ARIMA order could be fitted for {self.ticker}.")
+        logger.info(f"🔎 Selected ARIMA{best_order} for {self.ticker} ({criterion.upper()}={best_score:.1f})")
+        self.train(data, order=best_order)
+        return best_order
+
+    def _save_model(self, path: str):
+        self.model.save(os.path.join(path, "arima.pkl"))
+
+    def _load_model(self, path: str):
+        from statsmodels.tsa.arima.model import ARIMAResults
+        self.model = ARIMAResults.load(os.path.join(path, "arima.pkl"))
+
     def predict(self, steps: int) -> np.ndarray:
         """Forecast future values"""
         if self.model is None:
             raise ValueError("Model must be trained before prediction.")
-        return self.model.forecast(steps=steps)
+        with span("model.arima.predict", ticker=self.ticker, steps=steps):
+            return self.model.forecast(steps=steps)
 
 class LSTMForecaster(TimeSeriesModel):
     """LSTM Deep Learning implementation for forecasting"""
     
-    def __init__(self, ticker: str):
+    def __init__(self, ticker: str, window: int = 60, horizon: int = 1):
+        """
+        window: number of past observations fed to the network
+        horizon: outputs per forward pass; values > 1 add a direct multi-horizon head
+        """
+        from sklearn.preprocessing import MinMaxScaler
         super().__init__(ticker)
+        self.window = window
+        self.horizon = horizon
+        self.n_features = 1
         self.scaler = MinMaxScaler(feature_range=(0, 1))
+        self._rollout_fn = None
+
+    def get_params(self) -> Dict[str, Any]:
+        return {'window': self.window, 'horizon': self.horizon}
+
+    def _save_model(self, path: str):
+        self.model.save(os.path.join(path, "model.keras"))
+        with open(os.path.join(path, "scaler.pkl"), "wb") as f:
+            pickle.dump({'scaler': self.scaler, 'n_features': self.n_features}, f)
+
+    def _load_model(self, path: str):
+        import tensorflow as tf
+        self.model = tf.keras.models.load_model(os.path.join(path, "model.keras"))
+        with open(os.path.join(path, "scaler.pkl"), "rb") as f:
+            state = pickle.load(f)
+        self.scaler, self.n_features = state['scaler'], state['n_features']
+        self._rollout_fn = None
+
+    def _prepare_sequences(self, data: np.ndarray, window: Optional[int] = None):
+        """
+        Build sequences for LSTM input.
+        Returns X as a zero-copy view of shape (samples, window, features) and the
+        next horizon targets from the first column.
+        """
+        return sliding_windows(data, window or self.window, horizon=self.horizon)
 
-    def _prepare_sequences(self, data: np.ndarray, window: int = 60):
-        """Build sequences for LSTM input"""
-        X, y = [], []
-        for i in range(window, len(data)):
-            X.append(data[i-window:i, 0])
-            y.append(data[i, 0])
-        return np.array(X), np.array(y)
-
-    def train(self, data: pd.Series, epochs: int = 10, batch_size: int = 32):
-        """Train LSTM model on historical prices"""
-        print(f"🧠 Training LSTM for {self.ticker}...")
+    def _inverse_target(self, scaled: np.ndarray) -> np.ndarray:
+        """Undo MinMax scaling for the target (first) column only"""
+        return (np.asarray(scaled) - self.scaler.min_[0]) / self.scaler.scale_[0]
+
+    def train(self, data, epochs: int = 10, batch_size: int = 32):
+        """
+        Train LSTM model on historical prices.
+        data can be a Series (close prices) or a DataFrame whose first column is
+        the forecast target and remaining columns are extra input features.
+        """
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import LSTM, Dense, Dropout
+        logger.info(f"🧠 Training LSTM for {self.ticker}...")
         
         # Scale data
-        scaled_data = self.scaler.fit_transform(data.values.reshape(-1, 1))
-        X, y = self._prepare_sequences(scaled_data)
-        X = np.reshape(X, (X.shape[0], X.shape[1], 1))
+        values = data.values.reshape(-1, 1) if isinstance(data, pd.Series) else data.values
+        self.n_features = values.shape[1]
+        scaled_data = self.scaler.fit_transform(values)
+        with span("model.lstm.sequences", ticker=self.ticker, rows=len(values), window=self.window):
+            X, y = self._prepare_sequences(scaled_data)
+            X, y = to_model_input(X), y.astype(np.float32)
 
         # Build Model
         model = Sequential([
-            LSTM(units=50, return_sequences=True, input_shape=(X.shape[1], 1)),
+            LSTM(units=50, return_sequences=True, input_shape=(self.window, self.n_features)),
             Dropout(0.2),
             LSTM(units=50, return_sequences=False),
             Dropout(0.2),
             Dense(units=25),
-            Dense(units=1)
+            Dense(units=self.horizon)
         ])
         
         model.compile(optimizer='adam', loss='mean_squared_error')
-        model.fit(X, y, batch_size=batch_size, epochs=epochs, verbose=0)
+        with span("model.lstm.train", ticker=self.ticker, rows=len(X), epochs=epochs, batch_size=batch_size):
+            model.fit(X, y, batch_size=batch_size, epochs=epochs, verbose=0)
         self.model = model
+        self._rollout_fn = None
         return self.model
 
-    def predict(self, last_sequence: np.ndarray, steps: int = 30) -> np.ndarray:
-        """Forecast using sliding window approach"""
+    def _build_rollout(self):
+        """
+        Compile the recursive rollout into a single graph.
+        Each iteration calls the model directly (no Keras predict dispatch), emits
+        `horizon` scaled values per sequence and slides them into the window.
+        """
+        import tensorflow as tf
+        model, window = self.model, self.window
+
+        @tf.function(reduce_retracing=True)
+        def rollout(x, iterations):
+            outputs = tf.TensorArray(tf.float32, size=iterations)
+            for i in tf.range(iterations):
+                pred = model(x, training=False)
+                outputs = outputs.write(i, pred)
+                x = tf.concat([x, pred[:, :, None]], axis=1)[:, -window:, :]
+            # (iterations, batch, horizon) -> (batch, iterations * horizon)
+            stacked = tf.transpose(outputs.stack(), [1, 0, 2])
+            return tf.reshape(stacked, [tf.shape(x)[0], -1])
+
+        return rollout
+
+    def forecast_batch(self, sequences: np.ndarray, steps: int = 30) -> np.ndarray:
+        """
+        Forecast many scaled input windows at once, e.g. several start dates or scenarios.
+        sequences: (batch, window) or (batch, window, features), already scaled
+        Returns prices of shape (batch, steps).
+        """
         if self.model is None:
             raise ValueError("Model must be trained before prediction.")
-            
-        current_seq = last_sequence.copy()
-        predictions = []
-        
-        for _ in range(steps):
-            pred = self.model.predict(current_seq.reshape(1, -1, 1), verbose=0)
-            predictions.append(pred[0, 0])
-            # Slide window
-            current_seq = np.append(current_seq[1:], pred)
-            
-        return self.scaler.inverse_transform(np.array(predictions).reshape(-1, 1)).flatten()
+
+        x = np.asarray(sequences, dtype=np.float32)
+        if x.ndim == 2:
+            x = x[:, :, None]
+        iterations = -(-steps // self.horizon)
+
+        if iterations > 1 and self.n_features != 1:
+            raise ValueError("Recursive forecasting is only supported for single-feature models; "
+                             "use a direct head with horizon >= steps instead.")
+
+        import tensorflow as tf
+        with span("model.lstm.forecast", ticker=self.ticker, rows=len(x), steps=steps):
+            if iterations == 1:
+                # The direct head covers the whole horizon in one forward pass
+                scaled = self.model(x, training=False).numpy()
+            else:
+                if self._rollout_fn is None:
+                    self._rollout_fn = self._build_rollout()
+                scaled = self._rollout_fn(tf.constant(x), tf.constant(iterations)).numpy()
+
+        return self._inverse_target(scaled[:, :steps])
+
+    def forecast_from_history(self, data, ends: np.ndarray, steps: int = 30) -> np.ndarray:
+        """
+        Forecast from several positions in a price history in one batched call.
+        ends: indices into data; each forecast uses the window ending right before it.
+        """
+        values = data.values.reshape(-1, 1) if isinstance(data, pd.Series) else np.asarray(data)
+        scaled = self.scaler.transform(values)
+        return self.forecast_batch(last_windows(scaled, self.window, ends), steps)
+
+    def predict(self, last_sequence: np.ndarray, steps: int = 30) -> np.ndarray:
+        """Forecast using sliding window approach"""
+        sequence = np.asarray(last_sequence)
+        return self.forecast_batch(sequence.reshape(1, self.window, -1), steps)[0]
+
+MODEL_TYPES = {
+    'arima': ARIMAModel,
+    'lstm': LSTMForecaster,
+}
@@ -1,64 +1,230 @@
 import pandas as pd
 import numpy as np
-from pypfopt.efficient_frontier import EfficientFrontier
-from pypfopt import risk_models
-from pypfopt import expected_returns
-from pypfopt import plotting
-import matplotlib.pyplot as plt
-from typing import Dict, Tuple
+from typing import Dict, Optional, Sequence, Tuple, Union
+from src.frontier import Frontier, FrontierEngine, portfolio_performance
+from src.instrumentation import span
+from src.large_universe import FactorCovariance, FactorPortfolioOptimizer
+from src.risk_objectives import CVaROptimizer, hrp_weights, risk_parity_weights, scenario_set
+from src.simulation import MonteCarloSimulator, SimulationResult
+from src.views import ForecastViews, black_litterman
 
 class PortfolioOptimizer:
     """Handles Modern Portfolio Theory (MPT) optimization using PyPortfolioOpt"""
     
-    def __init__(self, price_data: pd.DataFrame):
+    def __init__(self, price_data: Optional[pd.DataFrame] = None, estimator=None,
+                 shrinkage: Union[None, str, float] = None):
         """
-        Initialize with historical price data
+        Initialize with historical price data or a moment estimator
         price_data: DataFrame with dates as index and tickers as columns
+        estimator: RollingMomentEstimator / ExponentialMomentEstimator used instead of raw prices
+        shrinkage: covariance shrinkage passed to the estimator (e.g. 'ledoit_wolf')
         """
+        supported = getattr(estimator, 'SHRINKAGE', ('ledoit_wolf',))
+        if isinstance(shrinkage, str) and shrinkage not in supported:
+            source = type(estimator).__name__ if estimator is not None else "price data"
+            raise ValueError(f"Shrinkage '{shrinkage}' is not supported with {source}; "
+                             f"use {list(supported)} or a fixed intensity.")
         self.price_data = price_data
+        self.estimator = estimator
+        self.shrinkage = shrinkage
         self.mu = None
         self.S = None
+        # Historical estimates that views are always blended from, never a posterior
+        self._prior_mu = None
+        self._prior_S = None
+
+    @classmethod
+    def from_estimates(cls, mu: pd.Series, S: pd.DataFrame) -> "PortfolioOptimizer":
+        """Build an optimizer from precomputed annualised expected returns and covariance"""
+        optimizer = cls(price_data=None)
+        optimizer.mu, optimizer.S = mu, S
+        return optimizer
 
     def calculate_metrics(self):
         """Calculate expected returns and sample covariance matrix"""
-        # Calculate annualised mean daily returns
-        self.mu = expected_returns.mean_historical_return(self.price_data)
-        # Calculate annualised sample covariance matrix
-        self.S = risk_models.sample_cov(self.price_data)
+        if self.estimator is not None:
+            # Running moments are already up to date, no pass over the price history
+            with span("optimize.metrics", source="estimator"):
+                self.mu = self.estimator.expected_returns()
+                self.S = self.estimator.covariance(self.shrinkage)
+            self._prior_mu, self._prior_S = self.mu, self.S
+            return self.mu, self.S
+
+        from pypfopt import expected_returns, risk_models
+
+        with span("optimize.metrics", source="prices", rows=len(self.price_data),
+                  tickers=self.price_data.shape[1], shrinkage=str(self.shrinkage)):
+            # Calculate annualised mean daily returns
+            self.mu = expected_returns.mean_historical_return(self.price_data)
+            # Calculate annualised sample covariance matrix
+            if self.shrinkage is None:
+                self.S = risk_models.sample_cov(self.price_data)
+            elif self.shrinkage == 'ledoit_wolf':
+                self.S = risk_models.CovarianceShrinkage(self.price_data).ledoit_wolf()
+            else:
+                self.S = risk_models.CovarianceShrinkage(self.price_data).shrunk_covariance(float(self.shrinkage))
+        self._prior_mu, self._prior_S = self.mu, self.S
         return self.mu, self.S
 
-    def optimize_performance(self, target_return: float = None) -> Dict[str, float]:
+    def _prior(self) -> Tuple[pd.Series, pd.DataFrame]:
+        if self._prior_mu is None:
+            if self.mu is None or self.S is None:
+                self.calculate_metrics()
+            self._prior_mu, self._prior_S = self.mu, self.S
+        return self._prior_mu, self._prior_S
+
+    def posterior(self, views: ForecastViews, tau: float = 0.05) -> Tuple[pd.Series, pd.DataFrame]:
+        """Black-Litterman posterior of the historical estimates given forecast views; changes nothing"""
+        prior_mu, prior_S = self._prior()
+        with span("optimize.views", tickers=len(views.expected_returns), model=views.model_type):
+            return black_litterman(prior_mu, prior_S, views, tau)
+
+    def apply_views(self, views: ForecastViews, tau: float = 0.05) -> "PortfolioOptimizer":
+        """
+        Use the Black-Litterman posterior given forecast views for all later optimization
+        and performance figures. Views are blended from the historical estimates, so
+        applying views again replaces the earlier ones instead of compounding them.
+        """
+        self.mu, self.S = self.posterior(views, tau)
+        return self
+
+    def optimize_performance(self, target_return: float = None,
+                             views: Optional[ForecastViews] = None) -> Dict[str, float]:
         """
         Find the weights that maximize the Sharpe ratio or achieve a target return
+        views: forecast views blended into the expected returns for this call only (see posterior)
         """
         if self.mu is None or self.S is None:
             self.calculate_metrics()
-            
-        ef = EfficientFrontier(self.mu, self.S)
-        
-        if target_return:
-            weights = ef.efficient_return(target_return)
-        else:
-            # Maximize Sharpe ratio
-            weights = ef.max_sharpe()
-            
-        cleaned_weights = ef.clean_weights()
+        mu, S = (self.mu, self.S) if views is None else self.posterior(views)
+
+        from pypfopt.efficient_frontier import EfficientFrontier
+        with span("optimize.max_sharpe", tickers=len(mu), target_return=target_return):
+            ef = EfficientFrontier(mu, S)
+
+            if target_return:
+                weights = ef.efficient_return(target_return)
+            else:
+                # Maximize Sharpe ratio
+                weights = ef.max_sharpe()
+
+            cleaned_weights = ef.clean_weights()
         return dict(cleaned_weights)
 
+    def _scenario_prices(self, objective: str) -> pd.DataFrame:
+        """Price history behind the scenario-based objectives"""
+        if self.price_data is None:
+            raise ValueError(f"Scenario objectives need price_data; {objective} cannot run on an optimizer "
+                             "built from an estimator or from_estimates.")
+        return self.price_data
+
+    def optimize_cvar(self, confidence: float = 0.95, target_return: Optional[float] = None,
+                      weight_bounds: Tuple[float, float] = (0, 1)) -> Dict[str, float]:
+        """
+        Minimize historical CVaR at the given confidence, optionally subject to a
+        minimum annualised mean return. Scenarios are cached per data version.
+        Needs the price history (price_data).
+        """
+        prices = self._scenario_prices("optimize_cvar")
+        with span("optimize.min_cvar", rows=len(prices), tickers=prices.shape[1], confidence=confidence):
+            return CVaROptimizer(scenario_set(prices), weight_bounds).optimize(confidence, target_return)
+
+    def optimize_risk_parity(self, risk_budgets: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        """
+        Weights whose risk contributions match risk_budgets (equal contributions by default).
+        Needs the price history (price_data).
+        """
+        prices = self._scenario_prices("optimize_risk_parity")
+        with span("optimize.risk_parity", tickers=prices.shape[1]):
+            scenarios = scenario_set(prices)
+            budgets = None if risk_budgets is None else [risk_budgets[t] for t in scenarios.tickers]
+            return dict(zip(scenarios.tickers, risk_parity_weights(scenarios.covariance(), budgets)))
+
+    def optimize_hrp(self, linkage_method: str = 'single') -> Dict[str, float]:
+        """
+        Hierarchical Risk Parity weights on the cached correlation clustering.
+        Needs the price history (price_data).
+        """
+        prices = self._scenario_prices("optimize_hrp")
+        with span("optimize.hrp", tickers=prices.shape[1]):
+            scenarios = scenario_set(prices)
+            weights = hrp_weights(scenarios.covariance(), scenarios.linkage(linkage_method))
+        return dict(zip(scenarios.tickers, weights))
+
+    def optimize_large_universe(self, n_factors: int = 10, risk_aversion: float = 1.0,
+                                weight_bounds: Tuple[float, float] = (0, 1),
+                                sectors: Optional[Sequence[str]] = None,
+                                sector_bounds: Optional[Dict[str, Tuple[float, float]]] = None,
+                                use_expected_returns: bool = True) -> Dict[str, float]:
+        """
+        Mean-variance weights for thousands of assets using a PCA factor covariance
+        and a projected-gradient solver instead of a dense conic solve.
+        With use_expected_returns=False the minimum-variance portfolio is returned.
+        Without price_data the factor model is taken from the estimator's or given estimates.
+        """
+        from pypfopt import expected_returns
+        if self.price_data is None:
+            if self.mu is None or self.S is None:
+                self.calculate_metrics()
+            tickers, rows = len(self.mu), 0
+        else:
+            tickers, rows = self.price_data.shape[1], len(self.price_data)
+        with span("optimize.large_universe", rows=rows, tickers=tickers, factors=n_factors):
+            if self.price_data is None:
+                cov = FactorCovariance.from_covariance(self.S, n_factors)
+                mu = self.mu if use_expected_returns else None
+            else:
+                cov = FactorCovariance.from_prices(self.price_data, n_factors)
+                mu = expected_returns.mean_historical_return(self.price_data) if use_expected_returns else None
+            optimizer = FactorPortfolioOptimizer(cov, mu, weight_bounds=weight_bounds, sectors=sectors,
+                                                 sector_bounds=sector_bounds, risk_aversion=risk_aversion)
+            return optimizer.optimize()
+
     def get_performance(self, weights: Dict[str, float]) -> Tuple[float, float, float]:
         """
         Calculate expected annual return, volatility and Sharpe ratio for given weights
         """
-        ef = EfficientFrontier(self.mu, self.S)
-        ef.set_weights(weights)
-        return ef.portfolio_performance(verbose=False)
+        if self.mu is None or self.S is None:
+            self.calculate_metrics()
+        w = np.array([weights.get(t, 0.0) for t in self.mu.index])
+        ret, vol, sharpe = portfolio_performance(w, self.mu, self.S)
+        return float(ret), float(vol), float(sharpe)
 
-    def plot_efficient_frontier(self):
-        """Generate a plot of the Efficient Frontier"""
+    def simulate_risk(self, weights: Dict[str, float], horizon: int = 21, n_paths: int = 10000,
+                      method: str = 'bootstrap', **kwargs) -> SimulationResult:
+        """
+        Monte Carlo tail risk (VaR, CVaR, drawdowns) of the given weights over the horizon.
+        Extra keyword arguments go to MonteCarloSimulator (seed, n_jobs, drift, ...).
+        Needs the price history (price_data).
+        """
+        prices = self._scenario_prices("simulate_risk")
+        with span("optimize.simulate", method=method, horizon=horizon, rows=n_paths):
+            simulator = MonteCarloSimulator(prices, method=method, horizon=horizon, **kwargs)
+            return simulator.simulate(weights, n_paths)
+
+    def efficient_frontier(self, n_points: int = 50) -> Frontier:
+        """Compute the efficient frontier as a grid of warm-started solves"""
         if self.mu is None or self.S is None:
             self.calculate_metrics()
-            
+        with span("optimize.frontier", tickers=len(self.mu), points=n_points):
+            return FrontierEngine(self.mu, self.S).efficient_frontier(n_points)
+
+    def plot_efficient_frontier(self, n_points: int = 50):
+        """Generate a plot of the Efficient Frontier"""
+        import matplotlib.pyplot as plt
+        frontier = self.efficient_frontier(n_points)
+        best = int(np.nanargmax(frontier.sharpe))
+
         fig, ax = plt.subplots(figsize=(10, 6))
-        # This is a bit complex with pypfopt plotting, we'll do a simplified version
-        # for the dashboard or just return the metrics for a plotly chart
+        ax.plot(frontier.volatilities, frontier.returns, label="Efficient Frontier")
+        ax.scatter(frontier.volatilities[best], frontier.returns[best], marker='*', s=200, color='r',
+                   label="Max Sharpe")
+        ax.scatter(np.sqrt(np.diag(self.S)), self.mu, marker='o', color='k', label="Assets")
+        for ticker, vol, ret in zip(self.mu.index, np.sqrt(np.diag(self.S)), self.mu):
+            ax.annotate(ticker, (vol, ret))
+        ax.set_xlabel("Annual Volatility")
+        ax.set_ylabel("Expected Annual Return")
+        ax.set_title("Efficient Frontier")
+        ax.legend()
+        plt.tight_layout()
         return fig
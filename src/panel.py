@@ -0,0 +1,149 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+FILL_POLICIES = ('none', 'ffill')
+LISTING_POLICIES = ('mask', 'common', 'backfill')
+
+# Columns processed in one go when forward filling; bounds the int32 index scratch space
+_FILL_CHUNK = 512
+
+def _forward_fill(values: np.ndarray, observed: np.ndarray, max_fill: Optional[int]):
+    """
+    Carry the last observed price forward into gaps, in place, at most max_fill rows
+    past the observation (unbounded if None). Cells before a ticker's first
+    observation are left untouched.
+    """
+    n_rows = len(values)
+    positions = np.arange(n_rows, dtype=np.int32)[:, None]
+    for lo in range(0, values.shape[1], _FILL_CHUNK):
+        hi = min(lo + _FILL_CHUNK, values.shape[1])
+        last = np.maximum.accumulate(np.where(observed[:, lo:hi], positions, -1), axis=0)
+        fill = (last >= 0) & ~observed[:, lo:hi]
+        if max_fill is not None:
+            fill &= positions - last <= max_fill
+        rows, cols = np.nonzero(fill)
+        values[rows, cols + lo] = values[last[rows, cols], cols + lo]
+
+@dataclass
+class PricePanel:
+    """
+    Prices of many tickers on one shared trading calendar.
+    values: (dates, tickers) array in the panel's dtype, NaN where no usable price exists
+    observed: True where the source reported a price for that date
+    valid: True where values holds a usable price (observed or filled by a policy)
+    """
+    values: np.ndarray
+    dates: pd.DatetimeIndex
+    tickers: List[str]
+    observed: np.ndarray
+    valid: np.ndarray
+
+    @classmethod
+    def from_series(cls, series: Dict[str, pd.Series], dtype=np.float32, fill: str = 'ffill',
+                    max_fill: Optional[int] = 5, listing: str = 'mask') -> "PricePanel":
+        """
+        Align per-ticker price series onto the union of their dates in a single pass.
+        fill: 'ffill' carries the last price over gaps of up to max_fill dates, 'none' leaves them NaN
+        listing: what to do before a ticker's first price. 'mask' leaves it invalid,
+            'common' starts the calendar once every ticker is listed, 'backfill' repeats
+            the first price back to the start of the calendar
+        """
+        if fill not in FILL_POLICIES:
+            raise ValueError(f"Unknown fill policy '{fill}'. Choose from {list(FILL_POLICIES)}")
+        if listing not in LISTING_POLICIES:
+            raise ValueError(f"Unknown listing policy '{listing}'. Choose from {list(LISTING_POLICIES)}")
+
+        tickers = [str(t) for t in series]
+        stamps = [pd.DatetimeIndex(s.index).values.astype('datetime64[ns]').view(np.int64) for s in series.values()]
+        calendar = np.unique(np.concatenate(stamps)) if stamps else np.empty(0, dtype=np.int64)
+
+        values = np.full((len(calendar), len(tickers)), np.nan, dtype=dtype)
+        for column, (s, ts) in enumerate(zip(series.values(), stamps)):
+            values[np.searchsorted(calendar, ts), column] = s.to_numpy(dtype=dtype, na_value=np.nan)
+        observed = ~np.isnan(values)
+
+        if fill == 'ffill':
+            _forward_fill(values, observed, max_fill)
+
+        listed = observed.any(axis=0)
+        first = np.where(listed, observed.argmax(axis=0), len(calendar))
+        if listing == 'common' and listed.any():
+            start = int(first[listed].max())
+            calendar, values, observed = calendar[start:], values[start:], observed[start:]
+        elif listing == 'backfill':
+            for column in np.nonzero(listed & (first > 0))[0]:
+                values[:first[column], column] = values[first[column], column]
+
+        index_name = next((s.index.name for s in series.values() if s.index.name), None)
+        dates = pd.DatetimeIndex(calendar.view('datetime64[ns]'), name=index_name)
+        return cls(values, dates, tickers, observed, ~np.isnan(values))
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame],
+                    price_columns: Sequence[str] = ('Adj Close', 'Close'), **kwargs) -> "PricePanel":
+        """Panel of the first available price column of each ticker's bars (Adj Close, else Close)"""
+        series = {}
+        for ticker, df in frames.items():
+            column = next(c for c in price_columns if c in df.columns)
+            series[ticker] = df[column]
+        return cls.from_series(series, **kwargs)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, dtype=None) -> "PricePanel":
+        """Wrap an already aligned price frame; NaN cells are marked unobserved"""
+        values = df.to_numpy(dtype=dtype)
+        valid = ~np.isnan(values)
+        return cls(values, pd.DatetimeIndex(df.index), [str(c) for c in df.columns], valid, valid)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + self.observed.nbytes + self.valid.nbytes
+
+    def listing_dates(self) -> pd.Series:
+        """First date with an observed price per ticker (NaT if never observed)"""
+        listed = self.observed.any(axis=0)
+        first = self.observed.argmax(axis=0)
+        dates = [self.dates[i] if ok else pd.NaT for i, ok in zip(first, listed)]
+        return pd.Series(dates, index=self.tickers, name="listed")
+
+    def complete_rows(self) -> np.ndarray:
+        """True for dates on which every ticker has a valid price"""
+        return self.valid.all(axis=1)
+
+    def dropna(self) -> "PricePanel":
+        """Only the dates on which every ticker has a valid price"""
+        rows = self.complete_rows()
+        if rows.all():
+            return self
+        return PricePanel(self.values[rows], self.dates[rows], self.tickers, self.observed[rows], self.valid[rows])
+
+    def select(self, tickers: Optional[Sequence[str]] = None, start: Optional[str] = None,
+               end: Optional[str] = None) -> "PricePanel":
+        """
+        Sub-panel for a ticker subset and an inclusive date range. Date ranges are
+        views into this panel; a ticker subset copies the selected columns.
+        """
+        lo = 0 if start is None else int(self.dates.searchsorted(pd.Timestamp(start), side='left'))
+        hi = len(self.dates) if end is None else int(self.dates.searchsorted(pd.Timestamp(end), side='right'))
+        rows = slice(lo, hi)
+        if tickers is None:
+            return PricePanel(self.values[rows], self.dates[rows], self.tickers, self.observed[rows], self.valid[rows])
+        columns = [self.tickers.index(t) for t in tickers]
+        return PricePanel(self.values[rows, columns], self.dates[rows], list(tickers),
+                          self.observed[rows, columns], self.valid[rows, columns])
+
+    def returns(self, log: bool = False) -> np.ndarray:
+        """Per-period returns, (dates - 1, tickers); NaN where either price is invalid"""
+        if log:
+            return np.diff(np.log(self.values), axis=0)
+        return self.values[1:] / self.values[:-1] - 1
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame over the same values, without copying them"""
+        return pd.DataFrame(self.values, index=self.dates, columns=self.tickers, copy=False)
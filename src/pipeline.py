@@ -0,0 +1,347 @@
+"""
+Deterministic, incremental pipeline runs.
+
+Each stage declares its upstream stages and its parameters (config fields,
+hyperparameters, data version). Its cache key is a hash of those parameters, a
+per-stage seed and the content hashes of its upstream outputs. Outputs are
+stored by content hash in a local cache, so a re-run skips every stage whose
+inputs are unchanged. When a stage recomputes to the same output, its
+downstream stages stay cached as well.
+
+    python -m src.cli run                         # ingest -> models -> forecasts / weights / explanations
+    python -m src.cli run weights --force prices  # re-read the data, recompute only what changed
+"""
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import hashlib
+import json
+import logging
+import os
+import pickle
+import random
+import sys
+import time
+import numpy as np
+import pandas as pd
+from src.instrumentation import span
+from src.storage import data_fingerprint
+
+logger = logging.getLogger(__name__)
+
+def content_hash(obj: Any) -> str:
+    """Stable hash of a stage output: frames by value, arrays by bytes, containers recursively"""
+    digest = hashlib.sha256()
+    if isinstance(obj, (pd.Series, pd.DataFrame)):
+        digest.update(b"pandas" + data_fingerprint(obj).encode())
+    elif isinstance(obj, np.ndarray):
+        digest.update(f"ndarray{obj.dtype}{obj.shape}".encode() + np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        digest.update(b"dict")
+        for key in sorted(obj, key=str):
+            digest.update(json.dumps(str(key)).encode() + content_hash(obj[key]).encode())
+    elif isinstance(obj, (list, tuple)):
+        digest.update(type(obj).__name__.encode())
+        for item in obj:
+            digest.update(content_hash(item).encode())
+    else:
+        digest.update(json.dumps(obj, sort_keys=True, default=repr).encode())
+    return digest.hexdigest()
+
+def stage_seed(seed: int, name: str) -> int:
+    """Seed for one stage, independent of which other stages run"""
+    return int(hashlib.sha256(f"{seed}:{name}".encode()).hexdigest()[:8], 16) % (2 ** 31)
+
+def set_seeds(seed: int, tensorflow: bool = False):
+    """
+    Seed Python and NumPy and, for TensorFlow stages, Keras and TensorFlow with
+    deterministic kernels enabled
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    if tensorflow or 'tensorflow' in sys.modules:
+        import tensorflow as tf
+        tf.keras.utils.set_random_seed(seed)
+        tf.config.experimental.enable_op_determinism()
+
+@dataclass
+class Stage:
+    """
+    One pipeline step. fn is called with the upstream outputs and params as keyword
+    arguments: fn(**{name: output for name in inputs}, **params).
+    params: everything besides the upstream outputs that the result depends on; must be JSON-serialisable
+    version: bump when fn's logic changes so old results are not reused
+    tensorflow: seed TensorFlow before running (imports it)
+    """
+    name: str
+    fn: Callable[..., Any]
+    inputs: Sequence[str] = ()
+    params: Dict[str, Any] = field(default_factory=dict)
+    version: int = 1
+    tensorflow: bool = False
+
+class ArtifactCache:
+    """
+    Content-addressed store on disk: objects/<hash>.pkl holds outputs by content hash
+    and stages/<key>.json maps a stage cache key to the hash of its output
+    """
+
+    def __init__(self, root: str = "data/cache"):
+        self.root = root
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.pkl")
+
+    def _record_path(self, key: str) -> str:
+        return os.path.join(self.root, "stages", f"{key}.json")
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+
+    def put(self, obj: Any) -> str:
+        digest = content_hash(obj)
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            self._write(path, pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+        return digest
+
+    def get(self, digest: str) -> Any:
+        with open(self._object_path(digest), "rb") as f:
+            return pickle.load(f)
+
+    def __contains__(self, digest: str) -> bool:
+        return os.path.exists(self._object_path(digest))
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """Record of a completed stage run, or None if missing or its output is gone"""
+        path = self._record_path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            record = json.load(f)
+        return record if record['output'] in self else None
+
+    def record(self, key: str, record: Dict[str, Any]):
+        self._write(self._record_path(key), json.dumps(record, indent=1).encode())
+
+@dataclass
+class PipelineRun:
+    """Outcome of Pipeline.run: per-stage status ('cached' or 'computed'), cache keys and output hashes"""
+    status: Dict[str, str]
+    keys: Dict[str, str]
+    hashes: Dict[str, str]
+    seconds: Dict[str, float]
+    cache: ArtifactCache
+    _outputs: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    def output(self, name: str) -> Any:
+        """Output of a stage, loaded from the cache on first access"""
+        if name not in self._outputs:
+            self._outputs[name] = self.cache.get(self.hashes[name])
+        return self._outputs[name]
+
+    def summary(self) -> pd.DataFrame:
+        return pd.DataFrame({'stage': list(self.status), 'status': list(self.status.values()),
+                             'seconds': [self.seconds[s] for s in self.status],
+                             'output': [self.hashes[s][:12] for s in self.status]})
+
+class Pipeline:
+    """Runs a DAG of stages, reusing every output whose inputs are unchanged"""
+
+    def __init__(self, stages: Sequence[Stage] = (), cache: Optional[ArtifactCache] = None, seed: int = 0):
+        self.stages: Dict[str, Stage] = {}
+        self.cache = cache or ArtifactCache()
+        self.seed = seed
+        for stage in stages:
+            self.add(stage)
+
+    def add(self, stage: Stage) -> "Pipeline":
+        if stage.name in self.stages:
+            raise ValueError(f"Duplicate stage '{stage.name}'.")
+        self.stages[stage.name] = stage
+        return self
+
+    def order(self, targets: Optional[Sequence[str]] = None) -> List[str]:
+        """Stages needed for targets (default: all), upstream first"""
+        ordered, visiting = [], set()
+
+        def visit(name: str):
+            if name in ordered:
+                return
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage '{name}'. Choose from {list(self.stages)}.")
+            if name in visiting:
+                raise ValueError(f"Stage '{name}' is part of a cycle.")
+            visiting.add(name)
+            for upstream in self.stages[name].inputs:
+                visit(upstream)
+            visiting.discard(name)
+            ordered.append(name)
+
+        for name in targets or list(self.stages):
+            visit(name)
+        return ordered
+
+    def cache_key(self, stage: Stage, upstream_hashes: Dict[str, str]) -> str:
+        payload = json.dumps({'stage': stage.name, 'version': stage.version, 'params': stage.params,
+                              'seed': stage_seed(self.seed, stage.name), 'inputs': upstream_hashes},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+    def run(self, targets: Optional[Sequence[str]] = None, force: Sequence[str] = ()) -> PipelineRun:
+        """
+        Run the stages needed for targets. force: stages recomputed even if cached; their
+        downstream stages recompute only if the forced output changed.
+        """
+        result = PipelineRun({}, {}, {}, {}, self.cache)
+        for name in self.order(targets):
+            stage = self.stages[name]
+            upstream = {u: result.hashes[u] for u in stage.inputs}
+            key = self.cache_key(stage, upstream)
+            record = None if name in force else self.cache.lookup(key)
+            start = time.perf_counter()
+
+            if record is not None:
+                result.status[name] = "cached"
+                output_hash = record['output']
+                logger.info(f"♻️  {name}: inputs unchanged, reusing {output_hash[:12]}")
+            else:
+                seed = stage_seed(self.seed, name)
+                set_seeds(seed, tensorflow=stage.tensorflow)
+                with span(f"pipeline.{name}", seed=seed):
+                    output = stage.fn(**{u: result.output(u) for u in stage.inputs}, **stage.params)
+                output_hash = self.cache.put(output)
+                self.cache.record(key, {'stage': name, 'output': output_hash, 'inputs': upstream,
+                                        'params': stage.params, 'seed': seed, 'created': time.time()})
+                result._outputs[name] = output
+                result.status[name] = "computed"
+                logger.info(f"✅ {name}: computed {output_hash[:12]} in {time.perf_counter() - start:.1f}s")
+
+            result.keys[name] = key
+            result.hashes[name] = output_hash
+            result.seconds[name] = time.perf_counter() - start
+        return result
+
+def build_pipeline(config, models: Sequence[str] = ('arima', 'lstm'), lstm_epochs: Optional[int] = None,
+                   forecast_steps: int = 30, objective: str = 'max_sharpe', explain: bool = True,
+                   fetch: bool = False) -> Pipeline:
+    """
+    The GMF pipeline: prices -> models -> forecasts / explanations, and prices -> weights.
+    lstm_epochs: None fits with the shared train default, like every other entry point
+    fetch: download prices (keyed by the ingestion settings) instead of reading the
+        processed store (keyed by its version)
+    """
+    from src.data_processing import DataIngestion
+    from src.model_store import ModelStore
+
+    ingestion = DataIngestion(config)
+    model_store = ModelStore(config.MODEL_STORE_DIR, config.MODEL_STORE_MAX_MB * 1024 * 1024)
+
+    def train_params(kind: str) -> Dict[str, Any]:
+        return {'epochs': lstm_epochs} if kind == 'lstm' and lstm_epochs else {}
+
+    def load_prices(tickers: List[str], source: str, **settings) -> pd.DataFrame:
+        if source == "fetch":
+            raw = ingestion.fetch_data()
+            if not raw:
+                raise RuntimeError("Data ingestion failed.")
+            ingestion.combine_and_save(raw)
+        return ingestion.load_processed(tickers).astype(np.float64)
+
+    def fit(kind: str, ticker: str, series: pd.Series):
+        from src.models import MODEL_TYPES
+        # Seeded per model, so any one model can be refitted identically on its own
+        set_seeds(stage_seed(config.SEED, f"models/{ticker}/{kind}"), tensorflow=kind == 'lstm')
+        model = MODEL_TYPES[kind](ticker)
+        model.train(series, **train_params(kind))
+        return model
+
+    def train_models(prices: pd.DataFrame, kinds: List[str], lstm_epochs: int) -> Dict[str, Dict[str, str]]:
+        keys = {}
+        for ticker in prices.columns:
+            series = prices[ticker].dropna()
+            keys[ticker] = {}
+            for kind in kinds:
+                # Always fit under the stage seed, replacing any store entry fitted outside a seeded run
+                keys[ticker][kind] = model_store.key_for(kind, ticker, series, train_params=train_params(kind))
+                model_store.put(keys[ticker][kind], fit(kind, ticker, series), kind)
+        return keys
+
+    def fitted(kind: str, ticker: str, series: pd.Series, key: str):
+        model = model_store.get(key)
+        if model is None:
+            # Evicted from the model store since the models stage ran: refit it exactly as that stage did
+            model = fit(kind, ticker, series)
+            model_store.put(key, model, kind)
+        return model
+
+    def forecast(prices: pd.DataFrame, models: Dict[str, Dict[str, str]], steps: int) -> Dict[str, pd.DataFrame]:
+        out = {}
+        for kind in sorted({k for entry in models.values() for k in entry}):
+            columns = {}
+            for ticker, entry in models.items():
+                if kind not in entry:
+                    continue
+                series = prices[ticker].dropna()
+                model = fitted(kind, ticker, series, entry[kind])
+                if kind == 'arima':
+                    columns[ticker] = np.asarray(model.predict(steps))
+                else:
+                    columns[ticker] = model.forecast_from_history(series, np.array([len(series)]), steps=steps)[0]
+            dates = pd.bdate_range(prices.index[-1] + pd.Timedelta(days=1), periods=steps)
+            out[kind] = pd.DataFrame(columns, index=dates)
+        return out
+
+    def optimize(prices: pd.DataFrame, objective: str) -> Dict[str, Any]:
+        from src.optimization import PortfolioOptimizer
+        optimizer = PortfolioOptimizer(prices.dropna())
+        weights = {
+            'max_sharpe': optimizer.optimize_performance,
+            'min_cvar': optimizer.optimize_cvar,
+            'risk_parity': optimizer.optimize_risk_parity,
+            'hrp': optimizer.optimize_hrp,
+            'large_universe': optimizer.optimize_large_universe,
+        }[objective]()
+        return {'weights': {t: float(w) for t, w in weights.items()},
+                'performance': list(optimizer.get_performance(weights))}
+
+    def explain_models(prices: pd.DataFrame, models: Dict[str, Dict[str, str]], budget: int,
+                       samples: int) -> Dict[str, Dict[str, List[float]]]:
+        from src.explainability import ModelExplainer, feature_importance, temporal_importance
+        from src.windows import to_model_input
+        out = {}
+        for ticker, entry in models.items():
+            if 'lstm' not in entry:
+                continue
+            series = prices[ticker].dropna()
+            model = fitted('lstm', ticker, series, entry['lstm'])
+            X, _ = model._prepare_sequences(model.scaler.transform(series.values[-500:].reshape(-1, 1)))
+            X = to_model_input(X)
+            explainer = ModelExplainer.for_model(model.model, X, budget=budget, version=entry['lstm'])
+            values = explainer.explain(X[-samples:])
+            out[ticker] = {'feature_importance': feature_importance(values).tolist(),
+                           'temporal_importance': temporal_importance(values).tolist()}
+        return out
+
+    if fetch:
+        source = {'source': "fetch", 'start': config.START_DATE, 'end': config.END_DATE}
+    else:
+        source = {'source': "store", 'version': ingestion.store.version()}
+    settings = {'fill_policy': config.FILL_POLICY, 'max_fill': config.MAX_FILL_DAYS,
+                'listing_policy': config.LISTING_POLICY, 'dtype': config.PRICE_DTYPE}
+
+    stages = [
+        Stage("prices", load_prices, params={'tickers': list(config.TICKERS), **source, **settings}),
+        Stage("models", train_models, ["prices"], {'kinds': list(models), 'lstm_epochs': lstm_epochs},
+              tensorflow='lstm' in models),
+        Stage("forecasts", forecast, ["prices", "models"], {'steps': forecast_steps},
+              tensorflow='lstm' in models),
+        Stage("weights", optimize, ["prices"], {'objective': objective}),
+    ]
+    if explain and 'lstm' in models:
+        stages.append(Stage("explanations", explain_models, ["prices", "models"], {'budget': 50, 'samples': 21},
+                            tensorflow=True))
+    return Pipeline(stages, ArtifactCache(config.PIPELINE_CACHE_DIR), seed=config.SEED)
@@ -0,0 +1,193 @@
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Tuple
+import pandas as pd
+import numpy as np
+from src.estimators import TRADING_DAYS
+from src.storage import data_fingerprint
+
+class ScenarioSet:
+    """
+    Historical return scenarios of a price panel together with the structures the
+    CVaR, risk-parity and HRP objectives derive from them: covariance, correlation
+    linkage and the sparse CVaR constraint block. Each is built on first use and
+    kept, so repeated solves with other parameters only pay for the solve itself.
+    """
+
+    def __init__(self, price_data: pd.DataFrame, frequency: int = TRADING_DAYS):
+        prices = price_data.dropna()
+        self.tickers = list(prices.columns)
+        self.frequency = frequency
+        self.version = data_fingerprint(prices)
+        values = prices.to_numpy(dtype=np.float64)
+        self.returns = values[1:] / values[:-1] - 1       # (scenarios, tickers)
+        self._covariance = None
+        self._linkages = {}
+        self._cvar_block = None
+
+    @property
+    def n_scenarios(self) -> int:
+        return len(self.returns)
+
+    def expected_returns(self) -> np.ndarray:
+        """Annualised arithmetic mean return per asset"""
+        return self.returns.mean(axis=0) * self.frequency
+
+    def covariance(self) -> np.ndarray:
+        """Annualised sample covariance of the scenarios"""
+        if self._covariance is None:
+            self._covariance = np.cov(self.returns, rowvar=False) * self.frequency
+        return self._covariance
+
+    def linkage(self, method: str = 'single') -> np.ndarray:
+        """Hierarchical clustering of the assets on the correlation distance sqrt((1 - rho) / 2)"""
+        if method not in self._linkages:
+            from scipy.cluster import hierarchy
+            from scipy.spatial.distance import squareform
+            cov = self.covariance()
+            std = np.sqrt(np.diag(cov))
+            corr = cov / np.outer(std, std)
+            distance = np.sqrt(np.clip((1.0 - corr) / 2.0, 0.0, 1.0))
+            self._linkages[method] = hierarchy.linkage(squareform(distance, checks=False), method)
+        return self._linkages[method]
+
+    def cvar_block(self):
+        """
+        Equality constraints of the dual CVaR program over [q (S), lam, mu_upper (N), mu_lower (N)]:
+            sum(q) = 1,   R^T q + lam 1 - mu_upper + mu_lower = 0
+        Only N + 1 rows, so the simplex basis stays small however many scenarios there are.
+        Neither the confidence level nor the weight bounds appear in it.
+        """
+        if self._cvar_block is None:
+            from scipy import sparse
+            S, N = self.returns.shape
+            self._cvar_block = sparse.vstack([
+                sparse.hstack([sparse.csr_matrix(np.ones((1, S))), sparse.csr_matrix((1, 1 + 2 * N))]),
+                sparse.hstack([sparse.csr_matrix(self.returns.T), sparse.csr_matrix(np.ones((N, 1))),
+                               -sparse.identity(N), sparse.identity(N)]),
+            ], format='csc')
+        return self._cvar_block
+
+_SCENARIO_CACHE: "OrderedDict[str, ScenarioSet]" = OrderedDict()
+SCENARIO_CACHE_SIZE = 8
+
+def scenario_set(price_data: pd.DataFrame, frequency: int = TRADING_DAYS) -> ScenarioSet:
+    """
+    Shared ScenarioSet for a price panel, keyed by a hash of its contents so every
+    optimizer looking at the same data version reuses one set of caches
+    """
+    key = f"{data_fingerprint(price_data.dropna())}:{frequency}"
+    if key in _SCENARIO_CACHE:
+        _SCENARIO_CACHE.move_to_end(key)
+        return _SCENARIO_CACHE[key]
+    scenarios = ScenarioSet(price_data, frequency)
+    _SCENARIO_CACHE[key] = scenarios
+    while len(_SCENARIO_CACHE) > SCENARIO_CACHE_SIZE:
+        _SCENARIO_CACHE.popitem(last=False)
+    return scenarios
+
+def historical_cvar(weights: np.ndarray, returns: np.ndarray, confidence: float = 0.95) -> Tuple[float, float]:
+    """Historical (VaR, CVaR) of per-period portfolio returns, as positive losses"""
+    losses = -(np.asarray(returns) @ np.asarray(weights))
+    var = float(np.quantile(losses, confidence))
+    return var, float(var + np.maximum(losses - var, 0).mean() / (1 - confidence))
+
+class CVaROptimizer:
+    """
+    Minimum-CVaR portfolio via the Rockafellar-Uryasev linear program
+        min  alpha + 1 / ((1 - beta) S) * sum(u)
+        s.t. u_s >= -r_s^T w - alpha,  u >= 0,  sum(w) = 1,  lower <= w <= upper
+    The program is solved in its dual form, which has one row per asset rather than
+    one per scenario; the weights and VaR are read off the dual prices. The sparse
+    constraint matrix comes from the ScenarioSet, so changing the confidence level
+    or bounds only changes variable bounds and costs.
+    """
+
+    def __init__(self, scenarios: ScenarioSet, weight_bounds: Tuple[float, float] = (0, 1)):
+        self.scenarios = scenarios
+        self.weight_bounds = weight_bounds
+        self.var = None
+        self.cvar = None
+
+    def optimize(self, confidence: float = 0.95, target_return: Optional[float] = None) -> Dict[str, float]:
+        """
+        confidence: CVaR level beta, e.g. 0.95 for the average of the worst 5% of periods
+        target_return: optional minimum annualised arithmetic mean return
+        """
+        from scipy import sparse
+        from scipy.optimize import linprog
+        if not 0 < confidence < 1:
+            raise ValueError("confidence must lie strictly between 0 and 1.")
+        S, N = self.scenarios.n_scenarios, len(self.scenarios.tickers)
+        lower, upper = self.weight_bounds
+
+        # Dual: max lam - upper * sum(mu_upper) + lower * sum(mu_lower)  (+ target * tau)
+        # with 0 <= q <= 1 / ((1 - beta) S); linprog minimizes, hence the signs
+        c = np.concatenate([np.zeros(S), [-1.0], np.full(N, upper), np.full(N, -lower)])
+        low = np.concatenate([np.zeros(S), [-np.inf], np.zeros(2 * N)])
+        high = np.concatenate([np.full(S, 1.0 / ((1 - confidence) * S)), np.full(2 * N + 1, np.inf)])
+        A_eq = self.scenarios.cvar_block()
+        if target_return is not None:
+            # Multiplier tau >= 0 of the primal constraint mu^T w >= target
+            column = sparse.csc_matrix(np.concatenate([[0.0], self.scenarios.expected_returns()])[:, None])
+            A_eq = sparse.hstack([A_eq, column], format='csc')
+            c, low, high = np.append(c, -target_return), np.append(low, 0.0), np.append(high, np.inf)
+
+        result = linprog(c, A_eq=A_eq, b_eq=np.concatenate([[1.0], np.zeros(N)]),
+                         bounds=np.column_stack([low, high]), method='highs-ipm')
+        if result.status != 0:
+            raise ValueError(f"CVaR optimization failed: {result.message}")
+
+        prices = -result.eqlin.marginals
+        weights = np.clip(prices[1:], lower, upper)
+        weights /= weights.sum()
+        self.var, self.cvar = float(prices[0]), float(-result.fun)
+        return dict(zip(self.scenarios.tickers, weights))
+
+def risk_parity_weights(cov: np.ndarray, budgets: Optional[Sequence[float]] = None,
+                        tol: float = 1e-10, max_iter: int = 100) -> np.ndarray:
+    """
+    Long-only weights whose risk contributions w_i (S w)_i are proportional to budgets
+    (equal risk contribution by default). Newton's method on the convex problem
+    min 0.5 y^T S y - sum(b_i log y_i), whose solution rescaled to sum to one is the answer.
+    """
+    cov = np.asarray(cov, dtype=np.float64)
+    n = len(cov)
+    b = np.full(n, 1.0 / n) if budgets is None else np.asarray(budgets, dtype=np.float64) / np.sum(budgets)
+
+    y = 1 / np.sqrt(np.diag(cov))
+    y *= np.sqrt(b.sum() / (y @ cov @ y))
+    for _ in range(max_iter):
+        gradient = cov @ y - b / y
+        step = np.linalg.solve(cov + np.diag(b / y ** 2), gradient)
+        # Damp the step so every coordinate stays strictly positive
+        ratio = np.max(step / y)
+        y = y - (step if ratio < 0.95 else step * 0.95 / ratio)
+        if np.abs(gradient).max() < tol:
+            break
+    return y / y.sum()
+
+def hrp_weights(cov: np.ndarray, linkage: np.ndarray) -> np.ndarray:
+    """
+    Hierarchical Risk Parity: order assets by the dendrogram leaves, then split the
+    ordered list recursively, allocating between halves by inverse cluster variance
+    """
+    from scipy.cluster import hierarchy
+    cov = np.asarray(cov, dtype=np.float64)
+    order = hierarchy.leaves_list(linkage)
+    weights = np.ones(len(cov))
+
+    def cluster_variance(items):
+        sub = cov[np.ix_(items, items)]
+        ivp = 1 / np.diag(sub)
+        ivp /= ivp.sum()
+        return ivp @ sub @ ivp
+
+    clusters = [order]
+    while clusters:
+        clusters = [c[j:k] for c in clusters for j, k in ((0, len(c) // 2), (len(c) // 2, len(c))) if len(c) > 1]
+        for first, second in zip(clusters[::2], clusters[1::2]):
+            v1, v2 = cluster_variance(first), cluster_variance(second)
+            alpha = 1 - v1 / (v1 + v2)
+            weights[first] *= alpha
+            weights[second] *= 1 - alpha
+    return weights
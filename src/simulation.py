@@ -0,0 +1,169 @@
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple, Union
+import multiprocessing
+import pandas as pd
+import numpy as np
+
+SIMULATION_METHODS = ('bootstrap', 'gaussian', 'student_t')
+
+@dataclass
+class SimulationResult:
+    """Per-path outcomes of a Monte Carlo run over a fixed horizon"""
+    terminal_returns: np.ndarray   # (paths,) cumulative portfolio return at the horizon
+    max_drawdowns: np.ndarray      # (paths,) worst peak-to-trough decline along the path (<= 0)
+    horizon: int
+
+    def var(self, confidence: float = 0.95) -> float:
+        """Value at Risk: the loss not exceeded with the given confidence, as a positive fraction"""
+        return float(-np.quantile(self.terminal_returns, 1 - confidence))
+
+    def cvar(self, confidence: float = 0.95) -> float:
+        """Conditional VaR: the average loss in the tail beyond the VaR"""
+        cutoff = np.quantile(self.terminal_returns, 1 - confidence)
+        return float(-self.terminal_returns[self.terminal_returns <= cutoff].mean())
+
+    def drawdown_quantiles(self, levels=(0.5, 0.95, 0.99)) -> pd.Series:
+        """Quantiles of the maximum-drawdown distribution (0.99 = 1-in-100 worst path)"""
+        return pd.Series(np.quantile(self.max_drawdowns, [1 - q for q in levels]), index=list(levels))
+
+    def summary(self, confidence: float = 0.95) -> Dict[str, float]:
+        return {
+            'horizon': self.horizon,
+            'paths': len(self.terminal_returns),
+            'expected_return': float(self.terminal_returns.mean()),
+            'var': self.var(confidence),
+            'cvar': self.cvar(confidence),
+            'median_drawdown': float(np.median(self.max_drawdowns)),
+            'worst_drawdown': float(self.max_drawdowns.min()),
+        }
+
+def forecast_drift(models: Dict[str, object], price_data: pd.DataFrame, horizon: int) -> np.ndarray:
+    """
+    Per-step log returns (horizon, tickers) implied by each ticker's price forecast.
+    ARIMAModel forecasts from its fitted state; LSTMForecaster rolls forward from the
+    end of price_data.
+    """
+    drift = np.empty((horizon, len(price_data.columns)))
+    for j, ticker in enumerate(price_data.columns):
+        model = models[ticker]
+        series = price_data[ticker].dropna()
+        if hasattr(model, 'forecast_from_history'):
+            path = model.forecast_from_history(series, np.array([len(series)]), steps=horizon)[0]
+        else:
+            path = np.asarray(model.predict(horizon), dtype=np.float64)
+        path = np.concatenate([[series.iloc[-1]], path])
+        drift[:, j] = np.diff(np.log(path))
+    return drift
+
+# Simulator and weights of the current run, sent to each pool worker once by _init_worker
+_worker_state: Optional[Tuple["MonteCarloSimulator", np.ndarray]] = None
+
+def _init_worker(simulator: "MonteCarloSimulator", weights: np.ndarray):
+    global _worker_state
+    _worker_state = (simulator, weights)
+
+def _simulate_chunk(seed: np.random.SeedSequence, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    simulator, weights = _worker_state
+    return simulator._simulate_chunk(weights, seed, size)
+
+class MonteCarloSimulator:
+    """
+    Forward simulation of buy-and-hold portfolio paths from the historical price panel.
+    Asset log returns are drawn by bootstrapping historical days (optionally in blocks),
+    or from a correlated Gaussian or Student-t fitted to the history. A drift path from
+    the forecasting models can replace the historical mean.
+
+    Paths are generated in chunks of chunk_size, and each chunk is reduced to terminal
+    returns and drawdowns right away, so memory is bounded by one chunk regardless of
+    n_paths. Every chunk gets its own child of the seed, so results do not depend on n_jobs.
+    """
+
+    def __init__(self, price_data: pd.DataFrame, method: str = 'bootstrap', horizon: int = 21,
+                 df: float = 5.0, block_size: int = 1, drift: Optional[np.ndarray] = None,
+                 chunk_size: int = 2000, n_jobs: int = 1, seed: Optional[int] = None):
+        """
+        method: 'bootstrap', 'gaussian' or 'student_t'
+        df: degrees of freedom of the Student-t draws (> 2)
+        block_size: length of the contiguous blocks sampled by the bootstrap
+        drift: optional (horizon, tickers) per-step log returns, e.g. from forecast_drift
+        """
+        if method not in SIMULATION_METHODS:
+            raise ValueError(f"Unknown method '{method}'. Choose from {SIMULATION_METHODS}.")
+        if method == 'student_t' and df <= 2:
+            raise ValueError("Student-t draws need df > 2 for a finite covariance.")
+
+        prices = price_data.dropna()
+        self.tickers = list(prices.columns)
+        self.method = method
+        self.horizon = horizon
+        self.df = df
+        self.block_size = max(1, min(block_size, len(prices) - 1))
+        self.chunk_size = chunk_size
+        self.n_jobs = n_jobs
+        self.seed = seed
+
+        values = prices.to_numpy(dtype=np.float64)
+        self.log_returns = np.diff(np.log(values), axis=0)
+        self.mean = self.log_returns.mean(axis=0)
+        cov = np.atleast_2d(np.cov(self.log_returns, rowvar=False))
+        self._cholesky = np.linalg.cholesky(cov + 1e-12 * max(np.trace(cov), 1.0) * np.eye(len(self.tickers)))
+
+        if drift is not None:
+            drift = np.asarray(drift, dtype=np.float64)
+            if drift.shape != (horizon, len(self.tickers)):
+                raise ValueError(f"drift must have shape {(horizon, len(self.tickers))}, got {drift.shape}.")
+        self.drift = drift
+
+    def _draw(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        """Asset log returns for `size` paths, shape (size, horizon, tickers)"""
+        n = len(self.tickers)
+        if self.method == 'bootstrap':
+            block = self.block_size
+            n_blocks = -(-self.horizon // block)
+            starts = rng.integers(0, len(self.log_returns) - block + 1, size=(size, n_blocks))
+            rows = (starts[:, :, None] + np.arange(block)).reshape(size, -1)[:, :self.horizon]
+            draws = self.log_returns[rows]
+        else:
+            draws = rng.standard_normal((size, self.horizon, n)) @ self._cholesky.T
+            if self.method == 'student_t':
+                # Normal / chi-square mixture, scaled so the covariance matches the history
+                mixing = rng.chisquare(self.df, size=(size, self.horizon, 1))
+                draws *= np.sqrt((self.df - 2) / mixing)
+            draws += self.mean
+
+        if self.drift is not None:
+            draws += self.drift - self.mean
+        return draws
+
+    def _simulate_chunk(self, weights: np.ndarray, seed: np.random.SeedSequence,
+                        size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Terminal returns and maximum drawdowns of one chunk of paths"""
+        draws = self._draw(np.random.default_rng(seed), size)
+        np.cumsum(draws, axis=1, out=draws)
+        values = np.exp(draws) @ weights                  # (size, horizon), starting value 1
+        peaks = np.maximum(np.maximum.accumulate(values, axis=1), 1.0)
+        drawdowns = np.minimum((values / peaks - 1).min(axis=1), 0.0)
+        return values[:, -1] - 1, drawdowns
+
+    def simulate(self, weights: Union[Dict[str, float], np.ndarray], n_paths: int = 10000) -> SimulationResult:
+        """Simulate n_paths horizon-length paths of the portfolio with the given weights"""
+        if isinstance(weights, dict):
+            weights = [weights.get(t, 0.0) for t in self.tickers]
+        weights = np.asarray(weights, dtype=np.float64)
+
+        sizes = [self.chunk_size] * (n_paths // self.chunk_size)
+        if n_paths % self.chunk_size:
+            sizes.append(n_paths % self.chunk_size)
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+
+        if self.n_jobs == 1 or len(sizes) == 1:
+            chunks = [self._simulate_chunk(weights, s, size) for s, size in zip(seeds, sizes)]
+        else:
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=self.n_jobs, mp_context=context,
+                                     initializer=_init_worker, initargs=(self, weights)) as pool:
+                chunks = list(pool.map(_simulate_chunk, seeds, sizes))
+
+        terminal, drawdowns = zip(*chunks)
+        return SimulationResult(np.concatenate(terminal), np.concatenate(drawdowns), self.horizon)
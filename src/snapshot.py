@@ -0,0 +1,290 @@
+"""
+Precomputed analytics for the dashboard.
+
+After a data refresh a job is queued in a local SQLite queue. A background worker
+claims it and builds a snapshot: latest prices, forecasts per ticker and model,
+SHAP summaries, the efficient frontier and the optimal weights. The snapshot is
+published atomically as versioned JSON, and the dashboard only reads it.
+
+    python -m src.cli worker            # process jobs and watch the store for refreshes
+    python -m src.cli worker --once     # build one snapshot for the current data and exit
+"""
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+import pandas as pd
+from src.analytics import latest_change
+from src.instrumentation import span
+from src.panel import PricePanel
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_SCHEMA = 1
+
+class JobQueue:
+    """
+    Durable FIFO of jobs in a SQLite file. Claiming takes a write lock, so any
+    number of processes can enqueue and work from the same file.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        with self._connect() as db:
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    created REAL NOT NULL,
+                    started REAL,
+                    finished REAL,
+                    error TEXT
+                )""")
+            db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Autocommit mode with explicit BEGIN IMMEDIATE where a read must be followed by a write;
+        # closing without COMMIT rolls back
+        db = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def enqueue(self, kind: str, payload: Optional[Dict[str, Any]] = None) -> int:
+        """Queue a job unless an identical one is already pending; returns its id"""
+        body = json.dumps(payload or {}, sort_keys=True)
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute("SELECT id FROM jobs WHERE status = 'pending' AND kind = ? AND payload = ?",
+                             (kind, body)).fetchone()
+            if row is None:
+                row = (db.execute("INSERT INTO jobs (kind, payload, created) VALUES (?, ?, ?)",
+                                  (kind, body, time.time())).lastrowid,)
+            db.execute("COMMIT")
+        return row[0]
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """Mark the oldest pending job as running and return it, or None if the queue is empty"""
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute("SELECT id, kind, payload FROM jobs WHERE status = 'pending' "
+                             "ORDER BY id LIMIT 1").fetchone()
+            if row is not None:
+                db.execute("UPDATE jobs SET status = 'running', started = ? WHERE id = ?", (time.time(), row[0]))
+            db.execute("COMMIT")
+        if row is None:
+            return None
+        return {'id': row[0], 'kind': row[1], 'payload': json.loads(row[2])}
+
+    def finish(self, job_id: int, error: Optional[str] = None):
+        with self._connect() as db:
+            db.execute("UPDATE jobs SET status = ?, finished = ?, error = ? WHERE id = ?",
+                       ('failed' if error else 'done', time.time(), error, job_id))
+
+    def requeue_stale(self, older_than: float = 3600.0) -> int:
+        """Return jobs stuck in 'running' (e.g. after a worker crash) to the queue"""
+        with self._connect() as db:
+            return db.execute("UPDATE jobs SET status = 'pending', started = NULL "
+                              "WHERE status = 'running' AND started < ?", (time.time() - older_than,)).rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with self._connect() as db:
+            return dict(db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+class SnapshotStore:
+    """Versioned snapshot files plus a `latest.json` copy that is swapped in atomically"""
+
+    def __init__(self, directory: str, keep: int = 5):
+        self.directory = directory
+        self.keep = keep
+
+    @property
+    def latest_path(self) -> str:
+        return os.path.join(self.directory, "latest.json")
+
+    def publish(self, snapshot: Dict[str, Any]) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"snapshot-{snapshot['created_ns']}-{snapshot['version']}.json")
+        body = json.dumps(snapshot)
+        for target in (path, self.latest_path):
+            with open(target + ".tmp", "w") as f:
+                f.write(body)
+            os.replace(target + ".tmp", target)
+
+        versions = sorted(name for name in os.listdir(self.directory) if name.startswith("snapshot-"))
+        for name in versions[:-self.keep]:
+            os.remove(os.path.join(self.directory, name))
+        return path
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.latest_path):
+            return None
+        with open(self.latest_path) as f:
+            return json.load(f)
+
+    def latest_version(self) -> Optional[str]:
+        snapshot = self.latest()
+        return None if snapshot is None else snapshot['version']
+
+def _series(values: pd.Series) -> Dict[str, List]:
+    return {'dates': [d.strftime('%Y-%m-%d') for d in values.index], 'values': [float(v) for v in values]}
+
+class SnapshotBuilder:
+    """Computes every dashboard section from the processed store and the model store"""
+
+    def __init__(self, ingestion, model_store, tickers: Sequence[str], models: Sequence[str] = ('arima', 'lstm'),
+                 forecast_steps: int = 60, lstm_epochs: Optional[int] = None, explain: bool = True,
+                 frontier_points: int = 40):
+        """
+        forecast_steps: longest horizon the dashboard can show, in trading days
+        lstm_epochs: training epochs when no stored LSTM matches the data (default: the
+            shared train default, so models from `train` are reused)
+        """
+        self.ingestion = ingestion
+        self.model_store = model_store
+        self.tickers = list(tickers)
+        self.models = list(models)
+        self.forecast_steps = forecast_steps
+        self.lstm_epochs = lstm_epochs
+        self.explain = explain
+        self.frontier_points = frontier_points
+
+    def _forecast(self, kind: str, ticker: str, series: pd.Series) -> Dict[str, Any]:
+        train_params = {'epochs': self.lstm_epochs} if kind == 'lstm' and self.lstm_epochs else {}
+        model = self.model_store.load_or_train(kind, ticker, series, train_params=train_params)
+        if kind == 'arima':
+            values = np.asarray(model.predict(self.forecast_steps))
+        else:
+            values = model.forecast_from_history(series, np.array([len(series)]), steps=self.forecast_steps)[0]
+        dates = pd.bdate_range(series.index[-1] + pd.Timedelta(days=1), periods=self.forecast_steps)
+        section = {'forecast': _series(pd.Series(values, index=dates))}
+        if kind == 'lstm' and self.explain:
+            section['shap'] = self._explain(model, series)
+        return section
+
+    def _explain(self, model, series: pd.Series) -> Dict[str, List[float]]:
+        from src.explainability import ModelExplainer, feature_importance, temporal_importance
+        from src.windows import to_model_input
+        sample = model.scaler.transform(series.values[-500:].reshape(-1, 1))
+        X_background, _ = model._prepare_sequences(sample)
+        X_background = to_model_input(X_background)
+        explainer = ModelExplainer.for_model(model.model, X_background, budget=50)
+        values = explainer.explain(X_background[-21:], time_budget=5.0)
+        return {'feature_importance': feature_importance(values).tolist(),
+                'temporal_importance': temporal_importance(values).tolist(),
+                'explained': explainer.explained}
+
+    def _optimize(self, prices: pd.DataFrame) -> Dict[str, Any]:
+        from src.optimization import PortfolioOptimizer
+        optimizer = PortfolioOptimizer(prices)
+        weights = optimizer.optimize_performance()
+        frontier = optimizer.efficient_frontier(n_points=self.frontier_points)
+        equal = optimizer.get_performance({t: 1.0 / len(prices.columns) for t in prices.columns})
+        return {
+            'weights': weights,
+            'performance': list(optimizer.get_performance(weights)),
+            'equal_weight': list(equal),
+            'frontier': {'returns': np.nan_to_num(frontier.returns).tolist(),
+                         'volatilities': np.nan_to_num(frontier.volatilities).tolist(),
+                         'sharpe': np.nan_to_num(frontier.sharpe).tolist()},
+        }
+
+    def build(self) -> Dict[str, Any]:
+        """
+        Snapshot of the current data. A failing section is recorded under 'errors'
+        and the rest is still published.
+        """
+        version = self.ingestion.store.version()
+        prices = self.ingestion.load_processed(self.tickers)
+        snapshot = {'schema': SNAPSHOT_SCHEMA, 'version': version, 'created': time.time(),
+                    'created_ns': time.time_ns(), 'tickers': self.tickers, 'errors': {},
+                    'cards': {}, 'history': {}, 'models': {}, 'optimization': None}
+
+        with span("snapshot.build", tickers=len(self.tickers), rows=len(prices)):
+            last, change = latest_change(PricePanel.from_frame(prices[self.tickers], dtype=np.float64))
+            for i, ticker in enumerate(self.tickers):
+                series = prices[ticker].dropna()
+                snapshot['history'][ticker] = _series(series)
+                snapshot['cards'][ticker] = {'price': float(last[i]), 'change_pct': float(change[i])}
+                snapshot['models'][ticker] = {}
+                for kind in self.models:
+                    try:
+                        with span("snapshot.forecast", ticker=ticker, model=kind):
+                            snapshot['models'][ticker][kind] = self._forecast(kind, ticker, series)
+                    except Exception as e:
+                        snapshot['errors'][f"{ticker}/{kind}"] = repr(e)
+                        logger.error(f"❌ {kind.upper()} snapshot section failed for {ticker}: {e}")
+            try:
+                with span("snapshot.optimize", tickers=len(self.tickers)):
+                    snapshot['optimization'] = self._optimize(prices[self.tickers].dropna())
+            except Exception as e:
+                snapshot['errors']['optimization'] = repr(e)
+                logger.error(f"❌ Optimization snapshot section failed: {e}")
+        snapshot['build_seconds'] = time.time() - snapshot['created']
+        return snapshot
+
+class SnapshotWorker:
+    """
+    Processes 'snapshot' jobs from the queue. With watch=True it also polls the
+    price store and queues a job whenever its version moves past the published one.
+    """
+
+    def __init__(self, queue: JobQueue, builder: SnapshotBuilder, snapshots: SnapshotStore,
+                 poll_interval: float = 5.0, watch: bool = True):
+        self.queue = queue
+        self.builder = builder
+        self.snapshots = snapshots
+        self.poll_interval = poll_interval
+        self.watch = watch
+        self.stop_event = threading.Event()
+
+    def request_refresh(self) -> Optional[int]:
+        """Queue a snapshot job if the data changed since the published snapshot"""
+        version = self.builder.ingestion.store.version()
+        if version == "missing" or version == self.snapshots.latest_version():
+            return None
+        return self.queue.enqueue("snapshot", {'version': version})
+
+    def run_once(self) -> bool:
+        """Process one queued job; False if the queue was empty"""
+        job = self.queue.claim()
+        if job is None:
+            return False
+        try:
+            if job['kind'] != "snapshot":
+                raise ValueError(f"Unknown job kind '{job['kind']}'")
+            # Jobs queued for an older version are served by building from the current data
+            if self.builder.ingestion.store.version() != self.snapshots.latest_version():
+                snapshot = self.builder.build()
+                path = self.snapshots.publish(snapshot)
+                logger.info(f"📦 Published snapshot {snapshot['version']} in {snapshot['build_seconds']:.1f}s -> {path}")
+            self.queue.finish(job['id'])
+        except Exception as e:
+            self.queue.finish(job['id'], error=repr(e))
+            logger.error(f"❌ Job {job['id']} failed: {e}")
+        return True
+
+    def run(self):
+        """Work until stop() is called"""
+        self.queue.requeue_stale()
+        while not self.stop_event.is_set():
+            if self.watch:
+                self.request_refresh()
+            if not self.run_once():
+                self.stop_event.wait(self.poll_interval)
+
+    def stop(self):
+        self.stop_event.set()
@@ -0,0 +1,237 @@
+from typing import List, Dict, Optional, Type
+import pandas as pd
+import numpy as np
+import hashlib
+import json
+import os
+import re
+
+def data_fingerprint(data) -> str:
+    """Stable hash of a Series/DataFrame's index, values and column names"""
+    digest = hashlib.sha256(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+    if isinstance(data, pd.DataFrame):
+        digest.update(json.dumps([str(c) for c in data.columns]).encode())
+    return digest.hexdigest()
+
+class PriceStore:
+    """Base class for processed price storage backends"""
+    EXTENSION = ""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def version(self) -> str:
+        """
+        Cheap token that changes whenever the stored data changes (file sizes and
+        modification times), for keying caches without reading the data
+        """
+        if not self.exists():
+            return "missing"
+        paths = [self.path]
+        if os.path.isdir(self.path):
+            paths = sorted(os.path.join(self.path, name) for name in os.listdir(self.path))
+        stats = [(os.path.basename(p), os.stat(p).st_size, os.stat(p).st_mtime_ns) for p in paths]
+        return hashlib.sha256(json.dumps(stats).encode()).hexdigest()[:16]
+
+    def write(self, df: pd.DataFrame):
+        """Persist a price frame with dates as index and tickers as columns"""
+        raise NotImplementedError
+
+    def read(self, tickers: Optional[List[str]] = None, start: Optional[str] = None,
+             end: Optional[str] = None) -> pd.DataFrame:
+        """
+        Load prices for the requested tickers between start and end (both inclusive).
+        None means all tickers / unbounded range.
+        """
+        raise NotImplementedError
+
+    def append(self, df: pd.DataFrame):
+        """
+        Add rows dated after the stored history. The generic fallback rewrites the
+        whole store; backends that can extend in place override it.
+        """
+        if not self.exists():
+            self.write(df)
+            return
+        existing = self.read()
+        self.write(pd.concat([existing, df[existing.columns]]))
+
+    def _ensure_parent(self):
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+
+class CSVStore(PriceStore):
+    """Plain CSV storage, kept for interoperability and exports"""
+    EXTENSION = ".csv"
+
+    def write(self, df: pd.DataFrame):
+        self._ensure_parent()
+        df.to_csv(self.path)
+
+    def append(self, df: pd.DataFrame):
+        if not self.exists():
+            self.write(df)
+            return
+        columns = pd.read_csv(self.path, nrows=0).columns[1:]
+        df[list(columns)].to_csv(self.path, mode='a', header=False)
+
+    def read(self, tickers: Optional[List[str]] = None, start: Optional[str] = None,
+             end: Optional[str] = None) -> pd.DataFrame:
+        # CSV has no random access, but restricting columns still skips float parsing
+        usecols = None
+        if tickers is not None:
+            index_col = pd.read_csv(self.path, nrows=0).columns[0]
+            usecols = [index_col] + list(tickers)
+        df = pd.read_csv(self.path, index_col=0, parse_dates=True, usecols=usecols)
+        if tickers is not None:
+            df = df[list(tickers)]
+        return df.loc[start:end]
+
+class ParquetStore(PriceStore):
+    """Columnar Parquet storage with column and row-group pruning (requires pyarrow)"""
+    EXTENSION = ".parquet"
+
+    def write(self, df: pd.DataFrame):
+        self._ensure_parent()
+        df.to_parquet(self.path)
+
+    def read(self, tickers: Optional[List[str]] = None, start: Optional[str] = None,
+             end: Optional[str] = None) -> pd.DataFrame:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("The parquet storage backend requires pyarrow: pip install pyarrow") from e
+
+        index_name = pq.read_schema(self.path).pandas_metadata['index_columns'][0]
+        filters = []
+        if start is not None:
+            filters.append((index_name, '>=', pd.Timestamp(start)))
+        if end is not None:
+            filters.append((index_name, '<=', pd.Timestamp(end)))
+        columns = None if tickers is None else list(tickers)
+        return pd.read_parquet(self.path, columns=columns, filters=filters or None)
+
+class NumpyStore(PriceStore):
+    """
+    Memory-mapped NumPy layout: a directory holding a (tickers, dates) value matrix,
+    an int64 date index and the ticker list. Each ticker's history is contiguous,
+    so selecting tickers and a date range only touches the pages that are needed.
+    Appended bars go to small row-major tail files and are folded into the main
+    matrix once the tail reaches COMPACT_ROWS.
+
+    Every write() produces a new generation of data files; meta.json names the
+    current one and is replaced last, so readers never pair a matrix with the
+    wrong tickers or dtype. The previous generation is kept for readers that
+    loaded the old meta just before the swap.
+    """
+    EXTENSION = ".npy"
+    COMPACT_ROWS = 256
+    _DATA_FILE = re.compile(r"^(?:tail_)?(?:values|dates)(?:-(\d+))?\.(?:npy|bin)$")
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _meta(self) -> dict:
+        with open(self._file("meta.json")) as f:
+            return json.load(f)
+
+    @staticmethod
+    def _names(meta: dict) -> Dict[str, str]:
+        """Data files of the generation meta points at; stores written before generations use plain names"""
+        suffix = f"-{meta['generation']}" if 'generation' in meta else ""
+        return {'values': f"values{suffix}.npy", 'dates': f"dates{suffix}.npy",
+                'tail_values': f"tail_values{suffix}.bin", 'tail_dates': f"tail_dates{suffix}.bin"}
+
+    def write(self, df: pd.DataFrame):
+        os.makedirs(self.path, exist_ok=True)
+        previous = self._meta().get('generation') if os.path.exists(self._file("meta.json")) else None
+        generation = (previous or 0) + 1
+        # float32 frames stay float32 on disk; anything else is stored as float64
+        dtype = np.float32 if len(df.columns) and all(t == np.float32 for t in df.dtypes) else np.float64
+        meta = {'tickers': [str(c) for c in df.columns], 'index_name': df.index.name,
+                'dtype': np.dtype(dtype).name, 'generation': generation}
+        names = self._names(meta)
+        values = np.ascontiguousarray(df.to_numpy(dtype=dtype).T)
+        dates = df.index.values.astype('datetime64[ns]').astype(np.int64)
+        for name, array in ((names['values'], values), (names['dates'], dates)):
+            with open(self._file(name + ".tmp"), "wb") as f:
+                np.save(f, array)
+            os.replace(self._file(name + ".tmp"), self._file(name))
+        # Commit point: until meta.json is replaced, readers keep using the previous generation
+        with open(self._file("meta.json.tmp"), "w") as f:
+            json.dump(meta, f)
+        os.replace(self._file("meta.json.tmp"), self._file("meta.json"))
+
+        for name in os.listdir(self.path):
+            match = self._DATA_FILE.match(name)
+            if match and (int(match.group(1)) if match.group(1) else None) not in (generation, previous):
+                os.remove(self._file(name))
+
+    def _read_tail(self, names: Dict[str, str], n_tickers: int, dtype: str = 'float64'):
+        if not os.path.exists(self._file(names['tail_dates'])):
+            return np.empty(0, dtype=np.int64), np.empty((0, n_tickers), dtype=dtype)
+        dates = np.fromfile(self._file(names['tail_dates']), dtype=np.int64)
+        values = np.fromfile(self._file(names['tail_values']), dtype=dtype)
+        # An append in progress may have written part of a bar; only complete rows are read
+        rows = min(len(dates), len(values) // n_tickers)
+        return dates[:rows], values[:rows * n_tickers].reshape(rows, n_tickers)
+
+    def append(self, df: pd.DataFrame):
+        if not self.exists():
+            self.write(df)
+            return
+        meta = self._meta()
+        names = self._names(meta)
+        tickers = meta['tickers']
+        values = np.ascontiguousarray(df[tickers].to_numpy(dtype=meta.get('dtype', 'float64')))
+        dates = df.index.values.astype('datetime64[ns]').astype(np.int64)
+        with open(self._file(names['tail_values']), "ab") as f:
+            values.tofile(f)
+        with open(self._file(names['tail_dates']), "ab") as f:
+            dates.tofile(f)
+        if os.path.getsize(self._file(names['tail_dates'])) // 8 >= self.COMPACT_ROWS:
+            self.write(self.read())
+
+    def read(self, tickers: Optional[List[str]] = None, start: Optional[str] = None,
+             end: Optional[str] = None) -> pd.DataFrame:
+        meta = self._meta()
+        names = self._names(meta)
+        values = np.load(self._file(names['values']), mmap_mode='r')
+        dates = np.load(self._file(names['dates']), mmap_mode='r')
+        all_tickers = meta['tickers']
+        tail_dates, tail_values = self._read_tail(names, len(all_tickers), meta.get('dtype', 'float64'))
+
+        def bounds(index):
+            lo = 0 if start is None else int(np.searchsorted(index, pd.Timestamp(start).value, side='left'))
+            hi = len(index) if end is None else int(np.searchsorted(index, pd.Timestamp(end).value, side='right'))
+            return lo, hi
+
+        if tickers is None:
+            tickers = all_tickers
+        rows = [all_tickers.index(t) for t in tickers]
+
+        lo, hi = bounds(dates)
+        block = np.asarray(values[rows, lo:hi]).T
+        index = np.asarray(dates[lo:hi])
+        if len(tail_dates):
+            tail_lo, tail_hi = bounds(tail_dates)
+            block = np.vstack([block, tail_values[tail_lo:tail_hi, rows]])
+            index = np.concatenate([index, tail_dates[tail_lo:tail_hi]])
+        index = pd.DatetimeIndex(index.view('datetime64[ns]'), name=meta['index_name'])
+        return pd.DataFrame(block, index=index, columns=list(tickers))
+
+STORAGE_BACKENDS: Dict[str, Type[PriceStore]] = {
+    'csv': CSVStore,
+    'parquet': ParquetStore,
+    'npy': NumpyStore,
+}
+
+def create_store(backend: str, path: str) -> PriceStore:
+    """Instantiate a storage backend by name"""
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend '{backend}'. Choose from {sorted(STORAGE_BACKENDS)}")
+    return STORAGE_BACKENDS[backend](path)
@@ -0,0 +1,248 @@
+from collections import deque
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+import asyncio
+import json
+import os
+import pandas as pd
+import numpy as np
+from src.estimators import RollingMomentEstimator, TRADING_DAYS
+from src.storage import PriceStore
+
+Bar = Tuple[pd.Timestamp, Dict[str, float]]
+
+class BarSource:
+    """Base class for live price sources: an async stream of (timestamp, {ticker: price}) bars"""
+
+    def bars(self) -> AsyncIterator[Bar]:
+        raise NotImplementedError
+
+class ReplaySource(BarSource):
+    """Replays the rows of a price frame, optionally paced by interval seconds"""
+
+    def __init__(self, prices: pd.DataFrame, interval: float = 0.0):
+        self.prices = prices
+        self.interval = interval
+
+    async def bars(self) -> AsyncIterator[Bar]:
+        columns = list(self.prices.columns)
+        for timestamp, row in zip(self.prices.index, self.prices.to_numpy(dtype=np.float64)):
+            yield pd.Timestamp(timestamp), dict(zip(columns, row))
+            await asyncio.sleep(self.interval)
+
+class FileTailSource(BarSource):
+    """
+    Follows a CSV file (a date column followed by one column per ticker) that another
+    process appends bars to. Only complete lines are emitted; the stream ends after
+    idle_timeout seconds without new data (None waits forever).
+    """
+
+    def __init__(self, path: str, poll_interval: float = 1.0, idle_timeout: Optional[float] = None,
+                 from_start: bool = False):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.from_start = from_start
+
+    async def bars(self) -> AsyncIterator[Bar]:
+        idle = 0.0
+        while not os.path.exists(self.path):
+            if self.idle_timeout is not None and idle >= self.idle_timeout:
+                return
+            await asyncio.sleep(self.poll_interval)
+            idle += self.poll_interval
+
+        with open(self.path) as f:
+            columns = f.readline().strip().split(',')[1:]
+            if not self.from_start:
+                f.seek(0, os.SEEK_END)
+            partial, idle = "", 0.0
+            while True:
+                line = f.readline()
+                if not line:
+                    if self.idle_timeout is not None and idle >= self.idle_timeout:
+                        return
+                    await asyncio.sleep(self.poll_interval)
+                    idle += self.poll_interval
+                    continue
+                idle = 0.0
+                partial += line
+                if not partial.endswith('\n'):
+                    continue
+                fields, partial = partial.strip().split(','), ""
+                if len(fields) == len(columns) + 1:
+                    yield pd.Timestamp(fields[0]), dict(zip(columns, map(float, fields[1:])))
+
+class StreamingPipeline:
+    """
+    Consumes bars from a BarSource and keeps prices, rolling moments, metric cards
+    and model forecasts current without revisiting the full history.
+
+    Three asyncio tasks run concurrently:
+      - the producer reads the source into a bounded queue and waits when it is full,
+        so a fast source is throttled rather than buffered without limit;
+      - the ingester drains the queue in batches, appends each batch to the store,
+        folds it into a RollingMomentEstimator and publishes a metrics snapshot;
+      - the forecaster extends each model with the bars that arrived since its
+        last run, in a worker thread, so a slow model only delays its own refresh.
+    Subscribers get snapshots through single-slot queues that drop stale snapshots,
+    so a slow reader never holds up ingestion.
+    """
+
+    def __init__(self, source: BarSource, history: pd.DataFrame, store: Optional[PriceStore] = None,
+                 window: Optional[int] = TRADING_DAYS, queue_size: int = 1024, batch_size: int = 64,
+                 forecasters: Optional[Dict[str, object]] = None, forecast_steps: int = 5,
+                 snapshot_path: Optional[str] = None):
+        """
+        history: price frame the estimator is seeded with (tickers as columns)
+        window: rolling window of the moment estimator in bars (None = expanding)
+        forecasters: {ticker: model}; ARIMAModel-like models are extended with update(),
+        LSTMForecaster-like models forecast from the most recent bars
+        snapshot_path: optional JSON file rewritten with every snapshot (read by the dashboard)
+        """
+        history = history.dropna()
+        self.source = source
+        self.store = store
+        self.tickers = list(history.columns)
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.forecasters = forecasters or {}
+        self.forecast_steps = forecast_steps
+        self.snapshot_path = snapshot_path
+
+        self.estimator = RollingMomentEstimator.from_prices(history, window)
+        values = history.to_numpy(dtype=np.float64)
+        self.last_timestamp = history.index[-1]
+        self.last_prices, self.previous_prices = values[-1], values[-2]
+        # Enough recent bars for any sequence model to form its input window
+        depth = max([getattr(m, 'window', 0) for m in self.forecasters.values()] + [1])
+        self.recent = deque(values[-depth:], maxlen=depth)
+        self.forecasts: Dict[str, np.ndarray] = {}
+        self.stats = {'bars': 0, 'batches': 0, 'forecast_runs': 0, 'max_queue': 0, 'dropped_snapshots': 0}
+
+        self._subscribers: List[asyncio.Queue] = []
+        self._pending: List[np.ndarray] = []
+        self._listeners: List[Callable[[Dict], None]] = []
+        self._closed = False
+
+    def subscribe(self) -> asyncio.Queue:
+        """Queue that always holds the latest snapshot; older unread snapshots are discarded"""
+        queue = asyncio.Queue(maxsize=1)
+        self._subscribers.append(queue)
+        return queue
+
+    def add_listener(self, callback: Callable[[Dict], None]):
+        """Call callback(snapshot) synchronously after every batch"""
+        self._listeners.append(callback)
+
+    def snapshot(self) -> Dict:
+        """Metric cards, annualised moments and latest forecasts as plain JSON-serialisable values"""
+        change = (self.last_prices / self.previous_prices - 1) * 100
+        volatility = np.sqrt(np.diag(self.estimator.covariance().to_numpy()))
+        expected = self.estimator.expected_returns().to_numpy()
+        return {
+            'timestamp': str(self.last_timestamp),
+            'cards': {t: {'price': float(p), 'change_pct': float(c)}
+                      for t, p, c in zip(self.tickers, self.last_prices, change)},
+            'expected_returns': dict(zip(self.tickers, expected.tolist())),
+            'volatility': dict(zip(self.tickers, volatility.tolist())),
+            'forecasts': {t: np.asarray(f).tolist() for t, f in self.forecasts.items()},
+            'stats': dict(self.stats),
+        }
+
+    def _publish(self):
+        snapshot = self.snapshot()
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+                self.stats['dropped_snapshots'] += 1
+            queue.put_nowait(snapshot)
+        for callback in self._listeners:
+            callback(snapshot)
+        if self.snapshot_path:
+            tmp = self.snapshot_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp, self.snapshot_path)
+
+    def _apply_batch(self, batch: List[Bar]):
+        """Fold a batch of bars into the running state (O(batch * N^2), independent of history length)"""
+        # Late or duplicate bars would corrupt the return series
+        batch = [bar for bar in batch if bar[0] > self.last_timestamp]
+        if not batch:
+            return None
+        index = pd.DatetimeIndex([timestamp for timestamp, _ in batch], name='Date')
+        rows = np.array([[prices.get(t, np.nan) for t in self.tickers] for _, prices in batch])
+        # Carry the last price forward for tickers missing from a bar
+        for i in range(len(rows)):
+            previous = rows[i - 1] if i else self.last_prices
+            rows[i] = np.where(np.isnan(rows[i]), previous, rows[i])
+
+        for row in rows:
+            self.estimator.update_prices(row)
+        self.previous_prices = rows[-2] if len(rows) > 1 else self.last_prices
+        self.last_prices, self.last_timestamp = rows[-1], index[-1]
+        self.recent.extend(rows)
+        self.stats['bars'] += len(rows)
+        self.stats['batches'] += 1
+        return pd.DataFrame(rows, index=index, columns=self.tickers)
+
+    async def _produce(self, queue: asyncio.Queue):
+        try:
+            async for bar in self.source.bars():
+                await queue.put(bar)
+                self.stats['max_queue'] = max(self.stats['max_queue'], queue.qsize())
+        finally:
+            await queue.put(None)
+
+    async def _ingest(self, queue: asyncio.Queue, wake: asyncio.Event):
+        done = False
+        while not done:
+            batch = [await queue.get()]
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            if batch[-1] is None:
+                batch.pop()
+                done = True
+
+            frame = self._apply_batch(batch)
+            if frame is not None:
+                if self.store is not None:
+                    await asyncio.to_thread(self.store.append, frame)
+                self._pending.append(frame.to_numpy())
+                wake.set()
+                self._publish()
+        self._closed = True
+        wake.set()
+
+    def _refresh_forecasts(self, new_rows: np.ndarray, recent: np.ndarray):
+        for ticker, model in self.forecasters.items():
+            j = self.tickers.index(ticker)
+            if hasattr(model, 'update'):
+                model.update(new_rows[:, j])
+                self.forecasts[ticker] = np.asarray(model.predict(self.forecast_steps))
+            else:
+                self.forecasts[ticker] = model.forecast_from_history(recent[:, j:j + 1], np.array([len(recent)]),
+                                                                     steps=self.forecast_steps)[0]
+
+    async def _forecast(self, wake: asyncio.Event):
+        while True:
+            await wake.wait()
+            wake.clear()
+            if self._pending and self.forecasters:
+                # Everything that arrived while the previous refresh ran is handled in one go
+                new_rows, self._pending = np.vstack(self._pending), []
+                await asyncio.to_thread(self._refresh_forecasts, new_rows, np.array(self.recent))
+                self.stats['forecast_runs'] += 1
+                self._publish()
+            else:
+                self._pending = []
+            if self._closed and not self._pending:
+                return
+
+    async def run(self) -> Dict:
+        """Stream until the source is exhausted; returns the final snapshot"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        wake = asyncio.Event()
+        self._closed = False
+        await asyncio.gather(self._produce(queue), self._ingest(queue, wake), self._forecast(wake))
+        return self.snapshot()
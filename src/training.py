@@ -0,0 +1,123 @@
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Sequence
+import multiprocessing
+import logging
+import pandas as pd
+import os
+import shutil
+import time
+from src.model_store import ModelStore
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class TrainingResult:
+    """Outcome of training one model for one ticker"""
+    ticker: str
+    model_type: str
+    seconds: float
+    key: Optional[str] = None
+    cached: bool = False
+    error: Optional[str] = None
+
+def _configure_tf_threads(intra_op: int, inter_op: int):
+    """Process-pool initializer pinning TensorFlow thread pools before the runtime starts"""
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+    tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+
+def _train_job(model_type: str, ticker: str, data: pd.Series, model_params: Dict[str, Any],
+               train_params: Dict[str, Any], path: str) -> float:
+    """Fit one model in a worker process and save it into a staging directory of the store"""
+    from src.models import MODEL_TYPES
+    start = time.perf_counter()
+    model = MODEL_TYPES[model_type](ticker, **model_params)
+    model.train(data, **train_params)
+    model.save(path)
+    return time.perf_counter() - start
+
+class TrainingOrchestrator:
+    """
+    Trains forecasting models for a whole ticker universe.
+    ARIMA fits are spread across a process pool (statsmodels is single-threaded per fit);
+    LSTM jobs run in a separate pool whose workers share the cores through fixed
+    TensorFlow intra-op/inter-op thread counts.
+    """
+
+    def __init__(self, store: ModelStore, arima_workers: Optional[int] = None, lstm_workers: int = 1,
+                 tf_inter_op_threads: int = 1,
+                 model_params: Optional[Dict[str, Dict[str, Any]]] = None,
+                 train_params: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        model_params / train_params: per model type ('arima', 'lstm') constructor
+        and train() keyword arguments
+        """
+        cores = os.cpu_count() or 1
+        self.store = store
+        self.arima_workers = arima_workers or cores
+        self.lstm_workers = max(1, lstm_workers)
+        # Split the cores between concurrent LSTM jobs so they never oversubscribe
+        self.tf_intra_op_threads = max(1, cores // self.lstm_workers)
+        self.tf_inter_op_threads = tf_inter_op_threads
+        self.model_params = model_params or {}
+        self.train_params = train_params or {}
+
+    def _make_pool(self, model_type: str) -> ProcessPoolExecutor:
+        # Spawn so workers never inherit an already-initialized TensorFlow runtime
+        context = multiprocessing.get_context("spawn")
+        if model_type == 'lstm':
+            return ProcessPoolExecutor(max_workers=self.lstm_workers, mp_context=context,
+                                       initializer=_configure_tf_threads,
+                                       initargs=(self.tf_intra_op_threads, self.tf_inter_op_threads))
+        return ProcessPoolExecutor(max_workers=self.arima_workers, mp_context=context)
+
+    def _run_model_type(self, model_type: str, prices: pd.DataFrame, tickers: Sequence[str]) -> List[TrainingResult]:
+        model_params = self.model_params.get(model_type, {})
+        train_params = self.train_params.get(model_type, {})
+        results = []
+        pending = {}
+
+        for ticker in tickers:
+            data = prices[ticker].dropna()
+            key = self.store.key_for(model_type, ticker, data, model_params, train_params)
+            if key in self.store:
+                results.append(TrainingResult(ticker, model_type, 0.0, key=key, cached=True))
+            else:
+                pending[ticker] = (key, data)
+
+        if not pending:
+            return results
+
+        with self._make_pool(model_type) as pool:
+            futures = {}
+            for ticker, (key, data) in pending.items():
+                staged = self.store.staging_path(key)
+                futures[pool.submit(_train_job, model_type, ticker, data, model_params, train_params,
+                                    staged)] = (ticker, key, staged)
+            for future in as_completed(futures):
+                ticker, key, staged = futures[future]
+                try:
+                    seconds = future.result()
+                    self.store.register(key, ticker, model_type, staged=staged)
+                    results.append(TrainingResult(ticker, model_type, seconds, key=key))
+                    logger.info(f"✅ Trained {model_type.upper()} for {ticker} in {seconds:.1f}s")
+                except Exception as e:
+                    shutil.rmtree(staged, ignore_errors=True)
+                    results.append(TrainingResult(ticker, model_type, 0.0, key=key, error=repr(e)))
+                    logger.error(f"❌ {model_type.upper()} training failed for {ticker}: {e}")
+        return results
+
+    def run(self, prices: pd.DataFrame, model_types: Sequence[str] = ('arima', 'lstm'),
+            tickers: Optional[Sequence[str]] = None) -> List[TrainingResult]:
+        """Train every requested model type for every ticker column in prices"""
+        tickers = list(tickers) if tickers is not None else list(prices.columns)
+        results = []
+        for model_type in model_types:
+            results.extend(self._run_model_type(model_type, prices, tickers))
+        return results
+
+def summarize(results: List[TrainingResult]) -> pd.DataFrame:
+    """Per-ticker timing and failure report"""
+    report = pd.DataFrame([vars(r) for r in results], columns=list(TrainingResult.__dataclass_fields__))
+    return report.sort_values(['model_type', 'ticker']).reset_index(drop=True)
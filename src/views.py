@@ -0,0 +1,223 @@
+"""
+Forecast-driven expected returns.
+
+Every ticker's model forecasts the price `horizon` trading days ahead, and the
+forecast becomes an annualised absolute view. Optionally, re-forecasting from
+earlier origins measures the forecast error, which becomes the view uncertainty.
+The views are blended with the historical prior Black-Litterman style, and the
+posterior feeds PortfolioOptimizer.
+"""
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import numpy as np
+import pandas as pd
+from src.estimators import TRADING_DAYS
+from src.instrumentation import span
+from src.storage import data_fingerprint
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ForecastViews:
+    """
+    expected_returns: annualised return implied by each ticker's forecast
+    error_covariance: annualised covariance of the horizon forecast errors across
+        backtest origins (None unless origins were evaluated)
+    """
+    expected_returns: pd.Series
+    horizon: int
+    model_type: str
+    error_covariance: Optional[pd.DataFrame] = None
+    failed: Tuple[str, ...] = ()
+
+    @property
+    def error_variance(self) -> Optional[pd.Series]:
+        if self.error_covariance is None:
+            return None
+        return pd.Series(np.diag(self.error_covariance), index=self.error_covariance.index)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'expected_returns': self.expected_returns.to_dict(),
+            'horizon': self.horizon,
+            'model_type': self.model_type,
+            'error_covariance': None if self.error_covariance is None else self.error_covariance.to_dict(),
+            'failed': list(self.failed),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ForecastViews":
+        cov = data['error_covariance']
+        return cls(pd.Series(data['expected_returns'], dtype=float), data['horizon'], data['model_type'],
+                   None if cov is None else pd.DataFrame(cov), tuple(data['failed']))
+
+def _annualise(growth: np.ndarray, horizon: int) -> np.ndarray:
+    """Compound a horizon gross return to an annual rate, like mean_historical_return"""
+    return np.asarray(growth) ** (TRADING_DAYS / horizon) - 1
+
+def _forecast_price(model_type: str, ticker: str, series: pd.Series, horizon: int,
+                    train_params: Dict[str, Any]) -> float:
+    """Fit a model on series and return its price forecast `horizon` steps ahead"""
+    from src.models import MODEL_TYPES
+    model = MODEL_TYPES[model_type](ticker)
+    model.train(series, **train_params)
+    if model_type == 'lstm':
+        path = model.forecast_from_history(series, np.array([len(series)]), steps=horizon)[0]
+    else:
+        path = np.asarray(model.predict(horizon))
+    return float(path[-1])
+
+def _forecast_chunk(model_type: str, chunk: pd.DataFrame, horizon: int, train_params: Dict[str, Any],
+                    origins: int) -> List[Tuple[str, Optional[float], Optional[np.ndarray], Optional[str]]]:
+    """
+    Views for one chunk of tickers: (ticker, annualised view, horizon forecast errors
+    at each backtest origin, error message)
+    """
+    results = []
+    for ticker in chunk.columns:
+        series = chunk[ticker].dropna()
+        try:
+            view = _annualise(_forecast_price(model_type, ticker, series, horizon, train_params)
+                              / series.iloc[-1], horizon)
+            errors = None
+            if origins:
+                errors = np.empty(origins)
+                for k in range(origins):
+                    end = len(series) - (k + 1) * horizon
+                    history = series.iloc[:end]
+                    predicted = _forecast_price(model_type, ticker, history, horizon, train_params)
+                    errors[k] = (predicted - series.iloc[end + horizon - 1]) / history.iloc[-1]
+            results.append((ticker, float(view), errors, None))
+        except Exception as e:
+            results.append((ticker, None, None, repr(e)))
+    return results
+
+class ForecastViewGenerator:
+    """
+    Runs a forecasting model over a whole universe in parallel chunks of tickers
+    and caches the resulting views per data version.
+    """
+
+    _cache: "OrderedDict[str, ForecastViews]" = OrderedDict()
+    CACHE_SIZE = 8
+
+    def __init__(self, model_type: str = 'arima', horizon: int = 21, train_params: Optional[Dict[str, Any]] = None,
+                 origins: int = 0, chunk_size: int = 8, n_jobs: int = 1, cache_dir: Optional[str] = None):
+        """
+        horizon: forecast horizon in trading days
+        train_params: keyword arguments for the model's train()
+        origins: earlier forecast origins (spaced one horizon apart) used to measure
+            forecast errors; 0 skips the error estimate
+        chunk_size: tickers per worker task
+        cache_dir: also persist views as JSON here, so they survive restarts
+        """
+        self.model_type = model_type
+        self.horizon = horizon
+        self.train_params = train_params or {}
+        self.origins = origins
+        self.chunk_size = chunk_size
+        self.n_jobs = n_jobs
+        self.cache_dir = cache_dir
+
+    def cache_key(self, prices: pd.DataFrame) -> str:
+        config = json.dumps([self.model_type, self.horizon, self.origins, self.train_params], sort_keys=True)
+        return hashlib.sha256(f"{data_fingerprint(prices)}:{config}".encode()).hexdigest()[:16]
+
+    def _cache_path(self, key: str) -> Optional[str]:
+        return os.path.join(self.cache_dir, f"views-{key}.json") if self.cache_dir else None
+
+    def _cached(self, key: str) -> Optional[ForecastViews]:
+        views = self._cache.get(key)
+        path = self._cache_path(key)
+        if views is None and path and os.path.exists(path):
+            with open(path) as f:
+                views = ForecastViews.from_dict(json.load(f))
+        if views is not None:
+            self._remember(key, views)
+        return views
+
+    def _remember(self, key: str, views: ForecastViews):
+        self._cache[key] = views
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def generate(self, prices: pd.DataFrame) -> ForecastViews:
+        """Views for every ticker column of prices, served from cache when the data is unchanged"""
+        key = self.cache_key(prices)
+        cached = self._cached(key)
+        if cached is not None:
+            logger.info(f"♻️  Loaded cached {self.model_type} views for {len(cached.expected_returns)} tickers")
+            return cached
+
+        min_length = (self.origins + 1) * self.horizon + 30
+        chunks = [prices.iloc[:, lo:lo + self.chunk_size] for lo in range(0, prices.shape[1], self.chunk_size)]
+        rows = []
+        with span("views.forecast", tickers=prices.shape[1], model=self.model_type, horizon=self.horizon,
+                  origins=self.origins, chunks=len(chunks)):
+            if prices.dropna(how='all').shape[0] < min_length:
+                raise ValueError(f"Need at least {min_length} observations for horizon {self.horizon} "
+                                 f"and {self.origins} origins.")
+            if self.n_jobs == 1 or len(chunks) == 1:
+                for chunk in chunks:
+                    rows.extend(_forecast_chunk(self.model_type, chunk, self.horizon, self.train_params, self.origins))
+            else:
+                # Spawn so workers never inherit an already-initialized TensorFlow runtime
+                context = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=self.n_jobs, mp_context=context) as pool:
+                    futures = [pool.submit(_forecast_chunk, self.model_type, chunk, self.horizon,
+                                           self.train_params, self.origins) for chunk in chunks]
+                    for future in as_completed(futures):
+                        rows.extend(future.result())
+
+        order = {t: i for i, t in enumerate(prices.columns)}
+        rows.sort(key=lambda row: order[row[0]])
+        failed = tuple(t for t, view, _, error in rows if view is None)
+        for ticker, _, _, error in rows:
+            if error is not None:
+                logger.error(f"❌ {self.model_type.upper()} view failed for {ticker}: {error}")
+        ok = [row for row in rows if row[1] is not None]
+
+        expected = pd.Series([row[1] for row in ok], index=[row[0] for row in ok], dtype=float)
+        error_cov = None
+        if self.origins and ok:
+            errors = np.column_stack([row[2] for row in ok])
+            # Horizon errors scale to a year like returns of independent horizons
+            cov = np.atleast_2d(errors.T @ errors / len(errors)) * TRADING_DAYS / self.horizon
+            error_cov = pd.DataFrame(cov, index=expected.index, columns=expected.index)
+
+        views = ForecastViews(expected, self.horizon, self.model_type, error_cov, failed)
+        self._remember(key, views)
+        path = self._cache_path(key)
+        if path:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(path + ".tmp", "w") as f:
+                json.dump(views.to_dict(), f)
+            os.replace(path + ".tmp", path)
+        return views
+
+def black_litterman(prior: pd.Series, cov: pd.DataFrame, views: ForecastViews,
+                    tau: float = 0.05) -> Tuple[pd.Series, pd.DataFrame]:
+    """
+    Posterior expected returns and covariance from a prior (e.g. historical means)
+    and forecast views. Measured forecast error variances set the view uncertainty;
+    without them it is proportional to the prior variance (tau * diag(P S P')).
+    """
+    from pypfopt.black_litterman import BlackLittermanModel
+    absolute = views.expected_returns.reindex([t for t in prior.index if t in views.expected_returns.index])
+    if absolute.empty:
+        return prior, cov
+    omega = None
+    if views.error_variance is not None:
+        # Floor the measured variance so a lucky backtest cannot make a view certain
+        variance = np.maximum(views.error_variance[absolute.index].to_numpy(), 1e-6)
+        omega = np.diag(variance)
+    model = BlackLittermanModel(cov, pi=prior, absolute_views=absolute, omega=omega, tau=tau)
+    return model.bl_returns(), model.bl_cov()
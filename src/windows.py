@@ -0,0 +1,74 @@
+from typing import Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+def sliding_windows(data: np.ndarray, window: int, target_col: int = 0,
+                    horizon: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build supervised (X, y) pairs for sequence models without copying.
+    data: (time,) or (time, features)
+    Returns X as a read-only strided view of shape (samples, window, features)
+    and y of shape (samples,), where y[i] is the target value right after X[i].
+    With horizon > 1, y has shape (samples, horizon) and holds the next horizon targets.
+    """
+    data = np.asarray(data)
+    if data.ndim == 1:
+        data = data[:, None]
+    if len(data) < window + horizon:
+        raise ValueError(f"Need at least {window + horizon} observations to build windows, got {len(data)}.")
+
+    # (time - window + 1, features, window) -> drop the trailing windows without a full target
+    samples = len(data) - window - horizon + 1
+    windows = sliding_window_view(data, window, axis=0)[:samples]
+    X = windows.transpose(0, 2, 1)
+    if horizon == 1:
+        y = data[window:, target_col]
+    else:
+        y = sliding_window_view(data[window:, target_col], horizon)
+    return X, y
+
+def last_windows(data: np.ndarray, window: int, ends: np.ndarray) -> np.ndarray:
+    """
+    Gather the input windows ending right before each position in ends.
+    data: (time,) or (time, features); returns (len(ends), window, features).
+    Only the selected windows are copied, not the full window view.
+    """
+    data = np.asarray(data)
+    if data.ndim == 1:
+        data = data[:, None]
+    ends = np.asarray(ends)
+    if ends.min() < window or ends.max() > len(data):
+        raise ValueError(f"Window ends must lie in [{window}, {len(data)}].")
+    windows = sliding_window_view(data, window, axis=0)
+    return windows[ends - window].transpose(0, 2, 1)
+
+def panel_windows(panel: np.ndarray, window: int, target_col: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build windows for many tickers at once from an aligned price panel.
+    panel: (time, tickers) or (time, tickers, features)
+    Returns X as a view of shape (samples, tickers, window, features) and y of shape (samples, tickers).
+    """
+    panel = np.asarray(panel)
+    if panel.ndim == 2:
+        panel = panel[:, :, None]
+    if len(panel) <= window:
+        raise ValueError(f"Need more than {window} observations to build windows, got {len(panel)}.")
+
+    # (time - window + 1, tickers, features, window)
+    windows = sliding_window_view(panel, window, axis=0)[:-1]
+    X = windows.transpose(0, 1, 3, 2)
+    y = panel[window:, :, target_col]
+    return X, y
+
+def to_model_input(X: np.ndarray, dtype=np.float32) -> np.ndarray:
+    """
+    Materialize a window view into the contiguous batch Keras expects.
+    Panel windows (samples, tickers, window, features) are flattened ticker-major
+    into (tickers * samples, window, features). This is the only copy in the pipeline.
+    """
+    if X.ndim == 4:
+        samples, tickers, window, features = X.shape
+        out = np.empty((tickers * samples, window, features), dtype=dtype)
+        out.reshape(tickers, samples, window, features)[...] = X.transpose(1, 0, 2, 3)
+        return out
+    return np.ascontiguousarray(X, dtype=dtype)
@@ -0,0 +1,69 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.analytics import PortfolioAnalytics, latest_change, rolling_sum, turnover
+from src.estimators import TRADING_DAYS
+from src.panel import PricePanel
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(3)
+    dates = pd.bdate_range("2022-01-03", periods=300)
+    returns = rng.normal(0.0004, 0.012, size=(300, 4))
+    returns[:, 1] += 0.8 * returns[:, 0]
+    return pd.DataFrame(100 * np.cumprod(1 + returns, axis=0), index=dates, columns=['SPY', 'AAPL', 'BND', 'GLD'])
+
+@pytest.fixture
+def candidates():
+    return np.random.default_rng(5).dirichlet(np.ones(4), size=50)
+
+def test_rolling_sum_matches_pandas():
+    x = np.random.default_rng(0).normal(size=(40, 3))
+    expected = pd.DataFrame(x).rolling(7).sum().dropna().to_numpy()
+    np.testing.assert_allclose(rolling_sum(x, 7), expected)
+    with pytest.raises(ValueError):
+        rolling_sum(x, 41)
+
+def test_rolling_metrics_match_pandas_for_every_portfolio(prices, candidates):
+    analytics = PortfolioAnalytics.from_prices(prices)
+    rolling = analytics.rolling(candidates, window=21)
+
+    R = pd.DataFrame(prices.pct_change().dropna().to_numpy() @ candidates.T, index=prices.index[1:])
+    spy = prices['SPY'].pct_change().dropna()
+    np.testing.assert_allclose(rolling.volatility, (R.rolling(21).std() * np.sqrt(TRADING_DAYS)).dropna(), rtol=1e-7)
+    np.testing.assert_allclose(rolling.returns, ((1 + R).rolling(21).apply(np.prod) - 1).dropna(), rtol=1e-7)
+    beta = R.rolling(21).cov(spy).div(spy.rolling(21).var(), axis=0).dropna()
+    np.testing.assert_allclose(rolling.beta, beta, rtol=1e-6)
+    assert rolling.dates[0] == prices.index[21] and rolling.frame('sharpe').shape == (len(R) - 20, 50)
+
+def test_evaluate_agrees_with_backtest_summary_conventions(prices):
+    analytics = PortfolioAnalytics.from_prices(prices, benchmark='SPY')
+    weights = {'SPY': 0.5, 'BND': 0.5}
+    row = analytics.evaluate(weights).iloc[0]
+
+    daily = prices[['SPY', 'BND']].pct_change().dropna() @ [0.5, 0.5]
+    growth = (1 + daily).cumprod()
+    annual = growth.iloc[-1] ** (TRADING_DAYS / len(daily)) - 1
+    assert row['annual_return'] == pytest.approx(annual)
+    assert row['volatility'] == pytest.approx(daily.std() * np.sqrt(TRADING_DAYS))
+    assert row['max_drawdown'] == pytest.approx(min((growth / growth.cummax() - 1).min(), 0.0))
+    downside = np.sqrt((np.minimum(daily, 0) ** 2).mean() * TRADING_DAYS)
+    assert row['sortino'] == pytest.approx(annual / downside)
+    assert analytics.evaluate({'SPY': 1.0})['beta'].iloc[0] == pytest.approx(1.0)
+
+def test_turnover_against_held_weights_and_drift(prices, candidates):
+    analytics = PortfolioAnalytics.from_prices(prices)
+    held = np.full(4, 0.25)
+    table = analytics.evaluate(candidates, previous=held)
+    np.testing.assert_allclose(table['turnover'], np.abs(candidates - held).sum(axis=1))
+
+    # After one period where only the first asset doubles, equal weights drift to 2/5, 1/5, 1/5, 1/5
+    drifted = turnover(held, held, returns=np.array([[1.0, 0.0, 0.0, 0.0]]))
+    assert drifted == pytest.approx(2 * (0.4 - 0.25))
+
+def test_latest_change_skips_gaps_per_ticker():
+    dates = pd.bdate_range("2024-01-01", periods=4)
+    frame = pd.DataFrame({'A': [10.0, 11.0, 12.0, 13.2], 'B': [20.0, 25.0, np.nan, np.nan]}, index=dates)
+    price, change = latest_change(PricePanel.from_frame(frame, dtype=np.float64))
+    np.testing.assert_allclose(price, [13.2, 25.0])
+    np.testing.assert_allclose(change, [10.0, 25.0])
@@ -0,0 +1,73 @@
+import pytest
+import numpy as np
+import pandas as pd
+from pypfopt import expected_returns, risk_models
+from src.backtest import WalkForwardBacktester
+
+@pytest.fixture
+def prices():
+    """Synthetic geometric random-walk price panel"""
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2020-01-01", periods=600)
+    log_returns = rng.normal(0.0004, 0.01, size=(600, 3))
+    return pd.DataFrame(100 * np.exp(log_returns.cumsum(axis=0)), index=dates, columns=['TSLA', 'BND', 'SPY'])
+
+def test_rolling_window_estimates_match_pypfopt(prices):
+    """Running-sum window moments equal a full recomputation on each window"""
+    backtester = WalkForwardBacktester(prices, train_window=120, rebalance_every=25)
+    positions = backtester.rebalance_positions()
+
+    for t, (mu, S) in zip(positions, backtester.window_estimates(positions)):
+        window = prices.iloc[t - 120:t + 1]
+        np.testing.assert_allclose(mu, expected_returns.mean_historical_return(window))
+        np.testing.assert_allclose(S, risk_models.sample_cov(window))
+
+def test_vectorized_accounting_matches_loop(prices):
+    """Drifting buy-and-hold P&L and turnover agree with a day-by-day simulation"""
+    backtester = WalkForwardBacktester(prices, train_window=100, rebalance_every=50, transaction_cost=0.001)
+    positions = backtester.rebalance_positions()
+    weights = np.random.default_rng(1).dirichlet(np.ones(3), size=len(positions))
+    daily, turnover = backtester._account(positions, weights)
+
+    expected_daily, expected_turnover, held = [], [], np.zeros(3)
+    for i, t in enumerate(positions):
+        end = positions[i + 1] if i + 1 < len(positions) else len(backtester.returns)
+        expected_turnover.append(np.abs(weights[i] - held).sum())
+        held = weights[i].copy()
+        for k in range(t, end):
+            day = held @ backtester.returns[k]
+            if k == t:
+                day -= 0.001 * expected_turnover[-1]
+            expected_daily.append(day)
+            held = held * (1 + backtester.returns[k]) / (1 + held @ backtester.returns[k])
+
+    np.testing.assert_allclose(daily, expected_daily, atol=1e-12)
+    np.testing.assert_allclose(turnover, expected_turnover, atol=1e-12)
+
+def test_backtest_run_records_out_of_sample_results(prices):
+    """A full run produces weights per rebalance and returns after the first one"""
+    result = WalkForwardBacktester(prices, train_window=250, rebalance_every=50, forecaster='arima').run()
+
+    assert len(result.weights) == len(result.turnover) == 7
+    np.testing.assert_allclose(result.weights.sum(axis=1), 1, atol=1e-4)
+    assert result.returns.index[0] == prices.index[251]
+    assert result.forecast_errors.shape == (6, 3)
+    assert set(result.summary()) >= {'annual_return', 'volatility', 'sharpe', 'max_drawdown', 'forecast_mape'}
+
+def test_lstm_forecasts_are_refit_as_the_window_rolls(prices, monkeypatch):
+    """The LSTM is retrained on the trailing window every refit_every rebalances"""
+    from src.models import LSTMForecaster
+    train, windows = LSTMForecaster.train, []
+
+    def quick_train(self, data, **kwargs):
+        windows.append((data.index[0], data.index[-1]))
+        return train(self, data, epochs=1)
+    monkeypatch.setattr(LSTMForecaster, "train", quick_train)
+
+    backtester = WalkForwardBacktester(prices[['SPY']], train_window=250, rebalance_every=50,
+                                       forecaster='lstm', refit_every=3)
+    errors = backtester._forecast_errors(backtester.rebalance_positions())
+    # Six evaluable rebalances: refit at the first and the fourth
+    evaluable = backtester.rebalance_positions()[[0, 3]]
+    assert windows == [(prices.index[t - 250], prices.index[t]) for t in evaluable]
+    assert errors.shape == (6, 1) and errors.notna().all().all()
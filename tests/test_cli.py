@@ -0,0 +1,89 @@
+import logging
+import os
+import subprocess
+import sys
+import pytest
+import numpy as np
+import pandas as pd
+from src.cli import build_parser, main
+from src.storage import create_store
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+@pytest.fixture(autouse=True)
+def restore_globals(monkeypatch):
+    """main() configures logging and instrumentation process-wide; undo both after each test"""
+    import src.instrumentation
+    monkeypatch.setattr(src.instrumentation, "_instrumentation", src.instrumentation.get_instrumentation())
+    logger = logging.getLogger("src")
+    handlers, level = list(logger.handlers), logger.level
+    yield
+    for handler in logger.handlers:
+        if handler not in handlers:
+            logger.removeHandler(handler)
+    logger.setLevel(level)
+
+def test_light_modules_do_not_import_ml_backends():
+    """Importing the CLI and the non-ML modules leaves the heavy backends unloaded"""
+    code = ("import sys, src.cli, src.data_processing, src.optimization, src.backtest, src.models, "
+            "src.model_store, src.training, src.explainability, src.streaming; "
+            "print(','.join(m for m in ('tensorflow', 'statsmodels', 'sklearn', 'shap', 'matplotlib', "
+            "'pypfopt', 'cvxpy', 'yfinance') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
+
+@pytest.mark.parametrize("argv", [
+    ["ingest"],
+    ["train", "arima", "--lstm-workers", "2"],
+    ["forecast", "SPY", "--model", "lstm", "--steps", "5"],
+    ["optimize", "--objective", "min_cvar", "--confidence", "0.99"],
+    ["backtest", "--rebalance-every", "10", "--forecaster", "arima"],
+    ["stream", "bars.csv", "--no-forecast"],
+    ["run", "forecasts", "weights", "--force", "prices", "--models", "arima"],
+])
+def test_every_subcommand_parses(argv):
+    args = build_parser().parse_args(argv)
+    assert args.command == argv[0] and callable(args.func)
+
+def test_optimize_command_reads_the_configured_store(tmp_path, capsys, monkeypatch):
+    rng = np.random.default_rng(0)
+    prices = pd.DataFrame(100 * np.exp(rng.normal(3e-4, 0.01, size=(300, 3)).cumsum(axis=0)),
+                          index=pd.bdate_range("2022-01-03", periods=300, name="Date"), columns=['A', 'B', 'C'])
+    path = str(tmp_path / "prices.npy")
+    create_store('npy', path).write(prices)
+    monkeypatch.chdir(tmp_path)  # relative config paths (cache, stores) stay out of the checkout
+
+    main(["--tickers", "A", "B", "C", "--storage-path", path, "optimize", "--objective", "hrp"])
+    out = capsys.readouterr().out
+    assert all(ticker in out for ticker in "ABC")
+    assert "Sharpe" in out
+
+def test_forecast_reuses_models_from_train(tmp_path, capsys, monkeypatch):
+    from src.model_store import ModelStore
+    from src.models import ARIMAModel
+    rng = np.random.default_rng(1)
+    prices = pd.DataFrame(100 * np.exp(rng.normal(3e-4, 0.01, size=(200, 2)).cumsum(axis=0)),
+                          index=pd.bdate_range("2022-01-03", periods=200, name="Date"), columns=['A', 'B'])
+    path = str(tmp_path / "prices.npy")
+    create_store('npy', path).write(prices)
+    monkeypatch.chdir(tmp_path)  # the model store lives under data/models
+    flags = ["--tickers", "A", "B", "--storage-path", path]
+
+    main(flags + ["train", "arima"])
+    monkeypatch.setattr(ARIMAModel, "train", lambda *a, **k: pytest.fail("forecast retrained a stored model"))
+    main(flags + ["forecast", "A", "--model", "arima", "--steps", "3"])
+    assert len(capsys.readouterr().out.strip().splitlines()) >= 3
+
+    # Omitted train params and the explicit defaults address the same entry
+    store = ModelStore(str(tmp_path / "data" / "models"))
+    assert store.key_for('lstm', 'A', prices['A']) == store.key_for('lstm', 'A', prices['A'], train_params={'epochs': 10})
+
+def test_stream_honours_global_overrides(tmp_path, monkeypatch):
+    import src.main
+    monkeypatch.chdir(tmp_path)
+    seen = {}
+    monkeypatch.setattr(src.main, "run_streaming", lambda path, poll_interval, forecast, config: seen.update(
+        path=path, config=config))
+    main(["--tickers", "A", "--storage-path", "custom.npy", "stream", "bars.csv", "--no-forecast"])
+    assert seen['path'] == "bars.csv"
+    assert seen['config'].TICKERS == ["A"] and seen['config'].STORAGE_PATH == "custom.npy"
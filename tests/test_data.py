@@ -1,7 +1,9 @@
 import pytest
+import numpy as np
 import pandas as pd
 import os
-from src.data_processing import DataIngestion, ProjectConfig
+from dataclasses import replace
+from src.data_processing import DataIngestion, ProjectConfig, PriceSource
 
 @pytest.fixture
 def mock_config(tmp_path):
@@ -11,7 +13,8 @@ def mock_config(tmp_path):
         TICKERS=['SPY'],
         START_DATE="2024-01-01",
         END_DATE="2024-01-10",
-        PROCESSED_DATA_PATH=str(processed_path)
+        PROCESSED_DATA_PATH=str(processed_path),
+        CACHE_DIR=str(tmp_path / "cache")
     )
 
 def test_data_ingestion_fetch(mock_config):
@@ -41,3 +44,144 @@ def test_data_combination_and_saving(mock_config):
     # Verify file content
     saved_df = pd.read_csv(mock_config.PROCESSED_DATA_PATH, index_col=0)
     assert len(saved_df) == 3
+
+class FakeSource(PriceSource):
+    """Deterministic offline price source that records every request"""
+
+    def __init__(self, fail_times: int = 0):
+        self.calls = []
+        self.fail_times = fail_times
+
+    def download(self, ticker, start, end):
+        self.calls.append((ticker, start, end))
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise ConnectionError("rate limited")
+        dates = pd.bdate_range(start, pd.Timestamp(end) - pd.Timedelta(days=1))
+        return pd.DataFrame({'Close': np.arange(len(dates), dtype=float) + 100}, index=dates)
+
+@pytest.fixture
+def cached_config(tmp_path):
+    """Config with an isolated on-disk cache"""
+    return ProjectConfig(
+        TICKERS=['SPY', 'BND'],
+        START_DATE="2024-01-01",
+        END_DATE="2024-01-10",
+        PROCESSED_DATA_PATH=str(tmp_path / "processed" / "test_data.csv"),
+        CACHE_DIR=str(tmp_path / "cache"),
+        RETRY_BACKOFF=0.0
+    )
+
+def test_fetch_only_requests_missing_tail(cached_config):
+    """A second run with a later END_DATE only downloads the new range"""
+    source = FakeSource()
+    ingestion = DataIngestion(cached_config, source=source)
+    assert not os.path.exists(cached_config.CACHE_DIR)  # created lazily on the first cache write
+    ingestion.fetch_data()
+    assert len(source.calls) == 2
+
+    source.calls.clear()
+    extended = replace(cached_config, END_DATE="2024-01-20")
+    data = DataIngestion(extended, source=source).fetch_data()
+
+    assert sorted(source.calls) == [('BND', '2024-01-10', '2024-01-20'), ('SPY', '2024-01-10', '2024-01-20')]
+    assert list(data) == ['SPY', 'BND']
+    assert data['SPY'].index[0] == pd.Timestamp("2024-01-01")
+    assert data['SPY'].index[-1] == pd.Timestamp("2024-01-19")
+    assert not data['SPY'].index.duplicated().any()
+
+def test_fetch_retries_transient_errors(cached_config):
+    """Failures are retried up to MAX_RETRIES before giving up"""
+    source = FakeSource(fail_times=2)
+    config = replace(cached_config, TICKERS=['SPY'])
+    data = DataIngestion(config, source=source).fetch_data()
+
+    assert 'SPY' in data
+    assert len(source.calls) == 3
+
+@pytest.mark.parametrize("backend", ["csv", "npy", "parquet"])
+def test_storage_backends_round_trip(mock_config, backend):
+    """Every backend returns the same frame and supports ticker/date selection"""
+    if backend == "parquet":
+        pytest.importorskip("pyarrow")
+    config = replace(mock_config, STORAGE_BACKEND=backend)
+    ingestion = DataIngestion(config)
+
+    dates = pd.bdate_range("2024-01-01", periods=10, name="Date")
+    data_dict = {t: pd.DataFrame({'Close': np.linspace(i, i + 1, 10)}, index=dates)
+                 for i, t in enumerate(['SPY', 'BND', 'TSLA'])}
+    combined = ingestion.combine_and_save(data_dict)
+
+    loaded = ingestion.load_processed()
+    pd.testing.assert_frame_equal(loaded, combined, check_freq=False)
+
+    subset = ingestion.load_processed(['TSLA', 'SPY'], start="2024-01-03", end="2024-01-05")
+    assert list(subset.columns) == ['TSLA', 'SPY']
+    assert list(subset.index) == list(pd.bdate_range("2024-01-03", "2024-01-05"))
+    np.testing.assert_allclose(subset.values, combined.loc["2024-01-03":"2024-01-05", ['TSLA', 'SPY']].values)
+
+    # CSV stays available as an export alongside binary stores
+    assert os.path.exists(config.PROCESSED_DATA_PATH)
+
+@pytest.mark.parametrize("backend", ["csv", "npy", "parquet"])
+def test_storage_append(tmp_path, backend):
+    """Appended bars read back in order, including across a tail compaction"""
+    if backend == "parquet":
+        pytest.importorskip("pyarrow")
+    from src.storage import create_store, NumpyStore
+    dates = pd.bdate_range("2024-01-01", periods=300, name="Date")
+    frame = pd.DataFrame(np.arange(600, dtype=float).reshape(300, 2), index=dates, columns=['SPY', 'BND'])
+    store = create_store(backend, str(tmp_path / f"prices{backend}"))
+
+    store.write(frame.iloc[:10])
+    for i in range(10, 300, 7):
+        store.append(frame.iloc[i:i + 7][['BND', 'SPY']])
+    pd.testing.assert_frame_equal(store.read(), frame, check_freq=False)
+    pd.testing.assert_frame_equal(store.read(['BND'], start="2024-11-01"), frame.loc["2024-11-01":, ['BND']],
+                                  check_freq=False)
+    if backend == "npy":
+        # 290 appended rows crossed COMPACT_ROWS once, so the tail was folded in
+        tail = os.path.join(store.path, store._names(store._meta())['tail_dates'])
+        assert os.path.getsize(tail) // 8 < NumpyStore.COMPACT_ROWS
+
+def test_numpy_store_write_commits_through_meta(tmp_path, monkeypatch):
+    """A write that dies before meta.json is replaced leaves the previous data readable"""
+    from src.storage import NumpyStore
+    dates = pd.bdate_range("2024-01-01", periods=5, name="Date")
+    old = pd.DataFrame({'SPY': np.arange(5.0), 'BND': np.arange(5.0)}, index=dates)
+    store = NumpyStore(str(tmp_path / "prices.npy"))
+    store.write(old)
+    store.append(pd.DataFrame({'SPY': [9.0], 'BND': [8.0]}, index=pd.DatetimeIndex(["2024-01-08"])))
+    expected = store.read()
+
+    replace = os.replace
+    def crash_on_meta(src, dst):
+        if dst.endswith("meta.json"):
+            raise OSError("disk full")
+        replace(src, dst)
+    monkeypatch.setattr(os, "replace", crash_on_meta)
+    with pytest.raises(OSError):
+        store.write(pd.DataFrame({'GLD': np.ones(3, dtype=np.float32)}, index=dates[:3]))
+    pd.testing.assert_frame_equal(store.read(), expected)
+
+    monkeypatch.undo()
+    for _ in range(3):
+        store.write(old)
+    # The failed write's orphans are overwritten; only the current and previous generations remain
+    data = sorted(name for name in os.listdir(store.path) if name.endswith(".npy"))
+    assert data == ["dates-3.npy", "dates-4.npy", "values-3.npy", "values-4.npy"]
+
+def test_storage_version_tracks_changes(tmp_path):
+    """The version token is stable across reads and changes on append"""
+    from src.storage import create_store
+    frame = pd.DataFrame({'SPY': [1.0, 2.0]}, index=pd.bdate_range("2024-01-01", periods=2, name="Date"))
+    store = create_store('npy', str(tmp_path / "prices.npy"))
+    assert store.version() == "missing"
+
+    store.write(frame)
+    version = store.version()
+    store.read()
+    assert store.version() == version
+
+    store.append(pd.DataFrame({'SPY': [3.0]}, index=pd.DatetimeIndex(["2024-01-03"], name="Date")))
+    assert store.version() != version
@@ -0,0 +1,74 @@
+import pytest
+import numpy as np
+import pandas as pd
+from pypfopt import expected_returns, risk_models
+from src.estimators import RollingMomentEstimator, ExponentialMomentEstimator
+from src.optimization import PortfolioOptimizer
+
+@pytest.fixture
+def prices():
+    """Synthetic correlated price panel"""
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2021-01-01", periods=400)
+    shocks = rng.multivariate_normal(np.full(4, 4e-4), np.diag([4e-4, 1e-4, 2e-4, 3e-4]) + 5e-5, size=400)
+    return pd.DataFrame(100 * np.exp(shocks.cumsum(axis=0)), index=dates, columns=['TSLA', 'BND', 'SPY', 'QQQ'])
+
+def test_running_moments_match_pypfopt(prices):
+    """Sample and Ledoit-Wolf estimates equal PyPortfolioOpt's full recomputation"""
+    estimator = RollingMomentEstimator.from_prices(prices)
+
+    np.testing.assert_allclose(estimator.expected_returns(), expected_returns.mean_historical_return(prices))
+    np.testing.assert_allclose(estimator.covariance(), risk_models.sample_cov(prices))
+    np.testing.assert_allclose(estimator.covariance('ledoit_wolf'),
+                               risk_models.CovarianceShrinkage(prices).ledoit_wolf(), rtol=1e-6)
+
+def test_sliding_window_updates_match_recomputation(prices):
+    """Streaming bars through a fixed window equals estimating on the last window"""
+    estimator = RollingMomentEstimator.from_prices(prices.iloc[:150], window=100)
+    for _, row in prices.iloc[150:].iterrows():
+        estimator.update_prices(row.values)
+
+    expected = RollingMomentEstimator.from_prices(prices.iloc[-101:])
+    assert estimator.count == 100
+    np.testing.assert_allclose(estimator.expected_returns(), expected.expected_returns())
+    np.testing.assert_allclose(estimator.covariance('ledoit_wolf'), expected.covariance('ledoit_wolf'))
+
+def test_exponential_mean_matches_pandas(prices):
+    """EW mean follows pandas' recursive (adjust=False) definition"""
+    estimator = ExponentialMomentEstimator.from_prices(prices, span=30)
+    expected = prices.pct_change().dropna().ewm(span=30, adjust=False).mean().iloc[-1]
+    np.testing.assert_allclose(estimator.mean(), expected.values)
+    assert np.all(np.linalg.eigvalsh(estimator.covariance().values) > 0)
+
+def test_optimizer_consumes_estimator(prices):
+    """PortfolioOptimizer accepts an estimator in place of raw prices"""
+    from_prices = PortfolioOptimizer(prices).optimize_performance()
+    from_estimator = PortfolioOptimizer(estimator=RollingMomentEstimator.from_prices(prices)).optimize_performance()
+    assert from_estimator == pytest.approx(from_prices, abs=1e-4)
+
+def test_unsupported_shrinkage_is_rejected_up_front(prices):
+    estimator = ExponentialMomentEstimator.from_prices(prices, span=30)
+    with pytest.raises(ValueError, match="ledoit_wolf"):
+        PortfolioOptimizer(estimator=estimator, shrinkage='ledoit_wolf')
+    with pytest.raises(ValueError, match="fixed shrinkage"):
+        estimator.covariance('ledoit_wolf')
+    shrunk = PortfolioOptimizer(estimator=estimator, shrinkage=0.2).calculate_metrics()[1]
+    assert np.isfinite(shrunk.values).all()
+
+def test_non_finite_bars_are_skipped_instead_of_poisoning_the_window(prices):
+    """A NaN bar drops out of the sums; later windows match a recomputation without it"""
+    estimator = RollingMomentEstimator.from_prices(prices.iloc[:150], window=100)
+    ew = ExponentialMomentEstimator.from_prices(prices.iloc[:150], span=30)
+    bad = prices.iloc[150].values.copy()
+    bad[0] = np.nan
+    for est in (estimator, ew):
+        est.update_prices(bad)
+    for _, row in prices.iloc[151:].iterrows():
+        estimator.update_prices(row.values)
+        ew.update_prices(row.values)
+
+    expected = RollingMomentEstimator.from_prices(prices.iloc[-101:])
+    assert estimator.skipped == 2 and ew.skipped == 2
+    np.testing.assert_allclose(estimator.expected_returns(), expected.expected_returns())
+    np.testing.assert_allclose(estimator.covariance(), expected.covariance())
+    assert np.isfinite(ew.covariance().values).all()
@@ -0,0 +1,54 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.explainability import (ModelExplainer, feature_importance, summarize_background,
+                                temporal_importance)
+
+@pytest.fixture(scope="module")
+def trained():
+    """A small trained LSTM and its scaled input windows"""
+    from src.models import LSTMForecaster
+    from src.windows import to_model_input
+    prices = pd.Series(100 + np.random.default_rng(0).normal(size=150).cumsum())
+    lstm = LSTMForecaster("TEST", window=10)
+    lstm.train(prices, epochs=1)
+    X, _ = lstm._prepare_sequences(lstm.scaler.transform(prices.values.reshape(-1, 1)))
+    return lstm, to_model_input(X)
+
+@pytest.mark.parametrize("method", ['kmeans', 'random'])
+def test_background_summarization_respects_budget(method):
+    data = np.random.default_rng(0).normal(size=(300, 12, 2)).astype(np.float32)
+    summary = summarize_background(data, budget=25, method=method)
+    assert summary.shape == (25, 12, 2)
+    assert summary.dtype == np.float32
+    np.testing.assert_array_equal(summary, summarize_background(data, budget=25, method=method))
+    assert summarize_background(data[:10], budget=25, method=method).shape == (10, 12, 2)
+
+def test_importance_arrays_match_manual_aggregation():
+    """Array APIs aggregate list or 4-D SHAP outputs without matplotlib"""
+    values = np.random.default_rng(1).normal(size=(5, 8, 3))
+    np.testing.assert_allclose(feature_importance([values]), np.abs(values).mean(axis=(0, 1)))
+    np.testing.assert_allclose(temporal_importance(values[..., None]), np.abs(values).mean(axis=(0, 2)))
+
+def test_explainers_are_reused_per_model_version(trained):
+    lstm, X = trained
+    first = ModelExplainer.for_model(lstm.model, X, budget=20)
+    assert ModelExplainer.for_model(lstm.model, X, budget=20) is first
+    assert first.background_data.shape == (20, 10, 1)
+
+    lstm.model.set_weights([w * 1.01 for w in lstm.model.get_weights()])
+    assert ModelExplainer.for_model(lstm.model, X, budget=20) is not first
+
+def test_batched_explanations_honour_caps(trained):
+    """Many windows are explained in batches, stopping at the sample cap"""
+    lstm, X = trained
+    explainer = ModelExplainer.for_model(lstm.model, X, budget=10, summarize='random')
+
+    values = explainer.explain(X, batch_size=16, max_samples=40, nsamples=20)
+    assert values.shape == (40, 10, 1)
+    assert explainer.explained == 40
+
+    # A zero time budget still completes the first batch
+    values = explainer.explain(X, batch_size=8, time_budget=0.0, nsamples=20)
+    assert values.shape == (8, 10, 1)
+    assert temporal_importance(values).shape == (10,)
@@ -0,0 +1,59 @@
+import pytest
+import numpy as np
+import pandas as pd
+from pypfopt.efficient_frontier import EfficientFrontier
+from src.frontier import FrontierEngine, portfolio_performance
+from src.optimization import PortfolioOptimizer
+
+@pytest.fixture
+def moments():
+    """Annualised moments of a synthetic 8-asset universe"""
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2020-01-01", periods=500)
+    tickers = [f"A{i}" for i in range(8)]
+    prices = pd.DataFrame(100 * np.exp(rng.normal(4e-4, 0.01, size=(500, 8)).cumsum(axis=0)),
+                          index=dates, columns=tickers)
+    return PortfolioOptimizer(prices).calculate_metrics()
+
+def test_vectorized_performance_matches_pypfopt(moments):
+    """Scoring many weight vectors at once equals PyPortfolioOpt per vector"""
+    mu, S = moments
+    W = np.random.default_rng(1).dirichlet(np.ones(len(mu)), size=5)
+    returns, vols, sharpe = portfolio_performance(W, mu, S)
+
+    for k, w in enumerate(W):
+        ef = EfficientFrontier(mu, S)
+        ef.set_weights(dict(zip(mu.index, w)))
+        np.testing.assert_allclose((returns[k], vols[k], sharpe[k]), ef.portfolio_performance())
+
+def test_frontier_grid_matches_individual_solves(moments):
+    """Each warm-started grid point agrees with a fresh efficient_return solve"""
+    mu, S = moments
+    engine = FrontierEngine(mu, S)
+    frontier = engine.efficient_frontier(n_points=20)
+
+    assert frontier.weights.shape == (20, len(mu))
+    np.testing.assert_allclose(frontier.weights.sum(axis=1), 1)
+    assert np.all(np.diff(frontier.volatilities) > -1e-6)
+
+    for k in (2, 10, 17):
+        ef = EfficientFrontier(mu, S)
+        ef.efficient_return(frontier.returns[k])
+        assert frontier.volatilities[k] == pytest.approx(ef.portfolio_performance()[1], rel=1e-3)
+
+    ef = EfficientFrontier(mu, S)
+    ef.max_sharpe()
+    assert frontier.sharpe.max() == pytest.approx(ef.portfolio_performance()[2], rel=1e-2)
+
+def test_engine_update_reuses_problem(moments):
+    """Swapping estimates keeps the compiled problem and still solves correctly"""
+    mu, S = moments
+    engine = FrontierEngine(mu, S)
+    problem = engine._aversion_problem
+    engine.risk_aversion_frontier([1, 10])
+    engine.update(mu * 0.5, S * 2)
+    frontier = engine.risk_aversion_frontier([1, 10, 100])
+
+    assert engine._aversion_problem is problem
+    assert len(frontier.returns) == 3
+    assert frontier.volatilities[0] >= frontier.volatilities[-1]
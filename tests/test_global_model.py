@@ -0,0 +1,56 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.global_model import GlobalLSTMForecaster, _valid_window_ends
+
+@pytest.fixture
+def universe():
+    """Four tickers on one calendar, one of them listed halfway through"""
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2022-01-03", periods=160, name="Date")
+    prices = pd.DataFrame(50 * np.exp(rng.normal(3e-4, 0.01, size=(160, 4)).cumsum(axis=0)) * [1, 2, 3, 4],
+                          index=dates, columns=['A', 'B', 'C', 'D'])
+    prices.iloc[:80, 3] = np.nan
+    volume = pd.DataFrame(rng.integers(10**5, 10**6, size=(160, 4)), index=dates, columns=prices.columns)
+    return prices, volume
+
+def test_valid_window_ends_skip_gaps():
+    valid = np.ones(12, dtype=bool)
+    valid[5] = False
+    np.testing.assert_array_equal(_valid_window_ends(valid, 3), [3, 4, 9, 10, 11])
+
+def test_dataset_streams_pooled_windows(universe):
+    prices, _ = universe
+    model = GlobalLSTMForecaster(window=10)
+    model.tickers = list(prices.columns)
+    raw = prices.to_numpy(dtype=np.float32).T[:, :, None]
+    batches = list(model.dataset(raw, batch_size=64, shuffle=False))
+
+    # 3 full tickers with 150 windows each, the late listing with 70
+    assert model.n_windows == 3 * 150 + 70
+    inputs, target = batches[0]
+    assert inputs['window'].shape == (64, 10, 1) and target.shape == (64, 1)
+    # The first window of ticker A is its first ten prices, the target the eleventh
+    np.testing.assert_allclose(inputs['window'][0, :, 0], prices['A'].values[:10], rtol=1e-6)
+    np.testing.assert_allclose(target[0, 0], prices['A'].values[10], rtol=1e-6)
+    late = [i for i, t in enumerate(np.concatenate([b[0]['ticker'].numpy() for b in batches])) if t == 3]
+    assert len(late) == 70
+
+def test_global_model_trains_and_forecasts_every_ticker(universe, tmp_path):
+    prices, volume = universe
+    model = GlobalLSTMForecaster(window=10, features=('close', 'returns', 'volume'), embedding_dim=4)
+    model.train(prices, volume=volume, epochs=1, batch_size=64)
+    assert model.model.get_layer("window").output.shape[1:] == (10, 3)
+
+    forecast = model.forecast(prices, steps=5, volume=volume)
+    assert forecast.shape == (5, 4) and list(forecast.columns) == ['A', 'B', 'C', 'D']
+    assert np.isfinite(forecast.values).all() and (forecast.values > 0).all()
+
+    model.save(str(tmp_path / "global"))
+    restored = GlobalLSTMForecaster.load(str(tmp_path / "global"))
+    pd.testing.assert_frame_equal(restored.forecast(prices, steps=5, volume=volume, tickers=['B']),
+                                  forecast[['B']], rtol=1e-5)
+
+def test_close_feature_is_required():
+    with pytest.raises(ValueError):
+        GlobalLSTMForecaster(features=('returns',))
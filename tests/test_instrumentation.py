@@ -0,0 +1,98 @@
+import json
+import logging
+import os
+import pytest
+import numpy as np
+import pandas as pd
+from dataclasses import replace
+from src.data_processing import DataIngestion, ProjectConfig
+from src.instrumentation import Instrumentation, configure, get_instrumentation, span
+from src.optimization import PortfolioOptimizer
+
+@pytest.fixture
+def instrumentation(tmp_path):
+    """Fresh process-wide instrumentation writing to a temporary JSON lines file"""
+    previous = get_instrumentation()
+    yield configure(jsonl_path=str(tmp_path / "spans.jsonl"), profile=["profiled.*"],
+                    trace_memory=["traced"], profile_dir=str(tmp_path / "profiles"))
+    configure(jsonl_path=previous.jsonl_path, profile=previous.profile, trace_memory=previous.trace_memory,
+              profile_dir=previous.profile_dir)
+
+def test_span_records_timing_counts_and_nesting(instrumentation):
+    with span("outer", tickers=3) as outer:
+        with span("inner"):
+            sum(range(100000))
+        outer.set(rows=42)
+
+    inner, outer = instrumentation.find("inner")[0], instrumentation.find("outer")[0]
+    assert inner.parent == "outer" and outer.parent is None
+    assert outer.wall_s >= inner.wall_s > 0
+    assert outer.cpu_s > 0 and outer.rss_delta_mb is not None
+    assert outer.attrs == {'tickers': 3, 'rows': 42}
+
+    with open(instrumentation.jsonl_path) as f:
+        lines = [json.loads(line) for line in f]
+    assert [line['name'] for line in lines] == ["inner", "outer"]
+    assert lines[1]['attrs']['rows'] == 42
+
+def test_failed_span_is_recorded_and_reraised(instrumentation):
+    with pytest.raises(ValueError):
+        with span("failing"):
+            raise ValueError("boom")
+    record = instrumentation.find("failing")[0]
+    assert record.status == "error" and "boom" in record.error
+
+def test_prometheus_export_aggregates_per_stage(instrumentation, tmp_path):
+    for rows in (10, 20):
+        with span("ingest.combine", rows=rows):
+            pass
+    text = instrumentation.to_prometheus()
+    assert '# TYPE gmf_span_seconds_total counter' in text
+    assert 'gmf_span_calls_total{span="ingest.combine"} 2' in text
+    assert 'gmf_span_rows_total{span="ingest.combine"} 30' in text
+
+    path = str(tmp_path / "metrics.prom")
+    instrumentation.write_prometheus(path)
+    assert open(path).read() == text
+
+def test_profile_and_memory_hooks_are_opt_in(instrumentation):
+    with span("profiled.stage"):
+        sorted(np.random.default_rng(0).random(1000))
+    with span("traced"):
+        buffer = [0] * 500000
+    with span("plain"):
+        pass
+
+    profiled = instrumentation.find("profiled.stage")[0]
+    assert os.path.exists(profiled.attrs['profile'])
+    assert instrumentation.find("traced")[0].py_peak_mb > 3
+    plain = instrumentation.find("plain")[0]
+    assert 'profile' not in plain.attrs and plain.py_peak_mb is None
+    del buffer
+
+def test_pipeline_stages_emit_spans(instrumentation):
+    rng = np.random.default_rng(0)
+    prices = pd.DataFrame(100 * np.exp(rng.normal(3e-4, 0.01, size=(300, 3)).cumsum(axis=0)),
+                          columns=['A', 'B', 'C'], index=pd.bdate_range("2022-01-03", periods=300))
+    optimizer = PortfolioOptimizer(prices)
+    optimizer.optimize_performance()
+
+    metrics = instrumentation.find("optimize.metrics")[0]
+    assert metrics.attrs['rows'] == 300 and metrics.attrs['tickers'] == 3
+    assert instrumentation.find("optimize.max_sharpe")
+    assert set(instrumentation.summary()['span']) == {"optimize.metrics", "optimize.max_sharpe"}
+
+def test_ingestion_logs_instead_of_printing(instrumentation, tmp_path, caplog, capsys):
+    index = pd.bdate_range("2022-01-03", periods=5)
+    frames = {t: pd.DataFrame({'Close': np.arange(5.0) + i}, index=index) for i, t in enumerate(['A', 'B'])}
+    config = replace(ProjectConfig(), TICKERS=['A', 'B'], CACHE_DIR=None, EXPORT_CSV=False,
+                     STORAGE_PATH=str(tmp_path / "prices.npy"))
+
+    with caplog.at_level(logging.INFO, logger="src"):
+        DataIngestion(config).combine_and_save(frames)
+
+    assert capsys.readouterr().out == ""
+    assert any("Processed data saved" in message for message in caplog.messages)
+    combine = instrumentation.find("ingest.combine")[0].attrs
+    assert combine['tickers'] == 2 and combine['rows'] == 5
+    assert instrumentation.find("ingest.save")[0].attrs['backend'] == 'npy'
@@ -0,0 +1,79 @@
+import pytest
+import numpy as np
+import pandas as pd
+import cvxpy as cp
+from src.large_universe import FactorCovariance, FactorPortfolioOptimizer
+from src.optimization import PortfolioOptimizer
+
+@pytest.fixture
+def factor_cov():
+    """PCA factor model fitted on synthetic factor-driven returns"""
+    rng = np.random.default_rng(0)
+    loadings = rng.normal(0, 0.01, size=(60, 3))
+    returns = rng.normal(size=(300, 3)) @ loadings.T + rng.normal(0, 0.01, size=(300, 60)) + 4e-4
+    return FactorCovariance.from_returns(pd.DataFrame(returns, columns=[f"A{i}" for i in range(60)]), n_factors=5)
+
+def test_factor_products_match_dense(factor_cov):
+    """Structured products and variances agree with the dense matrix"""
+    dense = factor_cov.to_dense().values
+    W = np.random.default_rng(1).dirichlet(np.ones(60), size=4)
+
+    np.testing.assert_allclose(factor_cov.matvec(W[0]), dense @ W[0])
+    np.testing.assert_allclose(factor_cov.variance(W), np.einsum('mn,nk,mk->m', W, dense, W))
+    assert factor_cov.max_eigenvalue() == pytest.approx(np.linalg.eigvalsh(dense).max(), rel=1e-6)
+
+@pytest.mark.parametrize("bounds, sector_bounds", [
+    ((0, 1), None),
+    ((0, 0.1), {'x': (0, 0.2), 'y': (0.3, 1)}),
+])
+def test_projected_gradient_matches_dense_qp(factor_cov, bounds, sector_bounds):
+    """FISTA on the factor model reaches the dense QP optimum and respects every constraint"""
+    dense = factor_cov.to_dense().values
+    mu = np.linspace(0.02, 0.2, 60)
+    sectors = np.array(['x', 'y', 'z'])[np.arange(60) % 3]
+    optimizer = FactorPortfolioOptimizer(factor_cov, mu, weight_bounds=bounds, sectors=sectors,
+                                         sector_bounds=sector_bounds, risk_aversion=5)
+    w = optimizer.solve()
+
+    x = cp.Variable(60)
+    constraints = [cp.sum(x) == 1, x >= bounds[0], x <= bounds[1]]
+    for sector, (lo, hi) in (sector_bounds or {}).items():
+        constraints += [cp.sum(x[sectors == sector]) >= lo, cp.sum(x[sectors == sector]) <= hi]
+    problem = cp.Problem(cp.Minimize(2.5 * cp.quad_form(x, dense) - mu @ x), constraints)
+    problem.solve()
+
+    assert optimizer.objective(w) == pytest.approx(problem.value, abs=1e-7)
+    assert w.sum() == pytest.approx(1)
+    assert w.min() >= bounds[0] - 1e-12 and w.max() <= bounds[1] + 1e-12
+    for sector, (lo, hi) in (sector_bounds or {}).items():
+        assert lo - 1e-9 <= w[sectors == sector].sum() <= hi + 1e-9
+
+def test_infeasible_bounds_rejected(factor_cov):
+    with pytest.raises(ValueError):
+        FactorPortfolioOptimizer(factor_cov, weight_bounds=(0, 0.01))
+
+def test_optimizer_large_universe_mode():
+    """PortfolioOptimizer exposes the factor mode and returns a fully invested portfolio"""
+    rng = np.random.default_rng(2)
+    sample_prices = pd.DataFrame(100 * np.exp(rng.normal(4e-4, 0.01, size=(300, 12)).cumsum(axis=0)),
+                                 index=pd.bdate_range("2021-01-01", periods=300),
+                                 columns=[f"T{i}" for i in range(12)])
+    weights = PortfolioOptimizer(sample_prices).optimize_large_universe(n_factors=2, weight_bounds=(0, 0.6))
+
+    assert list(weights) == list(sample_prices.columns)
+    assert sum(weights.values()) == pytest.approx(1)
+    assert max(weights.values()) <= 0.6 + 1e-12
+
+def test_large_universe_mode_from_estimates(factor_cov):
+    """Estimate-built optimizers factor the given covariance instead of needing prices"""
+    S = factor_cov.to_dense()
+    refit = FactorCovariance.from_covariance(S, n_factors=5)
+    np.testing.assert_allclose(np.diag(refit.to_dense()), np.diag(S), rtol=1e-8)
+    # Leading eigenvectors of a low-rank plus diagonal matrix nearly span its factors
+    assert np.linalg.norm(refit.to_dense() - S) < 0.05 * np.linalg.norm(S)
+
+    mu = pd.Series(np.linspace(0.02, 0.12, len(S)), index=S.index)
+    weights = PortfolioOptimizer.from_estimates(mu, S).optimize_large_universe(n_factors=5, weight_bounds=(0, 0.1))
+    assert list(weights) == list(S.index)
+    assert sum(weights.values()) == pytest.approx(1)
+    assert max(weights.values()) <= 0.1 + 1e-12
@@ -0,0 +1,100 @@
+import multiprocessing
+import os
+import pytest
+import numpy as np
+import pandas as pd
+from src.model_store import ModelStore, data_fingerprint
+from src.models import ARIMAModel, LSTMForecaster
+
+@pytest.fixture
+def prices():
+    """Synthetic daily close prices"""
+    dates = pd.bdate_range("2022-01-03", periods=150)
+    return pd.Series(100 + np.random.default_rng(0).normal(size=150).cumsum(), index=dates, name="SPY")
+
+def test_arima_save_load_round_trip(prices, tmp_path):
+    """A reloaded ARIMA model produces identical forecasts"""
+    arima = ARIMAModel("SPY")
+    arima.train(prices, order=(1, 1, 0))
+    arima.save(str(tmp_path / "arima"))
+
+    restored = ARIMAModel.load(str(tmp_path / "arima"))
+    np.testing.assert_allclose(restored.predict(5), arima.predict(5))
+
+def test_lstm_save_load_round_trip(prices, tmp_path):
+    """Keras weights, scaler and window settings survive a round trip"""
+    lstm = LSTMForecaster("SPY", window=10)
+    lstm.train(prices, epochs=1)
+    lstm.save(str(tmp_path / "lstm"))
+
+    restored = LSTMForecaster.load(str(tmp_path / "lstm"))
+    assert restored.window == 10
+    last = lstm.scaler.transform(prices.values[-10:].reshape(-1, 1))
+    np.testing.assert_allclose(restored.predict(last, steps=3), lstm.predict(last, steps=3), rtol=1e-5)
+
+def test_load_or_train_only_retrains_on_change(prices, tmp_path, monkeypatch):
+    """Unchanged data and params are served from the store"""
+    store = ModelStore(str(tmp_path / "store"))
+    calls = []
+    original_train = ARIMAModel.train
+    monkeypatch.setattr(ARIMAModel, "train", lambda self, *a, **k: calls.append(1) or original_train(self, *a, **k))
+
+    store.load_or_train('arima', 'SPY', prices, train_params={'order': (1, 1, 0)})
+    store.load_or_train('arima', 'SPY', prices, train_params={'order': (1, 1, 0)})
+    assert len(calls) == 1
+
+    store.load_or_train('arima', 'SPY', prices.iloc[:-1], train_params={'order': (1, 1, 0)})
+    assert len(calls) == 2
+    assert data_fingerprint(prices) != data_fingerprint(prices.iloc[:-1])
+
+def test_store_evicts_least_recently_used(prices, tmp_path):
+    """Entries beyond the size budget are evicted oldest-access first"""
+    store = ModelStore(str(tmp_path / "store"), max_bytes=1)
+    store.load_or_train('arima', 'SPY', prices, train_params={'order': (1, 1, 0)})
+    store.load_or_train('arima', 'BND', prices, train_params={'order': (1, 1, 0)})
+
+    index = store._read_index()
+    assert len(index) == 1
+    assert next(iter(index.values()))['ticker'] == 'BND'
+
+def test_put_publishes_complete_models_only(prices, tmp_path, monkeypatch):
+    """A save that dies halfway leaves no entry; a finished one is moved into place whole"""
+    store = ModelStore(str(tmp_path / "store"))
+    model = ARIMAModel('SPY')
+    model.train(prices, order=(1, 1, 0))
+    key = store.key_for('arima', 'SPY', prices, train_params={'order': (1, 1, 0)})
+
+    save = ARIMAModel.save
+    def crash(self, path):
+        os.makedirs(path)
+        open(os.path.join(path, "meta.json"), "w").close()
+        raise OSError("disk full")
+    monkeypatch.setattr(ARIMAModel, "save", crash)
+    with pytest.raises(OSError):
+        store.put(key, model, 'arima')
+    assert store.get(key) is None and not os.path.exists(store.entry_path(key))
+
+    monkeypatch.setattr(ARIMAModel, "save", save)
+    store.put(key, model, 'arima')
+    store.put(key, model, 'arima')
+    assert not [name for name in os.listdir(store.root) if ".staging-" in name]
+    np.testing.assert_allclose(store.get(key).predict(3), model.predict(3))
+
+def _register_many(root, worker, count):
+    store = ModelStore(root)
+    for i in range(count):
+        key = f"{worker}-{i}"
+        os.makedirs(store.entry_path(key))
+        store.register(key, 'SPY', 'arima')
+
+def test_concurrent_processes_do_not_lose_index_entries(tmp_path):
+    """Index read-modify-writes from several processes are serialised by the lock file"""
+    root = str(tmp_path / "store")
+    ModelStore(root)
+    workers = [multiprocessing.Process(target=_register_many, args=(root, w, 25)) for w in range(4)]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join()
+    assert all(p.exitcode == 0 for p in workers)
+    assert len(ModelStore(root)._read_index()) == 100
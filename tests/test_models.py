@@ -0,0 +1,134 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.windows import sliding_windows, panel_windows, to_model_input
+
+def loop_windows(data, window):
+    """Reference implementation matching the original per-row loop"""
+    X, y = [], []
+    for i in range(window, len(data)):
+        X.append(data[i-window:i])
+        y.append(data[i, 0])
+    return np.array(X), np.array(y)
+
+def test_sliding_windows_match_loop_without_copying():
+    """Strided windows equal the loop output and share memory with the input"""
+    data = np.random.default_rng(0).normal(size=(200, 3))
+    X, y = sliding_windows(data, 20)
+    X_ref, y_ref = loop_windows(data, 20)
+
+    assert X.shape == (180, 20, 3)
+    np.testing.assert_array_equal(X, X_ref)
+    np.testing.assert_array_equal(y, y_ref)
+    assert np.shares_memory(X, data)
+
+def test_panel_windows_batch_many_tickers():
+    """Panel windows flatten ticker-major into a single Keras batch"""
+    panel = np.arange(50 * 4, dtype=float).reshape(50, 4)
+    X, y = panel_windows(panel, 10)
+    assert X.shape == (40, 4, 10, 1)
+    assert y.shape == (40, 4)
+
+    batch = to_model_input(X)
+    assert batch.shape == (160, 10, 1)
+    assert batch.dtype == np.float32
+    X_t1, _ = sliding_windows(panel[:, 1], 10)
+    np.testing.assert_array_equal(batch[40:80], X_t1)
+
+def test_sliding_windows_requires_enough_history():
+    with pytest.raises(ValueError):
+        sliding_windows(np.zeros(10), 10)
+
+def test_lstm_configurable_window_and_features():
+    """LSTM trains on multiple feature columns with a custom window"""
+    from src.models import LSTMForecaster
+    rng = np.random.default_rng(1)
+    prices = pd.Series(100 + rng.normal(size=120).cumsum())
+    frame = pd.DataFrame({'close': prices, 'returns': prices.pct_change().fillna(0)})
+
+    lstm = LSTMForecaster("TEST", window=15)
+    model = lstm.train(frame, epochs=1)
+    assert model.input_shape == (None, 15, 2)
+
+    single = LSTMForecaster("TEST", window=15)
+    single.train(prices, epochs=1)
+    last = single.scaler.transform(prices.values[-15:].reshape(-1, 1))
+    assert single.predict(last, steps=3).shape == (3,)
+
+def test_lstm_batched_rollout_matches_stepwise_predict():
+    """The compiled batched rollout reproduces the per-step Keras predict loop"""
+    from src.models import LSTMForecaster
+    prices = pd.Series(100 + np.random.default_rng(2).normal(size=150).cumsum())
+    lstm = LSTMForecaster("TEST", window=20)
+    lstm.train(prices, epochs=1)
+
+    scaled = lstm.scaler.transform(prices.values.reshape(-1, 1))
+    current, expected = scaled[-20:].copy(), []
+    for _ in range(5):
+        pred = lstm.model.predict(current.reshape(1, -1, 1), verbose=0)
+        expected.append(pred[0, 0])
+        current = np.append(current[1:], pred)
+
+    np.testing.assert_allclose(lstm.predict(scaled[-20:], steps=5),
+                               lstm._inverse_target(np.array(expected)), rtol=1e-5)
+
+    batch = lstm.forecast_from_history(prices, np.array([50, 100, 150]), steps=5)
+    assert batch.shape == (3, 5)
+    np.testing.assert_allclose(batch[-1], lstm.predict(scaled[-20:], steps=5), rtol=1e-5)
+
+def test_lstm_direct_multi_horizon_head():
+    """A direct head emits several steps per pass and chains passes for longer horizons"""
+    from src.models import LSTMForecaster
+    prices = pd.Series(100 + np.random.default_rng(3).normal(size=150).cumsum())
+    lstm = LSTMForecaster("TEST", window=20, horizon=5)
+    model = lstm.train(prices, epochs=1)
+
+    assert model.output_shape == (None, 5)
+    last = lstm.scaler.transform(prices.values[-20:].reshape(-1, 1))
+    assert lstm.predict(last, steps=5).shape == (5,)
+    assert lstm.predict(last, steps=12).shape == (12,)
+
+def make_ar_series(n=400, phi=0.6, seed=4):
+    """Random walk whose increments follow an AR(1) process"""
+    rng = np.random.default_rng(seed)
+    shocks = rng.normal(size=n)
+    increments = np.zeros(n)
+    for t in range(1, n):
+        increments[t] = phi * increments[t - 1] + shocks[t]
+    return pd.Series(100 + increments.cumsum(), index=pd.bdate_range("2020-01-01", periods=n))
+
+def test_arima_order_search_prunes_and_fits_best():
+    """Order search picks d by ADF, stops early and leaves the best model fitted"""
+    from concurrent.futures import ThreadPoolExecutor
+    from src.models import ARIMAModel
+    series = make_ar_series()
+    arima = ARIMAModel("TEST")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        order = arima.search_order(series, p_values=range(0, 4), q_values=range(0, 3), executor=pool)
+
+    assert order[1] == 1
+    assert order[0] + order[2] >= 1
+    assert arima.model.model.order == order
+    assert min(arima.search_results.values()) == arima.search_results[order]
+    # Complexity 5 (p=3, q=2) is never reached once larger models stop improving
+    assert len(arima.search_results) < 12
+
+def test_arima_incremental_update_matches_filtered_full_fit():
+    """Appending new bars keeps parameters and extends the state like a full filter"""
+    from statsmodels.tsa.arima.model import ARIMA
+    from src.models import ARIMAModel
+    series = make_ar_series()
+    arima = ARIMAModel("TEST")
+    arima.train(series.iloc[:380], order=(1, 1, 0))
+    params = arima.model.params
+
+    arima.update(series.iloc[380:])
+    assert arima.model.nobs == 400
+    np.testing.assert_allclose(arima.model.params, params)
+
+    full = ARIMA(series.values, order=(1, 1, 0)).filter(params)
+    np.testing.assert_allclose(np.asarray(arima.predict(5)), full.forecast(5))
+
+    arima.update(series.iloc[-5:] + 1, refit=True)
+    assert arima.model.nobs == 405
@@ -0,0 +1,70 @@
+import pytest
+import numpy as np
+import pandas as pd
+from dataclasses import replace
+from src.data_processing import DataIngestion, ProjectConfig
+from src.panel import PricePanel
+
+@pytest.fixture
+def staggered():
+    """Three tickers: a full history, one with a two-day gap and one listed later"""
+    dates = pd.bdate_range("2024-01-01", periods=10, name="Date")
+    full = pd.Series(np.arange(10, dtype=float) + 100, index=dates)
+    gappy = pd.Series(np.arange(10, dtype=float) + 200, index=dates).drop(dates[[4, 5]])
+    late = pd.Series(np.arange(6, dtype=float) + 300, index=dates[4:])
+    return {'FULL': full, 'GAP': gappy, 'LATE': late}
+
+def test_single_pass_alignment_matches_outer_join(staggered):
+    panel = PricePanel.from_series(staggered, dtype=np.float64, fill='none')
+    expected = pd.concat(staggered, axis=1, join='outer')
+    np.testing.assert_array_equal(panel.values, expected.values)
+    assert panel.dates.equals(expected.index) and panel.dates.name == "Date"
+    np.testing.assert_array_equal(panel.observed, expected.notna().values)
+
+def test_forward_fill_respects_the_limit_and_marks_filled_cells(staggered):
+    panel = PricePanel.from_series(staggered, dtype=np.float32, fill='ffill', max_fill=1)
+    gap = panel.tickers.index('GAP')
+    assert panel.values.dtype == np.float32
+    assert panel.values[4, gap] == 203 and np.isnan(panel.values[5, gap])
+    assert panel.valid[4, gap] and not panel.observed[4, gap]
+    # Nothing is filled before a listing
+    late = panel.tickers.index('LATE')
+    assert not panel.valid[:4, late].any()
+
+def test_listing_policies(staggered):
+    common = PricePanel.from_series(staggered, listing='common')
+    assert common.dates[0] == pd.Timestamp("2024-01-05")
+    assert common.complete_rows().all()
+
+    backfilled = PricePanel.from_series(staggered, listing='backfill')
+    late = backfilled.tickers.index('LATE')
+    np.testing.assert_array_equal(backfilled.values[:4, late], 300)
+    assert backfilled.listing_dates()['LATE'] == pd.Timestamp("2024-01-05")
+
+    with pytest.raises(ValueError):
+        PricePanel.from_series(staggered, listing='unknown')
+
+def test_select_and_frame_share_memory(staggered):
+    panel = PricePanel.from_series(staggered, listing='backfill')
+    window = panel.select(start="2024-01-03", end="2024-01-09")
+    assert len(window.dates) == 5 and np.shares_memory(window.values, panel.values)
+    assert np.shares_memory(panel.to_frame().to_numpy(), panel.values)
+    subset = panel.select(['LATE', 'FULL'])
+    assert subset.tickers == ['LATE', 'FULL'] and subset.shape == (10, 2)
+    np.testing.assert_allclose(panel.returns()[0, 0], 101 / 100 - 1, rtol=1e-6)
+
+def test_combine_and_save_keeps_dates_that_dropna_discarded(tmp_path, staggered):
+    frames = {t: s.to_frame('Close') for t, s in staggered.items()}
+    config = replace(ProjectConfig(), TICKERS=list(frames), CACHE_DIR=None, EXPORT_CSV=False,
+                     STORAGE_PATH=str(tmp_path / "prices.npy"), PRICE_DTYPE="float32")
+    ingestion = DataIngestion(config)
+    combined = ingestion.combine_and_save(frames)
+
+    # The old join + dropna kept 4 of the 6 listed dates; the fill bridges GAP's missing days
+    assert len(combined) == 6 and not combined.isna().any().any()
+    loaded = ingestion.load_processed()
+    assert (loaded.dtypes == np.float32).all()
+    pd.testing.assert_frame_equal(loaded, combined, check_freq=False)
+
+    panel = ingestion.load_panel(['GAP'])
+    assert panel.valid.all() and panel.values.dtype == np.float32
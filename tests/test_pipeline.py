@@ -0,0 +1,91 @@
+import pytest
+import numpy as np
+import pandas as pd
+from dataclasses import replace
+from src.data_processing import DataIngestion, ProjectConfig
+from src.pipeline import ArtifactCache, Pipeline, Stage, build_pipeline, content_hash
+
+@pytest.fixture
+def toy(tmp_path):
+    """Three-stage chain whose functions count their calls"""
+    calls = {'source': 0, 'square': 0, 'total': 0}
+
+    def source(n):
+        calls['source'] += 1
+        return np.arange(n, dtype=float)
+
+    def square(source, noise):
+        calls['square'] += 1
+        return source ** 2 + noise * np.random.random(len(source))
+
+    def total(square):
+        calls['total'] += 1
+        return float(square.sum())
+
+    def make(n=5, noise=0.0, seed=0):
+        return Pipeline([Stage("source", source, params={'n': n}),
+                         Stage("square", square, ["source"], {'noise': noise}),
+                         Stage("total", total, ["square"])],
+                        ArtifactCache(str(tmp_path / "cache")), seed=seed)
+    return make, calls
+
+def test_rerun_with_unchanged_inputs_skips_every_stage(toy):
+    make, calls = toy
+    first = make().run()
+    assert set(first.status.values()) == {"computed"} and first.output('total') == 30.0
+
+    second = make().run()
+    assert set(second.status.values()) == {"cached"}
+    assert second.output('total') == 30.0 and calls == {'source': 1, 'square': 1, 'total': 1}
+    assert second.hashes == first.hashes
+
+def test_changed_params_invalidate_only_downstream_stages(toy):
+    make, calls = toy
+    make().run()
+    run = make(noise=1.0).run()
+    assert run.status == {'source': "cached", 'square': "computed", 'total': "computed"}
+
+    # A forced stage that reproduces its output leaves its downstream cached
+    run = make().run(force=["source"])
+    assert run.status == {'source': "computed", 'square': "cached", 'total': "cached"}
+    assert calls['source'] == 2
+
+def test_seeded_stages_are_bit_reproducible(toy, tmp_path):
+    make, _ = toy
+    first = make(noise=1.0, seed=7).run(["square"])
+    again = make(noise=1.0, seed=7).run(["square"], force=["square"])
+    assert again.status['square'] == "computed" and again.hashes['square'] == first.hashes['square']
+    np.testing.assert_array_equal(again.output('square'), first.output('square'))
+    assert make(noise=1.0, seed=8).run(["square"]).hashes['square'] != first.hashes['square']
+
+def test_graph_validation_and_content_hashes():
+    pipeline = Pipeline([Stage("a", lambda b: b, ["b"]), Stage("b", lambda a: a, ["a"])])
+    with pytest.raises(ValueError, match="cycle"):
+        pipeline.order()
+    with pytest.raises(ValueError, match="Unknown stage"):
+        pipeline.order(["c"])
+    frame = pd.DataFrame({'x': [1.0, 2.0]})
+    assert content_hash({'f': frame, 'n': [1, 2]}) == content_hash({'n': [1, 2], 'f': frame.copy()})
+    assert content_hash(np.zeros(2)) != content_hash(np.zeros(2, dtype=np.float32))
+
+def test_gmf_pipeline_recomputes_after_new_data(tmp_path):
+    rng = np.random.default_rng(0)
+    prices = pd.DataFrame(100 * np.exp(rng.normal(3e-4, 0.01, size=(300, 3)).cumsum(axis=0)),
+                          index=pd.bdate_range("2022-01-03", periods=300, name="Date"), columns=['A', 'B', 'C'])
+    config = replace(ProjectConfig(), TICKERS=['A', 'B', 'C'], CACHE_DIR=None, EXPORT_CSV=False,
+                     STORAGE_PATH=str(tmp_path / "prices.npy"), MODEL_STORE_DIR=str(tmp_path / "models"),
+                     PIPELINE_CACHE_DIR=str(tmp_path / "cache"))
+    DataIngestion(config).store.write(prices)
+
+    def run():
+        return build_pipeline(config, models=['arima'], forecast_steps=5, objective='hrp').run()
+
+    first = run()
+    assert set(first.status.values()) == {"computed"}
+    assert first.output('forecasts')['arima'].shape == (5, 3)
+    assert abs(sum(first.output('weights')['weights'].values()) - 1) < 1e-6
+    assert set(run().status.values()) == {"cached"}
+
+    DataIngestion(config).store.append(pd.DataFrame({'A': [101.0], 'B': [99.0], 'C': [100.0]},
+                                                    index=pd.DatetimeIndex(["2023-03-01"])))
+    assert set(run().status.values()) == {"computed"}
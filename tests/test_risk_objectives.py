@@ -0,0 +1,87 @@
+import pytest
+import numpy as np
+import pandas as pd
+import cvxpy as cp
+from pypfopt.hierarchical_portfolio import HRPOpt
+from src.optimization import PortfolioOptimizer
+from src.risk_objectives import (CVaROptimizer, ScenarioSet, historical_cvar, risk_parity_weights,
+                                 scenario_set)
+
+@pytest.fixture
+def prices():
+    """Six assets in two correlated blocks with different volatilities"""
+    rng = np.random.default_rng(0)
+    common = rng.normal(size=(400, 2))
+    loadings = np.array([[1, 0], [1, 0], [1, 0], [0, 1], [0, 1], [0, 1]]) * 0.008
+    noise = rng.standard_t(4, size=(400, 6)) * np.array([0.004, 0.006, 0.01, 0.003, 0.005, 0.012])
+    returns = common @ loadings.T + noise + 3e-4
+    dates = pd.bdate_range("2021-01-01", periods=401)
+    values = 100 * np.vstack([np.ones(6), np.cumprod(1 + returns, axis=0)])
+    return pd.DataFrame(values, index=dates, columns=[f"A{i}" for i in range(6)])
+
+def test_scenario_set_is_cached_per_data_version(prices):
+    """The same data maps to one ScenarioSet; changed data gets a new one"""
+    first = scenario_set(prices)
+    assert scenario_set(prices.copy()) is first
+    assert first.linkage('single') is first.linkage('single')
+    assert scenario_set(prices.iloc[:-1]) is not first
+
+@pytest.mark.parametrize("confidence, target", [(0.95, None), (0.99, None), (0.9, 0.1)])
+def test_cvar_lp_matches_dense_formulation(prices, confidence, target):
+    """The sparse HiGHS LP reaches the same optimum as a direct cvxpy formulation"""
+    scenarios = ScenarioSet(prices)
+    optimizer = CVaROptimizer(scenarios)
+    weights = np.array(list(optimizer.optimize(confidence, target).values()))
+
+    w, alpha = cp.Variable(6), cp.Variable()
+    R = scenarios.returns
+    objective = alpha + cp.sum(cp.pos(-R @ w - alpha)) / ((1 - confidence) * len(R))
+    constraints = [cp.sum(w) == 1, w >= 0]
+    if target is not None:
+        constraints.append(scenarios.expected_returns() @ w >= target)
+    problem = cp.Problem(cp.Minimize(objective), constraints)
+    problem.solve()
+
+    assert optimizer.cvar == pytest.approx(problem.value, rel=1e-6)
+    assert historical_cvar(weights, R, confidence)[1] == pytest.approx(optimizer.cvar, rel=1e-6)
+    if target is not None:
+        assert scenarios.expected_returns() @ weights >= target - 1e-8
+
+def test_cvar_block_is_reused_across_confidence_levels(prices):
+    scenarios = ScenarioSet(prices)
+    CVaROptimizer(scenarios).optimize(0.95)
+    block = scenarios.cvar_block()
+    CVaROptimizer(scenarios, weight_bounds=(0, 0.3)).optimize(0.99)
+    assert scenarios.cvar_block() is block
+
+def test_risk_parity_equalizes_contributions(prices):
+    """Equal and custom budgets are reproduced by the risk contributions"""
+    cov = ScenarioSet(prices).covariance()
+    for budgets in (None, [1, 2, 3, 1, 2, 3]):
+        w = risk_parity_weights(cov, budgets)
+        contributions = w * (cov @ w)
+        target = np.full(6, 1 / 6) if budgets is None else np.array(budgets) / 12
+        np.testing.assert_allclose(contributions / contributions.sum(), target, atol=1e-8)
+        assert w.sum() == pytest.approx(1)
+
+@pytest.mark.parametrize("method", ['single', 'ward'])
+def test_hrp_matches_pypfopt(prices, method):
+    expected = HRPOpt(prices.pct_change().dropna()).optimize(method)
+    weights = PortfolioOptimizer(prices).optimize_hrp(method)
+    np.testing.assert_allclose([weights[t] for t in prices.columns], [expected[t] for t in prices.columns])
+
+def test_optimizer_objectives_return_full_allocations(prices):
+    optimizer = PortfolioOptimizer(prices)
+    for weights in (optimizer.optimize_cvar(0.95, weight_bounds=(0, 0.4)),
+                    optimizer.optimize_risk_parity({t: 1 for t in prices.columns})):
+        assert sum(weights.values()) == pytest.approx(1)
+        assert min(weights.values()) >= 0
+
+def test_scenario_objectives_need_price_history(prices):
+    """Optimizers without a price history reject scenario objectives up front"""
+    full = PortfolioOptimizer(prices)
+    optimizer = PortfolioOptimizer.from_estimates(*full.calculate_metrics())
+    for objective in (optimizer.optimize_cvar, optimizer.optimize_risk_parity, optimizer.optimize_hrp):
+        with pytest.raises(ValueError, match="need price_data"):
+            objective()
+    assert sum(optimizer.optimize_performance().values()) == pytest.approx(1, abs=1e-4)
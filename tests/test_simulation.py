@@ -0,0 +1,94 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.simulation import MonteCarloSimulator, SimulationResult, forecast_drift
+from src.optimization import PortfolioOptimizer
+
+@pytest.fixture
+def prices():
+    """Correlated geometric random walks"""
+    rng = np.random.default_rng(0)
+    cov = np.array([[1.0, 0.6, 0.2], [0.6, 1.0, 0.1], [0.2, 0.1, 1.0]]) * 1e-4
+    log_returns = rng.multivariate_normal([3e-4, 1e-4, 2e-4], cov, size=750)
+    dates = pd.bdate_range("2020-01-01", periods=751)
+    values = 100 * np.exp(np.vstack([np.zeros(3), log_returns.cumsum(axis=0)]))
+    return pd.DataFrame(values, index=dates, columns=['TSLA', 'BND', 'SPY'])
+
+WEIGHTS = {'TSLA': 0.5, 'BND': 0.3, 'SPY': 0.2}
+
+def test_var_and_cvar_on_known_distribution():
+    """Tail statistics follow their definitions on a hand-built sample"""
+    result = SimulationResult(np.linspace(-0.10, 0.09, 20), np.zeros(20), horizon=1)
+
+    cutoff = np.quantile(result.terminal_returns, 0.05)
+    assert result.var(0.95) == pytest.approx(-cutoff)
+    assert result.cvar(0.95) == pytest.approx(0.10)
+    assert result.cvar(0.95) >= result.var(0.95)
+
+@pytest.mark.parametrize("method", ['bootstrap', 'gaussian', 'student_t'])
+def test_simulation_is_reproducible_for_a_seed(prices, method):
+    """
+    The same seed and chunk size give the same paths. Seeds are spawned per chunk, so
+    another chunk size draws different paths, but still n_paths valid ones.
+    """
+    a = MonteCarloSimulator(prices, method=method, chunk_size=300, seed=7).simulate(WEIGHTS, 1000)
+    b = MonteCarloSimulator(prices, method=method, chunk_size=300, seed=7).simulate(WEIGHTS, 1000)
+    np.testing.assert_array_equal(a.terminal_returns, b.terminal_returns)
+    np.testing.assert_array_equal(a.max_drawdowns, b.max_drawdowns)
+
+    for result in (a, MonteCarloSimulator(prices, method=method, chunk_size=128, seed=7).simulate(WEIGHTS, 1000)):
+        assert result.terminal_returns.shape == result.max_drawdowns.shape == (1000,)
+        assert np.all(result.max_drawdowns <= 0)
+        assert np.all(result.max_drawdowns <= np.minimum(result.terminal_returns, 0) + 1e-12)
+
+def test_gaussian_paths_match_analytic_moments(prices):
+    """Horizon log-return mean and variance of the portfolio match the fitted Gaussian"""
+    simulator = MonteCarloSimulator(prices, method='gaussian', horizon=1, seed=0)
+    w = np.array(list(WEIGHTS.values()))
+    result = simulator.simulate(w, 40000)
+
+    mean = np.exp(simulator.mean) @ w - 1
+    assert result.terminal_returns.mean() == pytest.approx(mean, abs=2e-4)
+    assert result.terminal_returns.std() == pytest.approx(np.sqrt(w @ np.cov(simulator.log_returns, rowvar=False) @ w),
+                                                          rel=0.03)
+
+def test_student_t_has_fatter_tails(prices):
+    """With matched covariance the Student-t draws put more mass beyond the Gaussian VaR"""
+    gaussian = MonteCarloSimulator(prices, method='gaussian', horizon=1, seed=1).simulate(WEIGHTS, 40000)
+    student = MonteCarloSimulator(prices, method='student_t', df=3, horizon=1, seed=1).simulate(WEIGHTS, 40000)
+
+    assert student.terminal_returns.std() == pytest.approx(gaussian.terminal_returns.std(), rel=0.1)
+    assert student.cvar(0.99) > gaussian.cvar(0.99)
+
+def test_drift_from_model_forecasts(prices):
+    """Forecast-implied drift replaces the historical mean of the draws"""
+    class FlatForecast:
+        def __init__(self, level):
+            self.level = level
+
+        def predict(self, steps):
+            return np.full(steps, self.level)
+
+    last = prices.iloc[-1]
+    models = {t: FlatForecast(last[t] * 1.05) for t in prices.columns}
+    drift = forecast_drift(models, prices, horizon=10)
+    np.testing.assert_allclose(drift[0], np.log(1.05))
+    np.testing.assert_allclose(drift[1:], 0, atol=1e-12)
+
+    result = MonteCarloSimulator(prices, horizon=10, drift=drift, seed=3).simulate(WEIGHTS, 20000)
+    assert np.median(result.terminal_returns) == pytest.approx(0.05, abs=0.005)
+
+def test_process_pool_matches_serial(prices):
+    """Spreading chunks across processes reproduces the serial result exactly"""
+    serial = MonteCarloSimulator(prices, chunk_size=500, seed=11).simulate(WEIGHTS, 2000)
+    parallel = MonteCarloSimulator(prices, chunk_size=500, seed=11, n_jobs=2).simulate(WEIGHTS, 2000)
+    np.testing.assert_array_equal(serial.terminal_returns, parallel.terminal_returns)
+
+def test_optimizer_simulate_risk(prices):
+    result = PortfolioOptimizer(prices).simulate_risk(WEIGHTS, horizon=5, n_paths=500, seed=0)
+    assert set(result.summary()) >= {'var', 'cvar', 'median_drawdown'}
+
+def test_simulate_risk_needs_price_history(prices):
+    optimizer = PortfolioOptimizer.from_estimates(*PortfolioOptimizer(prices).calculate_metrics())
+    with pytest.raises(ValueError, match="need price_data"):
+        optimizer.simulate_risk(WEIGHTS, horizon=5, n_paths=100)
@@ -0,0 +1,101 @@
+import os
+import threading
+import pytest
+import numpy as np
+import pandas as pd
+from dataclasses import replace
+from src.data_processing import DataIngestion, ProjectConfig
+from src.model_store import ModelStore
+from src.snapshot import JobQueue, SnapshotBuilder, SnapshotStore, SnapshotWorker
+
+@pytest.fixture
+def worker(tmp_path):
+    """ARIMA-only worker over a temporary processed store"""
+    rng = np.random.default_rng(0)
+    prices = pd.DataFrame(100 * np.exp(rng.normal(3e-4, 0.01, size=(300, 3)).cumsum(axis=0)),
+                          index=pd.bdate_range("2022-01-03", periods=300, name="Date"), columns=['A', 'B', 'C'])
+    config = replace(ProjectConfig(), TICKERS=['A', 'B', 'C'], CACHE_DIR=None, EXPORT_CSV=False,
+                     STORAGE_PATH=str(tmp_path / "prices.npy"), SNAPSHOT_DIR=str(tmp_path / "snapshots"),
+                     JOB_QUEUE_PATH=str(tmp_path / "jobs.sqlite"))
+    ingestion = DataIngestion(config)
+    ingestion.store.write(prices)
+    builder = SnapshotBuilder(ingestion, ModelStore(str(tmp_path / "models")), config.TICKERS,
+                              models=['arima'], forecast_steps=10, frontier_points=5)
+    return SnapshotWorker(JobQueue(config.JOB_QUEUE_PATH), builder, SnapshotStore(config.SNAPSHOT_DIR, keep=2),
+                          poll_interval=0.01)
+
+def test_job_queue_dedupes_claims_and_requeues(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    first = queue.enqueue("snapshot", {'version': 'v1'})
+    assert queue.enqueue("snapshot", {'version': 'v1'}) == first
+    second = queue.enqueue("snapshot", {'version': 'v2'})
+
+    job = queue.claim()
+    assert job == {'id': first, 'kind': "snapshot", 'payload': {'version': 'v1'}}
+    assert queue.claim()['id'] == second and queue.claim() is None
+
+    queue.finish(first)
+    queue.finish(second, error="boom")
+    assert queue.counts() == {'done': 1, 'failed': 1}
+
+    queue.enqueue("snapshot", {'version': 'v3'})
+    queue.claim()
+    assert queue.requeue_stale(older_than=-1) == 1
+    assert queue.claim()['payload'] == {'version': 'v3'}
+
+def test_concurrent_claims_hand_out_each_job_once(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    ids = {queue.enqueue("snapshot", {'n': n}) for n in range(40)}
+    claimed, lock = [], threading.Lock()
+
+    def drain():
+        while (job := queue.claim()) is not None:
+            with lock:
+                claimed.append(job['id'])
+
+    threads = [threading.Thread(target=drain) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(claimed) == sorted(ids)
+
+def test_worker_publishes_a_snapshot_per_data_version(worker):
+    assert worker.request_refresh() is not None
+    assert worker.run_once() and not worker.run_once()
+
+    snapshot = worker.snapshots.latest()
+    assert snapshot['version'] == worker.builder.ingestion.store.version()
+    assert snapshot['errors'] == {}
+    assert set(snapshot['cards']) == {'A', 'B', 'C'}
+    assert len(snapshot['models']['A']['arima']['forecast']['values']) == 10
+    # Forecasts continue the trading-day calendar
+    assert all(pd.Timestamp(d).weekday() < 5 for d in snapshot['models']['A']['arima']['forecast']['dates'])
+    assert abs(sum(snapshot['optimization']['weights'].values()) - 1) < 1e-6
+    assert len(snapshot['optimization']['frontier']['returns']) == 5
+
+    # Unchanged data needs no new snapshot
+    assert worker.request_refresh() is None
+
+    store = worker.builder.ingestion.store
+    store.append(pd.DataFrame({'A': [1.0], 'B': [2.0], 'C': [3.0]}, index=pd.DatetimeIndex(["2023-03-01"])))
+    assert worker.request_refresh() is not None
+    worker.run_once()
+    assert worker.snapshots.latest()['cards']['A']['price'] == 1.0
+
+def test_worker_loop_stops_and_prunes_old_versions(worker):
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+    try:
+        for day in range(3):
+            while worker.snapshots.latest_version() != worker.builder.ingestion.store.version():
+                worker.stop_event.wait(0.05)
+            worker.builder.ingestion.store.append(pd.DataFrame(
+                {'A': [1.0], 'B': [2.0], 'C': [3.0]}, index=pd.DatetimeIndex([f"2023-03-0{day + 1}"])))
+        while worker.snapshots.latest_version() != worker.builder.ingestion.store.version():
+            worker.stop_event.wait(0.05)
+    finally:
+        worker.stop()
+        thread.join(timeout=30)
+    assert not thread.is_alive()
+    assert len([f for f in os.listdir(worker.snapshots.directory) if f.startswith("snapshot-")]) == 2
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import pytest
+import numpy as np
+import pandas as pd
+from src.estimators import RollingMomentEstimator
+from src.storage import create_store
+from src.streaming import FileTailSource, ReplaySource, StreamingPipeline
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2022-01-03", periods=400, name="Date")
+    return pd.DataFrame(100 * np.exp(rng.normal(3e-4, 0.01, size=(400, 3)).cumsum(axis=0)),
+                        index=dates, columns=['TSLA', 'BND', 'SPY'])
+
+class SlowForecaster:
+    """Stands in for ARIMAModel: records the bars it is extended with"""
+    def __init__(self, delay):
+        self.delay = delay
+        self.seen = []
+
+    def update(self, new_data):
+        import time
+        time.sleep(self.delay)
+        self.seen.extend(np.asarray(new_data).tolist())
+
+    def predict(self, steps):
+        return np.full(steps, self.seen[-1])
+
+def test_stream_matches_batch_recomputation(tmp_path, prices):
+    """Store, rolling moments and metric cards after streaming equal a batch pass over the full history"""
+    history, live = prices.iloc[:300], prices.iloc[300:]
+    store = create_store('npy', str(tmp_path / "prices.npy"))
+    store.write(history)
+
+    snapshot_path = str(tmp_path / "snapshot.json")
+    pipeline = StreamingPipeline(ReplaySource(live), history, store=store, window=120, batch_size=16,
+                                 snapshot_path=snapshot_path)
+    snapshot = asyncio.run(pipeline.run())
+
+    pd.testing.assert_frame_equal(store.read(), prices, check_freq=False)
+    batch = RollingMomentEstimator.from_prices(prices, window=120)
+    np.testing.assert_allclose(pipeline.estimator.covariance(), batch.covariance())
+    np.testing.assert_allclose(list(snapshot['expected_returns'].values()), batch.expected_returns())
+    assert snapshot['cards']['SPY']['price'] == pytest.approx(prices['SPY'].iloc[-1])
+    assert snapshot['cards']['SPY']['change_pct'] == pytest.approx(100 * (prices['SPY'].iloc[-1] / prices['SPY'].iloc[-2] - 1))
+    assert snapshot['timestamp'] == str(prices.index[-1])
+    assert pipeline.stats['bars'] == 100
+    with open(snapshot_path) as f:
+        assert json.load(f)['cards'] == snapshot['cards']
+
+def test_slow_forecaster_does_not_block_ingestion(prices):
+    """Bars that arrive during a slow refresh are coalesced into the next one, none are lost"""
+    history, live = prices.iloc[:300], prices.iloc[300:]
+    model = SlowForecaster(delay=0.05)
+    pipeline = StreamingPipeline(ReplaySource(live, interval=0.001), history, batch_size=4,
+                                 forecasters={'TSLA': model}, forecast_steps=3, queue_size=8)
+    snapshot = asyncio.run(pipeline.run())
+
+    np.testing.assert_allclose(model.seen, live['TSLA'].to_numpy())
+    assert pipeline.stats['forecast_runs'] < pipeline.stats['batches']
+    assert pipeline.stats['max_queue'] <= 8
+    np.testing.assert_allclose(snapshot['forecasts']['TSLA'], [live['TSLA'].iloc[-1]] * 3)
+
+def test_subscribers_only_see_latest_snapshot(prices):
+    """A subscriber that never reads holds one snapshot instead of a backlog"""
+    async def scenario():
+        pipeline = StreamingPipeline(ReplaySource(prices.iloc[300:]), prices.iloc[:300], batch_size=10)
+        queue = pipeline.subscribe()
+        await pipeline.run()
+        return pipeline, queue
+
+    pipeline, queue = asyncio.run(scenario())
+    assert queue.qsize() == 1
+    assert queue.get_nowait()['timestamp'] == str(prices.index[-1])
+    assert pipeline.stats['dropped_snapshots'] == pipeline.stats['batches'] - 1
+
+def test_file_tail_source_emits_appended_lines(tmp_path, prices):
+    """Lines written after the stream starts are emitted once complete; partial lines wait"""
+    path = tmp_path / "live.csv"
+    prices.iloc[:2].to_csv(path)
+
+    async def scenario():
+        source = FileTailSource(str(path), poll_interval=0.01, idle_timeout=0.2)
+        received = []
+
+        async def writer():
+            await asyncio.sleep(0.05)
+            with open(path, "a") as f:
+                f.write("2023-06-01,1.0,2.0,")
+                f.flush()
+                await asyncio.sleep(0.05)
+                f.write("3.0\n2023-06-02,4.0,5.0,6.0\n")
+
+        async def reader():
+            async for bar in source.bars():
+                received.append(bar)
+
+        await asyncio.gather(writer(), reader())
+        return received
+
+    received = asyncio.run(scenario())
+    assert [ts for ts, _ in received] == [pd.Timestamp("2023-06-01"), pd.Timestamp("2023-06-02")]
+    assert received[1][1] == {'TSLA': 4.0, 'BND': 5.0, 'SPY': 6.0}
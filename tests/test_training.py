@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+from src.model_store import ModelStore
+from src.training import TrainingOrchestrator, summarize
+
+def make_prices(tickers, periods=120):
+    """Synthetic price panel"""
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2022-01-03", periods=periods)
+    return pd.DataFrame(100 + rng.normal(size=(periods, len(tickers))).cumsum(axis=0), index=dates, columns=tickers)
+
+def test_orchestrator_trains_universe_and_reuses_store(tmp_path):
+    """All tickers are fitted in the pool, then served from the store on the next run"""
+    prices = make_prices(['AAA', 'BBB'])
+    prices.loc[prices.index[:5], 'BBB'] = np.nan
+    store = ModelStore(str(tmp_path / "store"))
+    orchestrator = TrainingOrchestrator(store, arima_workers=2,
+                                        train_params={'arima': {'order': (1, 1, 0)}})
+
+    report = summarize(orchestrator.run(prices, model_types=['arima']))
+    assert list(report['ticker']) == ['AAA', 'BBB']
+    assert report['error'].isna().all()
+    assert not report['cached'].any()
+
+    rerun = summarize(orchestrator.run(prices, model_types=['arima']))
+    assert rerun['cached'].all()
+    assert store.get(rerun['key'][0]).predict(3).shape == (3,)
+
+def test_orchestrator_reports_failures(tmp_path):
+    """A failing fit is reported per ticker instead of aborting the run"""
+    prices = make_prices(['AAA'])
+    store = ModelStore(str(tmp_path / "store"))
+    orchestrator = TrainingOrchestrator(store, arima_workers=1,
+                                        train_params={'arima': {'order': (1, 1, 0), 'bogus': 1}})
+
+    report = summarize(orchestrator.run(prices, model_types=['arima']))
+    assert report['error'][0] is not None
+    assert len(store._read_index()) == 0
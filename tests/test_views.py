@@ -0,0 +1,94 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src import models
+from src.optimization import PortfolioOptimizer
+from src.views import ForecastViewGenerator, ForecastViews, black_litterman
+
+class DriftModel(models.TimeSeriesModel):
+    """Deterministic forecaster: extrapolates the last price at a per-ticker daily drift"""
+    DRIFT = {'A': 0.002, 'B': 0.0, 'C': -0.001}
+    calls = 0
+
+    def train(self, data):
+        DriftModel.calls += 1
+        self.model = float(data.iloc[-1])
+
+    def predict(self, steps):
+        return self.model * (1 + self.DRIFT[self.ticker]) ** np.arange(1, steps + 1)
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(100 * np.exp(rng.normal(3e-4, 0.01, size=(400, 3)).cumsum(axis=0)),
+                        index=pd.bdate_range("2022-01-03", periods=400), columns=['A', 'B', 'C'])
+
+@pytest.fixture
+def drift(monkeypatch):
+    monkeypatch.setitem(models.MODEL_TYPES, 'drift', DriftModel)
+    monkeypatch.setattr(ForecastViewGenerator, '_cache', type(ForecastViewGenerator._cache)())
+    DriftModel.calls = 0
+
+def test_views_annualise_the_horizon_forecast(prices, drift):
+    views = ForecastViewGenerator('drift', horizon=21, chunk_size=2).generate(prices)
+    expected = (1 + pd.Series(DriftModel.DRIFT)) ** 252 - 1
+    pd.testing.assert_series_equal(views.expected_returns, expected, check_names=False)
+    assert views.error_covariance is None and views.failed == ()
+
+def test_views_are_cached_per_data_version(prices, drift, tmp_path):
+    generator = ForecastViewGenerator('drift', horizon=21, origins=2, cache_dir=str(tmp_path))
+    first = generator.generate(prices)
+    calls = DriftModel.calls
+    assert calls == 3 * 3  # one fit per ticker plus one per origin
+
+    assert generator.generate(prices) is first and DriftModel.calls == calls
+
+    # A fresh process reloads the views from disk
+    ForecastViewGenerator._cache.clear()
+    reloaded = generator.generate(prices)
+    assert DriftModel.calls == calls
+    pd.testing.assert_frame_equal(reloaded.error_covariance, first.error_covariance, check_dtype=False)
+
+    prices.iloc[-1] *= 1.01
+    generator.generate(prices)
+    assert DriftModel.calls == 2 * calls
+
+def test_parallel_chunks_match_serial(prices):
+    serial = ForecastViewGenerator('arima', horizon=10, chunk_size=1, n_jobs=1)
+    parallel = ForecastViewGenerator('arima', horizon=10, chunk_size=1, n_jobs=2)
+    a = serial.generate(prices)
+    ForecastViewGenerator._cache.clear()
+    b = parallel.generate(prices)
+    pd.testing.assert_series_equal(a.expected_returns, b.expected_returns)
+
+def test_black_litterman_pulls_returns_toward_confident_views(prices):
+    optimizer = PortfolioOptimizer(prices)
+    prior, cov = optimizer.calculate_metrics()
+    views = ForecastViews(pd.Series({'A': 0.5}), 21, 'drift',
+                          error_covariance=pd.DataFrame([[1e-6]], index=['A'], columns=['A']))
+    posterior, _ = black_litterman(prior, cov, views)
+    assert abs(posterior['A'] - 0.5) < 0.01
+
+    loose = ForecastViews(pd.Series({'A': 0.5}), 21, 'drift')
+    posterior, _ = black_litterman(prior, cov, loose)
+    assert prior['A'] < posterior['A'] < 0.5
+
+def test_optimizer_tilts_toward_forecast_winners(prices, drift):
+    views = ForecastViewGenerator('drift', horizon=21).generate(prices)
+    baseline = PortfolioOptimizer(prices).optimize_performance()
+    tilted = PortfolioOptimizer(prices).optimize_performance(views=views)
+    assert tilted['A'] > baseline['A']
+    assert tilted['C'] <= baseline['C']
+
+def test_views_are_blended_from_the_prior_every_time(prices, drift):
+    views = ForecastViewGenerator('drift', horizon=21).generate(prices)
+    optimizer = PortfolioOptimizer(prices)
+    first = optimizer.optimize_performance(views=views)
+    assert optimizer.optimize_performance(views=views) == first
+    # The optimizer itself keeps the historical estimates
+    assert optimizer.optimize_performance() == PortfolioOptimizer(prices).optimize_performance()
+
+    optimizer.apply_views(views)
+    mu = optimizer.mu.copy()
+    optimizer.apply_views(views)
+    pd.testing.assert_series_equal(optimizer.mu, mu)